@@ -1,10 +1,13 @@
 """
 FastAPI dependencies for authentication and authorization.
 """
-from fastapi import Depends, HTTPException, status
+import hmac
+import os
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Dict, Optional
-from services.firebase import verify_id_token, initialize_firebase
+from services.firebase import verify_id_token_async
+from services.metrics import stage
 
 # Security scheme for Bearer token authentication
 security = HTTPBearer()
@@ -30,14 +33,12 @@ async def get_current_user(
     Raises:
         HTTPException: If token is missing, invalid, or expired
     """
-    # Initialize Firebase if not already initialized
-    initialize_firebase()
-    
     # Extract the token from the Bearer credentials
     id_token = credentials.credentials
     
-    # Verify the token
-    decoded_token = verify_id_token(id_token)
+    # Verify the token off the event loop (verify_id_token_async initializes Firebase if needed)
+    with stage("firebase_verify"):
+        decoded_token = await verify_id_token_async(id_token)
     
     if decoded_token is None:
         raise HTTPException(
@@ -73,8 +74,31 @@ async def get_current_user_optional(
     if credentials is None:
         return None
     
-    initialize_firebase()
     id_token = credentials.credentials
-    decoded_token = verify_id_token(id_token)
+    with stage("firebase_verify"):
+        decoded_token = await verify_id_token_async(id_token)
     return decoded_token
 
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    FastAPI dependency guarding operational endpoints (model reload, etc.).
+    
+    The request must carry an X-Admin-Token header equal to the ADMIN_TOKEN
+    environment variable. When ADMIN_TOKEN is not set, admin endpoints are
+    disabled entirely.
+    
+    Raises:
+        HTTPException: 403 if admin endpoints are disabled or the token is wrong
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.",
+        )
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token",
+        )
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -15,6 +16,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Sampled request profiling, only installed when PROFILE_DIR is set (see services/profiler.py).
+# Added before MetricsMiddleware so it runs inside it and can tag profiles with the route
+from services.profiler import ProfilingMiddleware, profiling_enabled
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+# Request counters, stage timings and the Server-Timing header (see services/metrics.py)
+from services.metrics import MetricsMiddleware, stage
+from models.sign_language_model import set_stage_timer
+app.add_middleware(MetricsMiddleware)
+set_stage_timer(stage)
 # Initialize Firebase Admin SDK
 from services.firebase import initialize_firebase
 initialize_firebase()
@@ -23,10 +34,48 @@ from routers import api as api_router
 from routers import sign_scoring
 from routers import sign_language as sign_language_router
 from routers import auth as auth_router
+from routers import admin as admin_router
 app.include_router(api_router.router, prefix="")
 app.include_router(sign_scoring.router)
 app.include_router(sign_language_router.router)
 app.include_router(auth_router.router)
+app.include_router(admin_router.router)
+
+from models.registry import get_registry
+from services.executor import get_executor
+from services.template_store import get_template_store
+from services.firebase import get_token_verifier
+
+@app.on_event("startup")
+async def warm_up_model():
+    # Load and warm the model (and any executor workers) before taking traffic,
+    # so the first request does not pay for unpickling or cold code paths
+    registry = get_registry()
+    registry.current().warmup()
+    await get_executor().warmup()
+    # Load the sign template library, if one has been built
+    store = get_template_store()
+    if store is not None and store.uses_index:
+        store.nearest(store.landmarks[0], 1)
+    # Optionally pick up newly published model versions without a restart
+    watch_interval = float(os.getenv("MODEL_WATCH_INTERVAL", 0))
+    if watch_interval > 0:
+        app.state.model_watcher = asyncio.create_task(registry.watch(watch_interval))
+    # Fetch Firebase signing keys now and again before they expire, so token
+    # verification never waits for Google's certificate endpoint
+    verifier = get_token_verifier()
+    if verifier is not None:
+        app.state.token_key_refresher = asyncio.create_task(verifier.run_refresher())
+
+# Stop the model watcher, the signing key refresher and the inference
+# thread/process pool, if started
+@app.on_event("shutdown")
+async def shutdown_executor():
+    for name in ("model_watcher", "token_key_refresher"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    get_executor().shutdown()
 
 
 
@@ -0,0 +1,138 @@
+"""
+Memory-mappable on-disk format for the compiled sign language model.
+
+An artifact is a directory holding one .npy file per CompiledForest array and
+a small header.json:
+
+    asl_forest/
+        header.json     format version, classes, feature count, array
+                        dtypes/shapes and a sha256 checksum of the arrays
+        roots.npy, feature.npy, threshold.npy, left.npy, right.npy,
+        leaf_id.npy, leaf_value.npy
+
+Arrays are loaded with np.load(mmap_mode="r"), so every uvicorn worker on a
+machine shares the same page-cache copy and a cold start only reads the
+header. header.json is written last; a directory without it is incomplete.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .compiled_forest import CompiledForest
+
+ARTIFACT_FORMAT = "asl-compiled-forest"
+ARTIFACT_FORMAT_VERSION = 1
+HEADER_NAME = "header.json"
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact directory is missing, incomplete or corrupt"""
+
+
+def _checksum(arrays: Dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha256()
+    for name in CompiledForest.ARRAYS:
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return "sha256:" + digest.hexdigest()
+
+
+def artifact_exists(path: str) -> bool:
+    return os.path.exists(os.path.join(path, HEADER_NAME))
+
+
+def save_artifact(path: str, compiled: CompiledForest) -> Dict:
+    """Write a CompiledForest to an artifact directory and return its header"""
+    os.makedirs(path, exist_ok=True)
+    arrays = {name: getattr(compiled, name) for name in CompiledForest.ARRAYS}
+
+    # Drop the old header first so a crash mid-write leaves no valid artifact
+    header_path = os.path.join(path, HEADER_NAME)
+    if os.path.exists(header_path):
+        os.remove(header_path)
+
+    for name, array in arrays.items():
+        tmp_path = os.path.join(path, f".{name}.tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "classes": [str(cls) for cls in compiled.classes],
+        "n_features": compiled.n_features,
+        "n_trees": compiled.n_trees,
+        "max_depth": compiled.max_depth,
+        "arrays": {
+            name: {"dtype": array.dtype.str, "shape": list(array.shape)}
+            for name, array in arrays.items()
+        },
+        "checksum": _checksum(arrays),
+    }
+    tmp_header = header_path + ".tmp"
+    with open(tmp_header, "w") as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_header, header_path)
+    return header
+
+
+def read_header(path: str) -> Dict:
+    """Read and validate an artifact's header.json"""
+    header_path = os.path.join(path, HEADER_NAME)
+    if not os.path.exists(header_path):
+        raise ArtifactError(f"No {HEADER_NAME} in {path}")
+    with open(header_path) as f:
+        header = json.load(f)
+    if header.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"{path} is not an {ARTIFACT_FORMAT} artifact")
+    if header.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(
+            f"Unsupported artifact format version {header.get('format_version')} "
+            f"(this build reads version {ARTIFACT_FORMAT_VERSION})"
+        )
+    return header
+
+
+def load_artifact(path: str, mmap: bool = True, verify: bool = False) -> CompiledForest:
+    """
+    Load a CompiledForest from an artifact directory.
+
+    With mmap=True the arrays stay on disk and are paged in on demand.
+    verify=True recomputes the checksum, which reads every array in full.
+    """
+    header = read_header(path)
+    arrays: Dict[str, np.ndarray] = {}
+    for name in CompiledForest.ARRAYS:
+        array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        expected = header["arrays"][name]
+        if array.dtype.str != expected["dtype"] or list(array.shape) != expected["shape"]:
+            raise ArtifactError(f"{name}.npy does not match {HEADER_NAME} in {path}")
+        arrays[name] = array
+
+    if verify and _checksum(arrays) != header["checksum"]:
+        raise ArtifactError(f"Checksum mismatch for artifact {path}")
+
+    return CompiledForest(
+        classes=np.asarray(header["classes"], dtype=object),
+        n_features=header["n_features"],
+        max_depth=header["max_depth"],
+        **arrays,
+    )
+
+
+def describe_artifact(path: str) -> Optional[Dict]:
+    """Header fields useful for status endpoints, or None if there is no artifact"""
+    try:
+        header = read_header(path)
+    except (ArtifactError, OSError, ValueError):
+        return None
+    return {
+        key: header[key]
+        for key in ("format_version", "created_at", "n_features", "n_trees", "checksum")
+    }
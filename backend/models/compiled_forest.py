@@ -0,0 +1,195 @@
+"""
+Array-based evaluator for a trained RandomForestClassifier.
+
+CompiledForest flattens every tree of the forest into a handful of
+contiguous NumPy arrays and folds the StandardScaler into the split
+thresholds, so serving needs no scaling step, no sklearn input validation
+and no joblib dispatch. All trees are walked together, one level per
+step, and a single traversal yields both the probabilities and the label.
+
+Matching sklearn exactly:
+    sklearn scales a float64 row, casts it to float32, and only then compares
+    it with each float64 split threshold. That predicate is monotonic in the
+    raw feature value, so for every split there is a largest raw float64 value
+    that still goes left. CompiledForest finds that value by bisection when it
+    is built and stores it as the threshold, so `x <= threshold` on the raw
+    float64 input takes exactly the branch sklearn would. Leaf probabilities
+    are normalized and summed tree by tree in estimator order, matching
+    RandomForestClassifier.predict_proba with n_jobs=1. With n_jobs > 1 sklearn
+    sums trees in completion order, so its own output can differ in the last
+    bit from run to run.
+"""
+import numpy as np
+
+# int64 keys that sort in the same order as the float64 values they encode
+_SIGN_FLIP = np.int64(-2 ** 63)
+
+
+def _float_to_key(values: np.ndarray) -> np.ndarray:
+    bits = values.view(np.int64)
+    return np.where(bits >= 0, bits, _SIGN_FLIP - bits)
+
+
+def _key_to_float(keys: np.ndarray) -> np.ndarray:
+    bits = np.where(keys >= 0, keys, _SIGN_FLIP - keys)
+    return bits.view(np.float64)
+
+
+def _fold_thresholds(thresholds, mean, scale):
+    """
+    For each split, the largest raw float64 x with
+    float32((x - mean) / scale) <= threshold, i.e. the raw-space threshold
+    that routes every input exactly as sklearn would after scaling.
+    """
+    def goes_left(keys):
+        x = _key_to_float(keys)
+        with np.errstate(over="ignore", invalid="ignore"):
+            scaled = ((x - mean) / scale).astype(np.float32)
+        return scaled <= thresholds
+
+    lo = _float_to_key(np.full(thresholds.shape, -np.inf))  # always goes left
+    hi = _float_to_key(np.full(thresholds.shape, np.inf))   # never goes left
+    # 64-bit keys converge in at most 64 halvings; the average is written
+    # so that it cannot overflow int64
+    for _ in range(66):
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return _key_to_float(lo)
+
+
+class CompiledForest:
+    """Flattened RandomForestClassifier with the feature scaler folded in"""
+
+    ARRAYS = ("roots", "feature", "threshold", "left", "right", "leaf_id", "leaf_value")
+    # Batch size from which predict_proba sums tree by tree instead of in one gather
+    ACCUMULATE_PER_TREE_ROWS = 32
+
+    def __init__(self, classes, n_features, max_depth, roots, feature, threshold,
+                 left, right, leaf_id, leaf_value):
+        self.classes = np.asarray(classes)
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.roots = roots            # (n_trees,) index of each tree's root node
+        self.feature = feature        # (n_nodes,) split feature, 0 for leaves
+        self.threshold = threshold    # (n_nodes,) raw-space threshold, +inf for leaves
+        self.left = left              # (n_nodes,) left child, self for leaves
+        self.right = right            # (n_nodes,) right child, self for leaves
+        self.leaf_id = leaf_id        # (n_nodes,) row in leaf_value, -1 for split nodes
+        self.leaf_value = leaf_value  # (n_leaves, n_classes) normalized class distribution
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None):
+        """
+        Flatten a fitted RandomForestClassifier.
+
+        scaler is the fitted StandardScaler applied to features before the
+        forest; pass None if the forest was trained on raw features.
+        """
+        n_features = model.n_features_in_
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, "mean_", None) is not None:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, "scale_", None) is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        roots, features, thresholds, lefts, rights, leaf_ids, leaf_values = [], [], [], [], [], [], []
+        node_offset = 0
+        leaf_offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            own_index = np.arange(n_nodes) + node_offset
+
+            roots.append(node_offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + node_offset))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + node_offset))
+
+            n_leaves = int(is_leaf.sum())
+            leaf_id = np.full(n_nodes, -1, dtype=np.int64)
+            leaf_id[is_leaf] = np.arange(n_leaves) + leaf_offset
+            leaf_ids.append(leaf_id)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[is_leaf, 0, :model.n_classes_].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value /= normalizer
+            leaf_values.append(value)
+
+            node_offset += n_nodes
+            leaf_offset += n_leaves
+            max_depth = max(max_depth, tree.max_depth)
+
+        feature = np.concatenate(features).astype(np.int32)
+        threshold = np.concatenate(thresholds).astype(np.float64)
+        split = np.isfinite(threshold)
+        threshold[split] = _fold_thresholds(
+            threshold[split], mean[feature[split]], scale[feature[split]]
+        )
+
+        return cls(
+            classes=model.classes_,
+            n_features=n_features,
+            max_depth=max_depth,
+            roots=np.asarray(roots, dtype=np.int64),
+            feature=feature,
+            threshold=threshold,
+            left=np.concatenate(lefts).astype(np.int64),
+            right=np.concatenate(rights).astype(np.int64),
+            leaf_id=np.concatenate(leaf_ids),
+            leaf_value=np.concatenate(leaf_values),
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf row (into leaf_value) reached in every tree, shape (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        node = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+        # Leaves point back at themselves, so every tree can take max_depth steps
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.leaf_id[node]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for raw (unscaled) features, shape (n_samples, n_classes).
+
+        Both accumulations add trees strictly in estimator order, like
+        sklearn's accumulator. Small batches gather every leaf at once and
+        cumsum over trees. From ACCUMULATE_PER_TREE_ROWS rows that
+        (n_samples, n_trees, n_classes) gather outgrows the CPU cache, so
+        trees are added one at a time instead.
+
+        The traversal itself is NumPy fancy indexing, one level per step.
+        Its per-row cost does not shrink with batch size the way sklearn's
+        Cython traversal does. Around a thousand rows sklearn catches up,
+        so offline scoring of large matrices gains nothing from this path.
+        Serving batches stop at 64 rows.
+        """
+        leaves = self.apply(X)
+        if leaves.shape[0] < self.ACCUMULATE_PER_TREE_ROWS:
+            proba = np.cumsum(self.leaf_value[leaves], axis=1)[:, -1, :]
+        else:
+            proba = np.zeros((leaves.shape[0], self.leaf_value.shape[1]))
+            for tree_leaves in np.ascontiguousarray(leaves.T):
+                proba += self.leaf_value[tree_leaves]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Labels and probabilities for raw features from a single traversal"""
+        proba = self.predict_proba(X)
+        return self.classes[np.argmax(proba, axis=1)], proba
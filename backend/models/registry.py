@@ -0,0 +1,166 @@
+"""
+Versioned model registry with hot reload.
+
+Every published model is an immutable artifact directory under
+models/registry/, and a CURRENT file names the version to serve:
+
+    models/registry/
+        20261017-142501-3f9a1c2e/   header.json + .npy arrays (see artifact.py)
+        20261017-160312-a17b0d44/
+        CURRENT                     "20261017-160312-a17b0d44"
+
+Serving code always asks the registry for the current SignLanguageModel and
+keeps that reference for the whole request. A reload builds and warms the
+new model off to the side and then swaps a single reference, so new requests
+move to the new version while in-flight requests finish on the snapshot they
+already hold. Loaded models are never mutated afterwards.
+"""
+import asyncio
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .artifact import artifact_exists, describe_artifact, save_artifact
+from .compiled_forest import CompiledForest
+from .sign_language_model import SignLanguageModel
+
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), "registry")
+CURRENT_NAME = "CURRENT"
+
+
+class ModelRegistry:
+    """Publishes versioned artifacts and holds the model currently being served"""
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+        self._current: Optional[SignLanguageModel] = None
+        # Serializes loads; readers never take it
+        self._load_lock = threading.Lock()
+
+    def _version_path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def current_version_on_disk(self) -> Optional[str]:
+        """Version named by the CURRENT file, or None if nothing is published"""
+        try:
+            with open(os.path.join(self.root, CURRENT_NAME)) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if version and artifact_exists(self._version_path(version)) else None
+
+    def versions(self) -> List[Dict]:
+        """All published versions, oldest first, with their header summaries"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.root)):
+            summary = describe_artifact(self._version_path(name))
+            if summary is not None:
+                found.append({"version": name, **summary})
+        return found
+
+    def publish(self, compiled: CompiledForest, make_current: bool = True) -> str:
+        """
+        Write a compiled model as a new immutable version and return its name.
+
+        The version directory is written under a temporary name and renamed
+        into place, and CURRENT is replaced atomically, so a watcher never
+        sees a half-written version.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".tmp-{os.getpid()}-{time.time_ns()}")
+        header = save_artifact(tmp_path, compiled)
+        version = time.strftime("%Y%m%d-%H%M%S", time.gmtime()) + "-" + header["checksum"][7:15]
+        if os.path.exists(self._version_path(version)):
+            shutil.rmtree(tmp_path)
+        else:
+            os.rename(tmp_path, self._version_path(version))
+
+        if make_current:
+            self.set_current(version)
+        return version
+
+    def set_current(self, version: str):
+        """Point CURRENT at an already published version (e.g. to roll back)"""
+        if not artifact_exists(self._version_path(version)):
+            raise ValueError(f"Model version '{version}' is not in the registry")
+        tmp_path = os.path.join(self.root, f".{CURRENT_NAME}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_NAME))
+
+    def _build(self, version: Optional[str]) -> SignLanguageModel:
+        if version is None:
+            # Nothing published yet: legacy artifact, pickles or dummy model
+            return SignLanguageModel()
+        return SignLanguageModel(artifact_path=self._version_path(version), version=version)
+
+    def current(self) -> SignLanguageModel:
+        """The model new requests should use, loading it on first access"""
+        model = self._current
+        if model is None:
+            with self._load_lock:
+                if self._current is None:
+                    self._current = self._build(self.current_version_on_disk())
+                model = self._current
+        return model
+
+    def loaded(self) -> Optional[SignLanguageModel]:
+        """The current model if one has been loaded, without triggering a load"""
+        return self._current
+
+    def load(self, version: Optional[str] = None) -> SignLanguageModel:
+        """
+        Load and warm a version (default: the one named by CURRENT), then make
+        it the current model. Blocking; run it off the event loop.
+        """
+        with self._load_lock:
+            if version is None:
+                version = self.current_version_on_disk()
+            if version is not None and not artifact_exists(self._version_path(version)):
+                raise ValueError(f"Model version '{version}' is not in the registry")
+            model = self._build(version)
+            model.warmup()
+            # Single reference assignment: readers see either the old or the new model
+            self._current = model
+        return model
+
+    def get(self, version: Optional[str]) -> SignLanguageModel:
+        """
+        The model for a specific version, switching to it if it is published
+        but not loaded here. Used by process pool workers, which follow the
+        version chosen by the serving process rather than watching CURRENT.
+        """
+        model = self.current()
+        if version is None or model.version == version:
+            return model
+        if not artifact_exists(self._version_path(version)):
+            return model
+        return self.load(version)
+
+    async def watch(self, interval: float):
+        """Poll CURRENT every interval seconds and hot-reload when it changes"""
+        while True:
+            await asyncio.sleep(interval)
+            version = self.current_version_on_disk()
+            model = self._current
+            if version is not None and (model is None or model.version != version):
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.load, version)
+                    print(f"Reloaded ASL model version {version}")
+                except Exception as e:
+                    print(f"Error reloading model version {version}: {e}")
+
+
+# Global registry instance
+_registry_instance: Optional[ModelRegistry] = None
+
+def get_registry() -> ModelRegistry:
+    """Get or create registry instance (singleton)"""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", REGISTRY_DIR))
+    return _registry_instance
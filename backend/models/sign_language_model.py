@@ -1,23 +1,77 @@
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
+from sklearn.exceptions import NotFittedError
+from sklearn.utils.validation import check_is_fitted
 import pickle
 import os
+import time
+from contextlib import nullcontext
+
+from .compiled_forest import CompiledForest
+from .artifact import artifact_exists, load_artifact, describe_artifact
+
+
+def _untimed(stage):
+    return nullcontext()
+
+# Context manager factory wrapped around the preprocess, scaler and forest
+# stages; the server installs services.metrics.stage with set_stage_timer()
+stage_timer = _untimed
+
+
+def set_stage_timer(timer=None):
+    """Time model stages with timer(name), or stop timing them with None"""
+    global stage_timer
+    stage_timer = timer or _untimed
 
 
 class SignLanguageModel:
-    """Sign language recognition model using MediaPipe hand landmarks"""
+    """
+    Sign language recognition model using MediaPipe hand landmarks
+    
+    Instances are treated as immutable once loaded: the registry swaps in a
+    new instance on reload instead of changing this one, so concurrent
+    requests can share it without locking.
+    """
     
-    def __init__(self):
+    def __init__(self, artifact_path=None, version=None):
         self.model = None
         self.scaler = StandardScaler()
         self.classes = None
+        self._class_names = None
+        self.compiled = None
         self.model_path = os.path.join(os.path.dirname(__file__), "asl_model.pkl")
         self.scaler_path = os.path.join(os.path.dirname(__file__), "asl_scaler.pkl")
+        # Registry versions pass their own directory; otherwise the legacy
+        # unversioned artifact location is tried before the pickles
+        self.artifact_path = artifact_path or os.path.join(os.path.dirname(__file__), "asl_forest")
+        self.version = version
+        # Lifecycle bookkeeping reported by /ready
+        self.source = None
+        self.load_time_ms = None
+        self.warmup_time_ms = None
+        self.warmed_up = False
+        
+        start = time.perf_counter()
         self.load_or_initialize()
+        self.load_time_ms = (time.perf_counter() - start) * 1000
     
     def load_or_initialize(self):
-        """Load existing model or initialize a new one"""
+        """Load the compiled artifact, else the pickles, else initialize a new model"""
+        if artifact_exists(self.artifact_path):
+            try:
+                # Memory-mapped: workers share the arrays through the page cache.
+                # The sklearn estimator is not loaded; it is only needed to retrain.
+                self.compiled = load_artifact(self.artifact_path)
+                self.classes = self.compiled.classes
+                self.source = "artifact"
+                self.version = self.version or os.path.basename(self.artifact_path)
+                print("Loaded compiled ASL model artifact")
+                return
+            except Exception as e:
+                print(f"Error loading model artifact: {e}. Falling back to pickles.")
+        
         if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
             try:
                 with open(self.model_path, 'rb') as f:
@@ -27,6 +81,9 @@ class SignLanguageModel:
                 # Get classes from model
                 if hasattr(self.model, 'classes_'):
                     self.classes = self.model.classes_
+                self.compile()
+                self.source = "pickle"
+                self.version = "pickle"
                 print("Loaded existing ASL model")
             except Exception as e:
                 print(f"Error loading model: {e}. Initializing new model.")
@@ -34,93 +91,230 @@ class SignLanguageModel:
         else:
             self._initialize_model()
     
-    def _initialize_model(self):
-        """Initialize a new Random Forest classifier"""
-        # For hackathon: start with alphabet (A-Z)
-        # This can be expanded later
-        self.model = RandomForestClassifier(
+    def _new_classifier(self):
+        """Random Forest classifier with the serving hyperparameters"""
+        return RandomForestClassifier(
             n_estimators=100,
             max_depth=20,
             random_state=42,
             n_jobs=-1
         )
+    
+    def _initialize_model(self):
+        """Initialize a new Random Forest classifier"""
+        # For hackathon: start with alphabet (A-Z)
+        # This can be expanded later
+        self.model = self._new_classifier()
         # Initialize with dummy data to set up structure
-        # In production, this would be trained on real data
-        dummy_features = np.random.rand(26, 63)  # 21 landmarks * 3 coords = 63 features
+        # In production, this would be trained on real data. Seeded so every
+        # process (e.g. process-pool workers) builds the same "dummy" version
+        dummy_features = np.random.default_rng(0).random((26, 63))  # 21 landmarks * 3 coords = 63 features
         dummy_labels = [chr(ord('A') + i) for i in range(26)]
-        self.model.fit(dummy_features, dummy_labels)
+        # Fit the scaler here too, so predict never has to fit (and mutate)
+        # a shared scaler on request data
+        self.scaler = StandardScaler().fit(dummy_features)
+        self.model.fit(self.scaler.transform(dummy_features), dummy_labels)
         self.classes = self.model.classes_
+        self.compile()
+        self.source = "dummy"
+        self.version = "dummy"
         print("Initialized new ASL model (dummy data - needs training)")
     
+    def compile(self):
+        """
+        Flatten the trained forest and scaler into a CompiledForest for serving.
+        
+        Left as None while the scaler is unfitted; predictions then fall back
+        to the sklearn path.
+        """
+        try:
+            check_is_fitted(self.scaler)
+        except NotFittedError:
+            self.compiled = None
+            return
+        self.compiled = CompiledForest.from_sklearn(self.model, self.scaler)
+    
+    def warmup(self, batch_sizes=(1, 8, 32)):
+        """
+        Exercise the serving code paths once so the first real request is fast.
+        
+        Pages a memory-mapped artifact into memory and runs predictions at a
+        few batch sizes.
+        """
+        start = time.perf_counter()
+        if self.compiled is not None:
+            for name in CompiledForest.ARRAYS:
+                np.asarray(getattr(self.compiled, name)).sum()
+        rng = np.random.default_rng(0)
+        for batch_size in batch_sizes:
+            self.predict_proba_features(rng.random((batch_size, 63)))
+        self.warmup_time_ms = (time.perf_counter() - start) * 1000
+        self.warmed_up = True
+    
+    def status(self):
+        """Load and warmup details for readiness checks"""
+        return {
+            "model_source": self.source,
+            "model_version": self.version,
+            "model_load_ms": round(self.load_time_ms or 0.0, 2),
+            "warmed_up": self.warmed_up,
+            "warmup_ms": round(self.warmup_time_ms, 2) if self.warmup_time_ms is not None else None,
+            "artifact": describe_artifact(self.artifact_path) if self.source == "artifact" else None,
+        }
+    
     def preprocess_landmarks(self, landmarks):
         """Convert landmarks to feature vector"""
         # Flatten landmarks: [x1, y1, z1, x2, y2, z2, ...]
-        features = []
-        for landmark in landmarks:
-            features.extend([landmark.x, landmark.y, landmark.z])
-        return np.array(features).reshape(1, -1)
+        with stage_timer("preprocess"):
+            features = []
+            for landmark in landmarks:
+                features.extend([landmark.x, landmark.y, landmark.z])
+            return np.array(features).reshape(1, -1)
+    
+    def preprocess_landmarks_batch(self, frames):
+        """Convert several frames of landmarks to an (n_frames, 63) feature matrix"""
+        with stage_timer("preprocess"):
+            features = [
+                [coord for landmark in landmarks for coord in (landmark.x, landmark.y, landmark.z)]
+                for landmarks in frames
+            ]
+            return np.array(features, dtype=np.float64).reshape(len(frames), -1)
+    
+    def preprocess_landmark_array(self, landmarks):
+        """Convert a (n_frames, 21, 3 or 4) landmark array to an (n_frames, 63) feature matrix"""
+        with stage_timer("preprocess"):
+            landmarks = np.asarray(landmarks, dtype=np.float64)
+            return np.ascontiguousarray(landmarks[:, :, :3]).reshape(len(landmarks), -1)
     
     def predict(self, landmarks):
         """Predict sign from hand landmarks"""
-        if self.model is None:
-            return "UNKNOWN", 0.0, {}
-        
-        # Preprocess landmarks
-        features = self.preprocess_landmarks(landmarks)
+        return self.predict_batch([landmarks])[0]
+    
+    def predict_batch(self, frames):
+        """Predict signs for several frames of hand landmarks at once"""
+        if len(frames) == 0:
+            return []
+        return self.predict_features(self.preprocess_landmarks_batch(frames))
+    
+    @property
+    def class_names(self):
+        """Class labels as strings, in the column order of predict_proba_features"""
+        if self._class_names is None:
+            self._class_names = [str(cls) for cls in self.classes] if self.classes is not None else []
+        return self._class_names
+    
+    def predict_proba_features(self, features):
+        """
+        Class probabilities for an (n_frames, 63) feature matrix.
         
-        # Scale features (fit scaler if not already fitted)
-        try:
+        All rows go through a single CompiledForest traversal (or a single
+        sklearn predict_proba call if the model could not be compiled).
+        Columns follow class_names; with no model loaded there are no columns.
+        """
+        if self.compiled is not None:
+            # Scaler is folded into the compiled thresholds
+            with stage_timer("forest"):
+                return self.compiled.predict_proba(features)
+        if self.model is None:
+            return np.zeros((len(features), 0))
+        with stage_timer("scaler"):
             features_scaled = self.scaler.transform(features)
-        except ValueError:
-            # Scaler not fitted yet, fit it on this single sample (not ideal but works for prototype)
-            features_scaled = self.scaler.fit_transform(features)
-        
-        # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        probabilities = self.model.predict_proba(features_scaled)[0]
+        with stage_timer("forest"):
+            return self.model.predict_proba(features_scaled)
+    
+    def predict_features(self, features):
+        """
+        Predict signs for an (n_frames, 63) feature matrix.
         
-        # Get confidence (max probability)
-        confidence = float(np.max(probabilities))
+        The label is the argmax of the probabilities, which is what
+        RandomForestClassifier.predict computes internally.
+        """
+        probabilities = self.predict_proba_features(features)
+        if probabilities.shape[1] == 0:
+            return [("UNKNOWN", 0.0, {}) for _ in range(len(features))]
         
-        # Create dictionary of all predictions
-        all_predictions = {
-            str(cls): float(prob) 
-            for cls, prob in zip(self.model.classes_, probabilities)
-        }
+        # Predict
+        best = np.argmax(probabilities, axis=1)
+        classes = self.class_names
         
-        return str(prediction), confidence, all_predictions
+        results = []
+        for row, idx in zip(probabilities, best):
+            # Create dictionary of all predictions
+            all_predictions = {
+                cls: float(prob)
+                for cls, prob in zip(classes, row)
+            }
+            results.append((classes[idx], float(row[idx]), all_predictions))
+        return results
     
     def train(self, X, y):
-        """Train the model on new data"""
-        # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        """Train the model on new data and publish it as a new registry version"""
+        # Fit fresh objects rather than refitting ones that may be serving
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
         
         # Train model
-        self.model.fit(X_scaled, y)
+        model = self._new_classifier()
+        model.fit(X_scaled, y)
+        
+        self.scaler = scaler
+        self.model = model
         self.classes = self.model.classes_
+        self._class_names = None
+        self.compile()
         
         # Save model
         self.save()
     
     def save(self):
-        """Save model and scaler to disk"""
+        """Save model and scaler pickles and publish the compiled model to the registry"""
         try:
             with open(self.model_path, 'wb') as f:
                 pickle.dump(self.model, f)
             with open(self.scaler_path, 'wb') as f:
                 pickle.dump(self.scaler, f)
+            if self.compiled is not None:
+                from .registry import get_registry
+                self.version = get_registry().publish(self.compiled)
+                print(f"Published model version {self.version}")
             print("Model saved successfully")
         except Exception as e:
             print(f"Error saving model: {e}")
 
 
-# Global model instance
-_model_instance = None
-
 def get_model():
-    """Get or create model instance (singleton)"""
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = SignLanguageModel()
-    return _model_instance
+    """
+    Get the model currently being served.
+    
+    Callers should fetch it once per request and keep the reference, so a
+    hot reload never switches models halfway through a request.
+    """
+    from .registry import get_registry
+    return get_registry().current()
 
+
+def get_loaded_model():
+    """Model instance if it has already been loaded, without triggering a load"""
+    from .registry import get_registry
+    return get_registry().loaded()
+
+
+def warmup_model():
+    """Module-level entry point that loads and warms the model in an executor worker"""
+    model = get_model()
+    if not model.warmed_up:
+        model.warmup()
+    return model.warmed_up
+
+
+def predict_proba_features(features, version=None):
+    """
+    Module-level entry point for executor workers.
+    
+    Process pool workers receive only the feature matrix and the version the
+    serving process chose, and score it with their own per-process model,
+    loading that version first if they have not seen it yet. Only the
+    probability matrix travels back to the serving process.
+    """
+    from .registry import get_registry
+    return get_registry().get(version).predict_proba_features(features)
@@ -0,0 +1,117 @@
+"""
+Operational endpoints: model registry inspection and hot reload, sampled
+request profiles and the verified-token cache.
+
+All routes require the X-Admin-Token header (see dependencies.require_admin).
+"""
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from pydantic import BaseModel
+from dependencies import require_admin
+from models.registry import get_registry
+from services.metrics import TimedRoute
+from services.profiler import get_profiler
+from services.firebase import check_revoked, get_token_cache, get_token_verifier
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)],
+                   route_class=TimedRoute)
+
+
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None  # default: the version named by CURRENT
+
+
+@router.get("/models")
+async def list_models():
+    """
+    List published model versions and the one this worker is serving.
+    """
+    registry = get_registry()
+    model = registry.loaded()
+    return {
+        "serving": model.version if model else None,
+        "current_on_disk": registry.current_version_on_disk(),
+        "versions": registry.versions(),
+    }
+
+
+@router.post("/models/reload")
+async def reload_model(request: ReloadRequest = ReloadRequest()):
+    """
+    Load a model version in the background and swap it in atomically.
+    
+    Requests already running finish on the model they started with; requests
+    arriving after the swap use the new one. Without a version, reloads the
+    version named by the registry's CURRENT file. Naming a version makes it
+    current for this worker only; other workers follow CURRENT.
+    """
+    registry = get_registry()
+    loop = asyncio.get_running_loop()
+    try:
+        model = await loop.run_in_executor(None, registry.load, request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"serving": model.version, **model.status()}
+
+
+@router.get("/profiles")
+async def list_profiles(limit: int = 50):
+    """
+    List the newest request profiles written to PROFILE_DIR, by any worker.
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        return {"enabled": False, "profiles": []}
+    return {
+        "enabled": True,
+        "sample_rate": profiler.sample_rate,
+        "min_latency_ms": profiler.min_latency_ms,
+        "profiles": profiler.list()[:max(limit, 0)],
+    }
+
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str):
+    """
+    Download one profile: speedscope JSON (open it at https://www.speedscope.app)
+    or collapsed stacks for flamegraph.pl / inferno.
+    """
+    profiler = get_profiler()
+    path = profiler.path(name) if profiler is not None else None
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{name}' not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/token-cache")
+async def get_token_cache_stats():
+    """
+    Report the verified ID token cache's hit rate and size since startup,
+    and the state of the signing keys used to verify tokens.
+    """
+    verifier = get_token_verifier()
+    signing_keys = verifier.stats() if verifier is not None else None
+    cache = get_token_cache()
+    if cache is None:
+        return {"enabled": False, "signing_keys": signing_keys}
+    return {**cache.stats(), "bypassed_for_revocation_checks": check_revoked(), "signing_keys": signing_keys}
+
+
+@router.delete("/token-cache")
+async def invalidate_token_cache(uid: Optional[str] = None):
+    """
+    Drop one user's cached tokens (e.g. after revoking their sessions), or
+    every cached token when no uid is given.
+    """
+    cache = get_token_cache()
+    if cache is None:
+        return {"enabled": False, "removed": 0}
+    if uid is None:
+        removed = len(cache)
+        cache.clear()
+    else:
+        removed = cache.invalidate_uid(uid)
+    return {"enabled": True, "removed": removed}
@@ -1,7 +1,11 @@
+import os
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
 from schemas import health as health_schema
+from models.sign_language_model import get_loaded_model
+from services.metrics import TimedRoute, get_metrics
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/", response_model=health_schema.PingResponse)
 async def read_root():
@@ -11,6 +15,35 @@ async def read_root():
 async def health():
     return {"message": "ok"}
 
+@router.get("/ready", response_model=health_schema.ReadyResponse)
+async def ready():
+    """
+    Readiness probe for load balancers, separate from /health.
+    
+    Returns 503 until the startup hook has loaded and warmed the model.
+    With REQUIRE_TRAINED_MODEL=1 a worker serving the untrained dummy
+    model also reports not ready.
+    """
+    model = get_loaded_model()
+    if model is None:
+        return JSONResponse(status_code=503, content={"ready": False})
+    
+    status = model.status()
+    is_ready = model.warmed_up
+    if os.getenv("REQUIRE_TRAINED_MODEL", "").lower() in ("1", "true", "yes"):
+        is_ready = is_ready and model.source != "dummy"
+    
+    body = health_schema.ReadyResponse(ready=is_ready, **status)
+    return JSONResponse(status_code=200 if is_ready else 503, content=body.dict())
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics for this worker: request counts per endpoint, status
+    and model version, request latency, and per-stage latency histograms.
+    """
+    return Response(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
 @router.post("/echo", response_model=health_schema.EchoResponse)
 async def echo(req: health_schema.EchoRequest):
     return {"text": req.text}
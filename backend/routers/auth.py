@@ -4,8 +4,9 @@ Authentication router with Firebase token verification examples.
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Dict
 from dependencies import get_current_user, get_current_user_optional
+from services.metrics import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+router = APIRouter(prefix="/auth", tags=["authentication"], route_class=TimedRoute)
 
 
 @router.get("/me")
@@ -1,22 +1,246 @@
-from fastapi import APIRouter, HTTPException
-from schemas.sign_language import SignLanguageRequest, SignLanguageResponse
-from services.sign_language_service import get_service
+import asyncio
+import json
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from schemas.sign_language import (
+    SignLanguageRequest,
+    SignLanguageResponse,
+    SignLanguageBatchRequest,
+    SignLanguageBatchResponse,
+)
+from services.sign_language_service import get_service, MAX_BATCH_FRAMES
+from services.inference_scheduler import get_scheduler
+from services.prediction_cache import get_prediction_cache
+from services.session_store import get_session_store
+from services.metrics import TimedRoute
+from models.sign_language_model import get_model
 
-router = APIRouter(prefix="/api/sign-language", tags=["sign-language"])
+router = APIRouter(prefix="/api/sign-language", tags=["sign-language"], route_class=TimedRoute)
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+
+def _wants_binary(http_request: Request) -> bool:
+    return BINARY_MEDIA_TYPE in http_request.headers.get("accept", "")
+
+
+def _binary_response(probabilities: np.ndarray, model, headers=None) -> Response:
+    """Raw little-endian float32 probabilities, columns in /classes order"""
+    return Response(
+        content=np.ascontiguousarray(probabilities, dtype="<f4").tobytes(),
+        media_type=BINARY_MEDIA_TYPE,
+        headers={"X-Model-Version": str(model.version), **(headers or {})},
+    )
 
 
 @router.post("/predict", response_model=SignLanguageResponse)
-async def predict_sign(request: SignLanguageRequest):
+async def predict_sign(request: SignLanguageRequest, http_request: Request):
     """
     Predict sign language from hand landmarks.
     
-    Accepts 21 hand landmarks (MediaPipe format) and returns
-    the predicted sign with confidence score.
+    Accepts 21 hand landmarks (MediaPipe format), or one frame as a packed
+    buffer, and returns the predicted sign with confidence score. Set top_k to only list the
+    most likely classes. With "Accept: application/octet-stream" the body is
+    instead the raw float32 probability vector (see /classes for the order),
+    with the predicted sign and confidence in X-Predicted-Sign/X-Confidence.
+    A frame without exactly 21 landmarks is not an error in either form: it
+    is answered as INVALID, in binary with an empty body.
+    """
+    try:
+        service = get_service()
+        if not _wants_binary(http_request):
+            return await service.predict_sign_async(request)
+        
+        model, proba = await service.predict_proba_async(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    if proba is None:
+        return _binary_response(np.empty(0, dtype="<f4"), model, {
+            "X-Predicted-Sign": "INVALID",
+            "X-Confidence": repr(0.0),
+        })
+    response = service.build_response(model.class_names, proba, top_k=0)
+    return _binary_response(proba, model, {
+        "X-Predicted-Sign": response.predicted_sign,
+        "X-Confidence": repr(response.confidence),
+    })
+
+
+@router.get("/classes")
+async def get_classes():
+    """
+    Class labels of the current model, in the column order used by the
+    binary probability responses.
+    """
+    model = get_model()
+    return {"classes": list(model.class_names), "model_version": model.version}
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """
+    Report the cross-request micro-batching configuration and a histogram
+    of how many frames each model call has carried since startup.
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    return scheduler.stats()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Report the quantized-landmark prediction cache's hit rate, size and
+    approximate memory use since startup.
+    """
+    cache = get_prediction_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+
+@router.get("/sessions")
+async def get_session_stats():
+    """
+    Report how many frames session delta gating has skipped and how many
+    sessions are currently tracked.
+    """
+    sessions = get_session_store()
+    if sessions is None:
+        return {"enabled": False}
+    return sessions.stats()
+
+
+@router.post("/predict/batch", response_model=SignLanguageBatchResponse)
+async def predict_sign_batch(request: SignLanguageBatchRequest, http_request: Request):
+    """
+    Predict sign language for several buffered frames in one request.
+    
+    Accepts up to MAX_BATCH_FRAMES frames of 21 hand landmarks (as objects or
+    one packed buffer) and returns
+    one prediction per frame, in the same order. All frames are scored in a
+    single model pass, so clients that buffer a few camera frames pay the
+    HTTP and model overhead once instead of once per frame. With
+    "Accept: application/octet-stream" the body is a row-major float32
+    (frames, classes) matrix; rows of invalid frames are NaN.
     """
+    try:
+        n_frames = request.frame_count()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not n_frames:
+        raise HTTPException(status_code=400, detail="At least one frame is required")
+    if n_frames > MAX_BATCH_FRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_FRAMES} frames per batch, got {n_frames}",
+        )
+    
     try:
         service = get_service()
-        response = service.predict_sign(request)
-        return response
+        if not _wants_binary(http_request):
+            return await service.predict_signs_batch(request)
+        
+        model, probabilities, valid_idx = await service.predict_proba_batch(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    matrix = np.full((n_frames, len(model.class_names)), np.nan, dtype="<f4")
+    matrix[valid_idx] = probabilities
+    return _binary_response(matrix, model)
+
+
+class _LatestFrame:
+    """
+    Single-slot mailbox between a WebSocket reader and the inference loop.
+    
+    A frame that arrives while the previous one is still waiting replaces it,
+    so when inference falls behind the server evaluates the newest frame and
+    drops the stale ones instead of queueing them.
+    """
+    
+    def __init__(self):
+        self.message = None
+        self.dropped = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+    
+    def put(self, message: str):
+        if self.message is not None:
+            self.dropped += 1
+        self.message = message
+        self.ready.set()
+    
+    def close(self):
+        self.closed = True
+        self.ready.set()
+    
+    async def take(self):
+        """Wait for the next frame; returns None once the client disconnects"""
+        await self.ready.wait()
+        self.ready.clear()
+        if self.closed:
+            return None
+        message, self.message = self.message, None
+        return message
+
+
+async def _receive_frames(websocket: WebSocket, slot: _LatestFrame):
+    """Read client messages as fast as they arrive, keeping only the newest"""
+    try:
+        while True:
+            slot.put(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        slot.close()
 
+
+@router.websocket("/stream")
+async def predict_stream(websocket: WebSocket):
+    """
+    Stream hand landmarks over a persistent WebSocket and receive predictions.
+    
+    Each client message is a JSON object shaped like the /predict request body
+    (including top_k), optionally with a "frame_id" that is echoed back. Each
+    reply is the /predict response plus "frame_id" and "dropped_frames", the number of frames this
+    connection has skipped because a newer one arrived before they were evaluated.
+    """
+    await websocket.accept()
+    slot = _LatestFrame()
+    receiver = asyncio.create_task(_receive_frames(websocket, slot))
+    service = get_service()
+    
+    try:
+        while True:
+            message = await slot.take()
+            if message is None:
+                break
+            
+            try:
+                payload = json.loads(message)
+                request = SignLanguageRequest.parse_obj(payload)
+            except (ValueError, ValidationError) as e:
+                await websocket.send_json({"error": f"Invalid frame: {str(e)}"})
+                continue
+            
+            try:
+                response = await service.predict_sign_async(request)
+            except Exception as e:
+                await websocket.send_json({"error": f"Prediction error: {str(e)}"})
+                continue
+            
+            await websocket.send_json({
+                "frame_id": payload.get("frame_id"),
+                **response.dict(),
+                "dropped_frames": slot.dropped,
+            })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
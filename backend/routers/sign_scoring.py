@@ -1,15 +1,31 @@
 from fastapi import APIRouter, HTTPException
-from typing import List
+from typing import List, Optional
 import numpy as np
+from schemas.packed_landmarks import PackedLandmarks
 from schemas.sign_scoring import (
     Landmark,
     Frame,
     AttemptRequest,
     AttemptResult,
+    NearestSequencesRequest,
+    NearestSequencesResponse,
+    NearestTemplatesRequest,
+    NearestTemplatesResponse,
+    TemplateMatch,
     WordInfo,
 )
+from services.attempt_scoring import score_attempt
+from services.executor import get_executor
+from services.metrics import TimedRoute, stage
+from services.template_store import (
+    TemplateStore,
+    align_sequence,
+    get_template_store,
+    nearest_sequences,
+    nearest_templates,
+)
 
-router = APIRouter(prefix="/api", tags=["sign-scoring"])
+router = APIRouter(prefix="/api", tags=["sign-scoring"], route_class=TimedRoute)
 
 # Reference templates: each word has one Frame with 21 landmarks
 # These are sample reference poses - in production, these would come from trained models
@@ -103,11 +119,55 @@ SUPPORTED_WORDS = [
 ]
 
 
+def frames_to_array(frames: List[Frame]) -> np.ndarray:
+    """Stack Frame objects into a (frames, 21, 4) array of x, y, z, visibility"""
+    return np.array(
+        [[(lm.x, lm.y, lm.z, lm.v) for lm in frame.landmarks] for frame in frames],
+        dtype=np.float64,
+    ).reshape(len(frames), -1, 4)
+
+
+def landmarks_array(frames: List[Frame], packed: Optional[PackedLandmarks]) -> np.ndarray:
+    """
+    Frames as a (frames, 21, 4) array, from either Frame objects or a packed
+    buffer. Packed x, y, z data is treated as fully visible.
+    """
+    if packed is None:
+        return frames_to_array(frames)
+    landmarks = packed.to_array()
+    if landmarks.shape[2] == 3:
+        visibility = np.ones(landmarks.shape[:2] + (1,))
+        landmarks = np.concatenate([landmarks, visibility], axis=2)
+    return landmarks
+
+
+# Reference templates as (21, 4) arrays for scoring
+REFERENCE_ARRAYS = {
+    word: frames_to_array([frame])[0] for word, frame in REFERENCE_TEMPLATES.items()
+}
+
+
+# Built-in template library, used when no TEMPLATES_PATH file has been built
+BUILTIN_TEMPLATES = TemplateStore(
+    words=[word.id for word in SUPPORTED_WORDS],
+    landmarks=np.stack([REFERENCE_ARRAYS[word.id] for word in SUPPORTED_WORDS]),
+    display_names=[word.display_name for word in SUPPORTED_WORDS],
+    difficulties=[word.difficulty for word in SUPPORTED_WORDS],
+)
+
+
+def get_templates() -> TemplateStore:
+    """The template library loaded from TEMPLATES_PATH, else the built-in templates"""
+    return get_template_store() or BUILTIN_TEMPLATES
+
+
 def compute_score(user_frame: Frame, reference_frame: Frame) -> float:
     """
     Compute similarity score between user frame and reference frame.
     Uses Mean Squared Error (MSE) and maps it to a 0-100 score.
     Weights landmarks by visibility to prioritize visible points.
+    /attempts scores all frames at once with services.attempt_scoring.score_attempt,
+    which computes the same score; this per-frame version is kept as its reference.
     """
     # Ensure both frames have the same number of landmarks
     if len(user_frame.landmarks) != len(reference_frame.landmarks):
@@ -143,7 +203,7 @@ def compute_score(user_frame: Frame, reference_frame: Frame) -> float:
     return float(score)
 
 
-def get_tips(score: float, user_frame: Frame, reference_frame: Frame) -> List[str]:
+def get_tips(score: float, user_frame: np.ndarray, reference_frame: np.ndarray) -> List[str]:
     """
     Generate tips based on score and landmark differences.
     """
@@ -155,14 +215,14 @@ def get_tips(score: float, user_frame: Frame, reference_frame: Frame) -> List[st
         elif score < 75:
             tips.append("Almost there—slightly adjust finger positioning.")
         
-        # Analyze specific landmark differences
-        user_wrist = user_frame.landmarks[0]
-        ref_wrist = reference_frame.landmarks[0]
+        # Analyze specific landmark differences (rows are x, y, z, v)
+        user_wrist = user_frame[0]
+        ref_wrist = reference_frame[0]
         
-        if abs(user_wrist.y - ref_wrist.y) > 0.1:
+        if abs(user_wrist[1] - ref_wrist[1]) > 0.1:
             tips.append("Adjust the vertical position of your hand.")
         
-        if abs(user_wrist.x - ref_wrist.x) > 0.1:
+        if abs(user_wrist[0] - ref_wrist[0]) > 0.1:
             tips.append("Adjust the horizontal position of your hand.")
 
     if score >= 75 and score < 90:
@@ -171,56 +231,140 @@ def get_tips(score: float, user_frame: Frame, reference_frame: Frame) -> List[st
     return tips
 
 
+def validated_landmarks(frames: List[Frame], packed: Optional[PackedLandmarks]) -> np.ndarray:
+    """landmarks_array for a request, with 400 errors for missing or malformed frames"""
+    # Validate frames
+    if not frames and packed is None:
+        raise HTTPException(status_code=400, detail="At least one frame is required")
+
+    # Validate landmarks
+    for i, frame in enumerate(frames):
+        if len(frame.landmarks) != 21:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Frame {i} must have exactly 21 landmarks, got {len(frame.landmarks)}",
+            )
+
+    try:
+        return landmarks_array(frames, packed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/words", response_model=List[WordInfo])
 async def get_words():
     """
     Get list of supported words for sign language practice.
     """
-    return SUPPORTED_WORDS
+    return [WordInfo(**info) for info in get_templates().word_info()]
+
+
+@router.post("/templates/nearest", response_model=NearestTemplatesResponse)
+async def find_nearest_templates(request: NearestTemplatesRequest):
+    """
+    Score one frame against every template in the library and return the
+    top_n closest signs, best first.
+    """
+    if request.frame is not None and len(request.frame.landmarks) != 21:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Frame must have exactly 21 landmarks, got {len(request.frame.landmarks)}",
+        )
+    try:
+        frames = landmarks_array([request.frame] if request.frame else [], request.packed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(frames) != 1:
+        raise HTTPException(status_code=400, detail=f"Expected one packed frame, got {len(frames)}")
+
+    templates = get_templates()
+    # A loaded library is searched through a module-level function, so process
+    # pool workers use their own copy instead of receiving it with every call
+    search = templates.nearest if templates is BUILTIN_TEMPLATES else nearest_templates
+    positions, scores = await get_executor().run(search, frames[0], request.top_n)
+    return NearestTemplatesResponse(
+        matches=[
+            TemplateMatch(
+                word=templates.words[i],
+                display_name=templates.display_names[i],
+                score=round(float(score), 1),
+            )
+            for i, score in zip(positions, scores)
+        ],
+        template_count=len(templates),
+        indexed=templates.uses_index,
+    )
+
+
+@router.post("/templates/nearest/sequence", response_model=NearestSequencesResponse)
+async def find_nearest_sequences(request: NearestSequencesRequest):
+    """
+    DTW-score a multi-frame attempt against every moving-sign template and
+    return the top_n closest, best first. Templates whose LB_Kim/LB_Keogh
+    lower bound cannot beat the current top_n are skipped without running DTW.
+    """
+    landmarks = validated_landmarks(request.frames, request.packed)
+    templates = get_templates()
+    if templates.sequences is None:
+        return NearestSequencesResponse(matches=[], template_count=0, dtw_evaluated=0, pruned=0)
+
+    positions, scores, stats = await get_executor().run(nearest_sequences, landmarks, request.top_n)
+    sequences = templates.sequences
+    return NearestSequencesResponse(
+        matches=[
+            TemplateMatch(
+                word=sequences.words[i],
+                display_name=sequences.display_names[i],
+                score=round(float(score), 1),
+            )
+            for i, score in zip(positions, scores)
+        ],
+        template_count=stats["templates"],
+        dtw_evaluated=stats["dtw"],
+        pruned=stats["pruned"],
+    )
 
 
 @router.post("/attempts", response_model=AttemptResult)
 async def evaluate_attempt(request: AttemptRequest):
     """
     Evaluate a user's sign language attempt against a reference template.
+    Words with a multi-frame template (moving signs) are scored with DTW.
     """
     # Validate word exists
-    if request.word not in REFERENCE_TEMPLATES:
+    templates = get_templates()
+    if request.word not in templates:
         raise HTTPException(
             status_code=404,
-            detail=f"Word '{request.word}' not found. Supported words: {list(REFERENCE_TEMPLATES.keys())}",
+            detail=f"Word '{request.word}' not found. "
+                   f"Supported words: {[info['id'] for info in templates.word_info()]}",
         )
 
-    # Validate frames
-    if not request.frames:
-        raise HTTPException(status_code=400, detail="At least one frame is required")
-
-    # Validate landmarks
-    for i, frame in enumerate(request.frames):
-        if len(frame.landmarks) != 21:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Frame {i} must have exactly 21 landmarks, got {len(frame.landmarks)}",
-            )
+    landmarks = validated_landmarks(request.frames, request.packed)
 
-    # Get reference template
-    reference_frame = REFERENCE_TEMPLATES[request.word]
+    if templates.sequence_position(request.word) is not None:
+        # Moving sign: DTW against its multi-frame template; each frame is
+        # compared with the template frame it was aligned to
+        with stage("score"):
+            avg_score, scores, aligned = await get_executor().run(align_sequence, landmarks, request.word)
+        best_frame_idx = int(np.argmax(scores))
+        reference_frame = aligned[best_frame_idx]
+    else:
+        # Get reference template
+        reference_frame = templates.get(request.word)
 
-    # Average score across all frames
-    scores = []
-    for frame in request.frames:
-        score = compute_score(frame, reference_frame)
-        scores.append(score)
+        # Average score across all frames, scored in one vectorized pass
+        with stage("score"):
+            scores, best_frame_idx = await get_executor().run(score_attempt, landmarks, reference_frame)
 
-    avg_score = float(np.mean(scores))
+        avg_score = float(np.mean(scores))
 
     # Determine pass/fail (>=75 passes)
     passed = avg_score >= 75.0
 
     # Generate tips
     # Use the frame closest to reference for detailed tips
-    best_frame_idx = int(np.argmax(scores))
-    tips = get_tips(avg_score, request.frames[best_frame_idx], reference_frame)
+    tips = get_tips(avg_score, landmarks[best_frame_idx], reference_frame)
 
     if passed and avg_score < 90:
         tips.append("Excellent work! Your sign is recognizable.")
@@ -230,5 +374,7 @@ async def evaluate_attempt(request: AttemptRequest):
         score=round(avg_score, 1),
         passed=passed,
         tips=tips,
+        frame_scores=[round(float(score), 1) for score in scores],
+        best_frame_index=best_frame_idx,
     )
 
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class PingResponse(BaseModel):
     message: str
@@ -8,3 +9,12 @@ class EchoRequest(BaseModel):
 
 class EchoResponse(BaseModel):
     text: str
+
+class ReadyResponse(BaseModel):
+    ready: bool
+    model_source: Optional[str] = None  # "artifact", "pickle" or "dummy"
+    model_version: Optional[str] = None
+    model_load_ms: Optional[float] = None
+    warmed_up: bool = False
+    warmup_ms: Optional[float] = None
+    artifact: Optional[dict] = None  # header summary when loaded from the artifact
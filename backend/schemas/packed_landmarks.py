@@ -0,0 +1,62 @@
+import base64
+from pydantic import BaseModel, PrivateAttr, StrictStr, validator
+from typing import Optional, Union
+
+import numpy as np
+
+LANDMARKS_PER_FRAME = 21
+
+
+class PackedLandmarks(BaseModel):
+    """
+    Several frames of hand landmarks packed into one numeric buffer.
+
+    data is either a flat JSON array of numbers or a base64 string of
+    little-endian float32 values, laid out as (frames, 21, channels) where
+    channels is 3 (x, y, z) or 4 (x, y, z, visibility). It is decoded with a
+    single NumPy call instead of validating 21 Landmark objects per frame.
+    """
+    data: Union[StrictStr, list]
+    channels: int = 3
+
+    _array: Optional[np.ndarray] = PrivateAttr(default=None)
+
+    @validator("channels")
+    def check_channels(cls, channels):
+        if channels not in (3, 4):
+            raise ValueError("channels must be 3 (x, y, z) or 4 (x, y, z, visibility)")
+        return channels
+
+    def to_array(self) -> np.ndarray:
+        """
+        Decode into a float64 (frames, 21, channels) array (cached).
+        Raises ValueError if the buffer is not a whole number of frames.
+        """
+        if self._array is None:
+            if isinstance(self.data, str):
+                try:
+                    buffer = base64.b64decode(self.data, validate=True)
+                except ValueError as e:
+                    raise ValueError(f"Invalid base64 landmark buffer: {e}")
+                if len(buffer) % 4:
+                    raise ValueError("Landmark buffer length is not a multiple of 4 bytes (float32)")
+                values = np.frombuffer(buffer, dtype="<f4").astype(np.float64)
+            else:
+                try:
+                    values = np.asarray(self.data, dtype=np.float64).reshape(-1)
+                except (TypeError, ValueError):
+                    raise ValueError("Landmark array must contain only numbers")
+
+            frame_size = LANDMARKS_PER_FRAME * self.channels
+            if values.size == 0 or values.size % frame_size:
+                raise ValueError(
+                    f"Expected a multiple of {frame_size} values "
+                    f"({LANDMARKS_PER_FRAME} landmarks x {self.channels} channels), got {values.size}"
+                )
+            if not np.isfinite(values).all():
+                raise ValueError("Landmark values must be finite")
+            self._array = values.reshape(-1, LANDMARKS_PER_FRAME, self.channels)
+        return self._array
+
+    def frame_count(self) -> int:
+        return self.to_array().shape[0]
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, conint, root_validator
+from typing import List, Optional
+from schemas.packed_landmarks import PackedLandmarks
 
 
 class Landmark(BaseModel):
@@ -16,7 +17,20 @@ class HandLandmarks(BaseModel):
 
 class SignLanguageRequest(BaseModel):
     """Request body for sign language prediction"""
-    hand_landmarks: HandLandmarks
+    hand_landmarks: Optional[HandLandmarks] = None
+    # Alternative to hand_landmarks: one frame as a packed numeric buffer
+    packed: Optional[PackedLandmarks] = None
+    # Optional client-chosen id for a camera stream; enables skipping unchanged
+    # frames and smoothing confidence over time (see services/session_store.py)
+    session_id: Optional[str] = None
+    # Only list the k most likely classes in all_predictions; 0 omits it
+    top_k: Optional[conint(ge=0)] = None
+    
+    @root_validator(skip_on_failure=True)
+    def check_landmarks(cls, values):
+        if (values.get("hand_landmarks") is None) == (values.get("packed") is None):
+            raise ValueError("Provide exactly one of hand_landmarks or packed")
+        return values
 
 
 class SignLanguageResponse(BaseModel):
@@ -25,3 +39,25 @@ class SignLanguageResponse(BaseModel):
     confidence: float
     all_predictions: dict = None  # Optional: return all class probabilities
 
+
+
+class SignLanguageBatchRequest(BaseModel):
+    """Request body for batched prediction over several buffered frames"""
+    frames: List[HandLandmarks] = []
+    # Alternative to frames: all frames as one packed numeric buffer
+    packed: Optional[PackedLandmarks] = None
+    top_k: Optional[conint(ge=0)] = None
+    
+    @root_validator(skip_on_failure=True)
+    def check_landmarks(cls, values):
+        if values.get("frames") and values.get("packed") is not None:
+            raise ValueError("Provide frames or packed, not both")
+        return values
+    
+    def frame_count(self) -> int:
+        return self.packed.frame_count() if self.packed is not None else len(self.frames)
+
+
+class SignLanguageBatchResponse(BaseModel):
+    """One prediction per submitted frame, in request order"""
+    predictions: List[SignLanguageResponse]
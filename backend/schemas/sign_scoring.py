@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Literal
+from pydantic import BaseModel, root_validator
+from typing import List, Literal, Optional
+from schemas.packed_landmarks import PackedLandmarks
 
 
 class Landmark(BaseModel):
@@ -15,7 +16,60 @@ class Frame(BaseModel):
 
 class AttemptRequest(BaseModel):
     word: str
-    frames: List[Frame]
+    frames: List[Frame] = []
+    # Alternative to frames: a packed (frames, 21, 3 or 4) buffer; with 3
+    # channels every landmark is treated as fully visible
+    packed: Optional[PackedLandmarks] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_landmarks(cls, values):
+        if values.get("frames") and values.get("packed") is not None:
+            raise ValueError("Provide frames or packed, not both")
+        return values
+
+
+class NearestTemplatesRequest(BaseModel):
+    # One frame, either as landmark objects or as a single packed frame
+    frame: Optional[Frame] = None
+    packed: Optional[PackedLandmarks] = None
+    top_n: int = 5
+
+    @root_validator(skip_on_failure=True)
+    def check_landmarks(cls, values):
+        if (values.get("frame") is None) == (values.get("packed") is None):
+            raise ValueError("Provide exactly one of frame or packed")
+        return values
+
+
+class TemplateMatch(BaseModel):
+    word: str
+    display_name: str
+    score: float
+
+
+class NearestTemplatesResponse(BaseModel):
+    matches: List[TemplateMatch]  # best first
+    template_count: int
+    indexed: bool  # whether the spatial index was used to shortlist templates
+
+
+class NearestSequencesRequest(BaseModel):
+    frames: List[Frame] = []
+    packed: Optional[PackedLandmarks] = None
+    top_n: int = 5
+
+    @root_validator(skip_on_failure=True)
+    def check_landmarks(cls, values):
+        if values.get("frames") and values.get("packed") is not None:
+            raise ValueError("Provide frames or packed, not both")
+        return values
+
+
+class NearestSequencesResponse(BaseModel):
+    matches: List[TemplateMatch]  # best first
+    template_count: int
+    dtw_evaluated: int  # templates scored with full DTW
+    pruned: int  # templates skipped by the LB_Kim/LB_Keogh lower bounds
 
 
 class WordInfo(BaseModel):
@@ -29,4 +83,6 @@ class AttemptResult(BaseModel):
     score: float
     passed: bool
     tips: List[str]
+    frame_scores: List[float] = []  # score of each submitted frame
+    best_frame_index: int = 0  # frame closest to the reference
 
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check that the vectorized attempt scorer matches compute_score and measure the speedup.
+- Builds random attempts of 10, 100 and 1000 frames around the "hello" reference
+  pose, with a share of low-visibility landmarks so the 0.1 cutoff is exercised.
+- Compares per-frame scores and the best frame index of score_attempt with the
+  per-landmark compute_score loop that /api/attempts used before.
+- Times both, plus the packed-array path against building Frame objects.
+Usage (from repo root):
+    python backend/scripts/benchmark_attempt_scoring.py
+    python backend/scripts/benchmark_attempt_scoring.py --frames 10 100 1000 5000 --repeat 50
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the router's own "from schemas..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import time
+import numpy as np
+
+from backend.services.attempt_scoring import score_attempt
+from routers.sign_scoring import REFERENCE_TEMPLATES, REFERENCE_ARRAYS, compute_score, frames_to_array
+from schemas.sign_scoring import Frame, Landmark
+
+
+def make_attempt(n_frames, rng):
+    """(frames, 21, 4) landmarks near the reference pose, ~10% barely visible"""
+    reference = REFERENCE_ARRAYS["hello"]
+    landmarks = np.repeat(reference[None], n_frames, axis=0)
+    landmarks[:, :, :3] += rng.normal(0, 0.05, (n_frames, 21, 3))
+    landmarks[:, :, 3] = np.where(rng.random((n_frames, 21)) < 0.1, rng.random((n_frames, 21)) * 0.1, 1.0)
+    return landmarks
+
+
+def to_frames(landmarks):
+    return [
+        Frame(landmarks=[Landmark(x=x, y=y, z=z, v=v) for x, y, z, v in frame.tolist()])
+        for frame in landmarks
+    ]
+
+
+def time_per_call(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    reference_frame = REFERENCE_TEMPLATES["hello"]
+    reference = REFERENCE_ARRAYS["hello"]
+
+    for n_frames in args.frames:
+        landmarks = make_attempt(n_frames, rng)
+        frames = to_frames(landmarks)
+
+        expected = np.array([compute_score(frame, reference_frame) for frame in frames])
+        scores, best_index = score_attempt(frames_to_array(frames), reference)
+        max_diff = float(np.max(np.abs(scores - expected)))
+        print(f"{n_frames} frames:")
+        print(f"  max |score - compute_score|: {max_diff:.2e}  "
+              f"(match: {max_diff < 1e-9}, best frame identical: {best_index == int(np.argmax(expected))})")
+
+        repeat = max(1, args.repeat // max(1, n_frames // 100))
+        old = time_per_call(lambda: [compute_score(frame, reference_frame) for frame in frames], repeat)
+        new = time_per_call(lambda: score_attempt(landmarks, reference), args.repeat)
+        from_objects = time_per_call(lambda: score_attempt(frames_to_array(frames), reference), repeat)
+        print(f"  compute_score loop:             {old * 1e3:9.3f} ms")
+        print(f"  score_attempt (packed array):   {new * 1e3:9.3f} ms  ({old / new:.1f}x)")
+        print(f"  score_attempt (Frame objects):  {from_objects * 1e3:9.3f} ms  ({old / from_objects:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[10, 100, 1000], help="Attempt lengths to test")
+    parser.add_argument("--repeat", type=int, default=100, help="Timed calls per measurement")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Check that CompiledForest reproduces sklearn exactly and measure the speedup.
+- Uses the trained sklearn model from backend/models if the pickles are available, otherwise fits
+  a forest with the serving hyperparameters on the landmark cache in memory.
+- Compares labels and probabilities on every row of the backend/models/feature_store/
+  feature store or a landmark_cache.npz (or on synthetic landmark-like rows when neither exists).
+- Times the old serving path (scaler.transform + predict + predict_proba on one row)
+  against CompiledForest for single rows and for batches.
+Usage (from repo root):
+    python backend/scripts/benchmark_compiled_forest.py
+    python backend/scripts/benchmark_compiled_forest.py --cache backend/models/feature_store --repeat 500
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import argparse
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from backend.models.sign_language_model import get_model
+from backend.models.compiled_forest import CompiledForest
+from feature_store import load_features
+
+DEFAULT_CACHE = os.path.join(REPO_ROOT, "backend", "models", "feature_store")
+
+
+def load_rows(cache_path, synthetic_rows):
+    """Landmark cache rows as float64 (what /predict builds from JSON) plus labels"""
+    if os.path.exists(cache_path):
+        print(f"Loading landmark cache from {cache_path}")
+        X, y = load_features(cache_path)
+        return X.astype(np.float64), y
+    print(f"No landmark cache at {cache_path}; using {synthetic_rows} synthetic rows")
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 26, synthetic_rows)
+    centers = rng.random((26, 63))
+    X = (centers[labels] + rng.normal(0, 0.05, (synthetic_rows, 63))).astype(np.float32)
+    y = np.array([chr(ord("A") + i) for i in labels], dtype=object)
+    return X.astype(np.float64), y
+
+
+def time_per_call(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(args):
+    X, y = load_rows(args.cache, args.synthetic_rows)
+
+    model = get_model()
+    # The dummy model is compiled too, but it is 100 trees fitted on 26 random rows
+    if model.model is not None and model.source != "dummy":
+        forest, scaler = model.model, model.scaler
+        print("Using trained model from backend/models")
+    else:
+        print("No trained sklearn model loaded; fitting a 100-tree forest on the rows in memory...")
+        scaler = StandardScaler().fit(X.astype(np.float32))
+        forest = RandomForestClassifier(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1)
+        forest.fit(scaler.transform(X.astype(np.float32)), y)
+
+    start = time.perf_counter()
+    compiled = CompiledForest.from_sklearn(forest, scaler)
+    print(f"Compiled {compiled.n_trees} trees / {len(compiled.threshold)} nodes "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Exactness: sklearn with n_jobs=1 sums trees in estimator order
+    n_jobs = forest.n_jobs
+    forest.n_jobs = 1
+    expected_proba = forest.predict_proba(scaler.transform(X))
+    expected_labels = forest.predict(scaler.transform(X))
+    forest.n_jobs = n_jobs
+    labels, proba = compiled.predict(X)
+    print(f"Rows compared: {len(X)}")
+    print(f"  labels identical:        {bool(np.all(labels == expected_labels))}")
+    print(f"  probabilities identical: {bool(np.array_equal(proba, expected_proba))}")
+
+    # Single-row latency, old serving path vs compiled
+    row = X[:1]
+    def sklearn_path():
+        scaled = scaler.transform(row)
+        forest.predict(scaled)
+        forest.predict_proba(scaled)
+    old = time_per_call(sklearn_path, max(1, args.repeat // 10))
+    new = time_per_call(lambda: compiled.predict(row), args.repeat)
+    print("Single row:")
+    print(f"  sklearn (transform + predict + predict_proba): {old * 1e6:9.1f} us")
+    print(f"  CompiledForest.predict:                        {new * 1e6:9.1f} us  ({old / new:.1f}x)")
+
+    # Batch throughput
+    print("Batches (per row):")
+    for batch_size in (8, 32, 256):
+        batch = X[:batch_size]
+        old = time_per_call(lambda: forest.predict_proba(scaler.transform(batch)), max(1, args.repeat // 10))
+        new = time_per_call(lambda: compiled.predict(batch), max(1, args.repeat // 10))
+        print(f"  n={batch_size:<4} sklearn {old / batch_size * 1e6:8.1f} us   "
+              f"compiled {new / batch_size * 1e6:8.1f} us  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Feature store directory (or a landmark_cache.npz)")
+    parser.add_argument("--synthetic-rows", dest="synthetic_rows", type=int, default=5000,
+                        help="Rows to generate when no landmark cache exists")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed calls per measurement")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure lower-bound pruning and per-attempt latency of DTW sequence search.
+- Builds synthetic libraries of moving-sign templates (smooth random landmark
+  trajectories of 20-80 frames) in a few sizes.
+- Each attempt is a 60-frame, time-warped and noisy replay of a random template,
+  with some landmarks below the visibility cutoff.
+- Reports how many templates LB_Kim/LB_Keogh pruned, latency with and without
+  pruning, whether both return the same top matches, and top-1 accuracy.
+Usage (from repo root):
+    python backend/scripts/benchmark_dtw.py
+    python backend/scripts/benchmark_dtw.py --templates 100 1000 5000 --attempts 50 --band 0.1
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the services' own "from services..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import time
+import numpy as np
+
+from services.sequence_scoring import SequenceIndex
+
+
+def make_clip(rng):
+    """A smooth random hand trajectory of 20-80 frames, (frames, 21, 4)"""
+    n_frames = int(rng.integers(20, 81))
+    steps = rng.normal(0, 0.01, (n_frames, 1, 3)) + rng.normal(0, 0.003, (n_frames, 21, 3))
+    coords = rng.random((1, 21, 3)) * 0.5 + 0.25 + np.cumsum(steps, axis=0)
+    return np.concatenate([coords, np.ones((n_frames, 21, 1))], axis=2)
+
+
+def make_attempt(clip, n_frames, rng):
+    """Replay a clip over n_frames with a random speed profile, noise and occlusions"""
+    gamma = rng.uniform(0.75, 1.33)
+    positions = np.linspace(0.0, 1.0, n_frames) ** gamma * (len(clip) - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, len(clip) - 1)
+    fraction = (positions - lower)[:, None, None]
+    attempt = clip[lower] * (1 - fraction) + clip[upper] * fraction
+    attempt[:, :, :3] += rng.normal(0, 0.01, attempt[:, :, :3].shape)
+    attempt[rng.random(attempt.shape[:2]) < 0.05, 3] = 0.05
+    return attempt
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1e3
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    print(f"Sequence length {args.length}, band {args.band}, top {args.top_n}, "
+          f"{args.attempts} attempts of {args.frames} frames")
+
+    for n_templates in args.templates:
+        clips = [make_clip(rng) for _ in range(n_templates)]
+        start = time.perf_counter()
+        index = SequenceIndex([str(i) for i in range(n_templates)], clips, length=args.length, band=args.band)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        pruned_times, full_times, pruned_counts, keogh_counts = [], [], [], []
+        agree = correct = 0
+        for _ in range(args.attempts):
+            target = int(rng.integers(n_templates))
+            attempt = make_attempt(clips[target], args.frames, rng)
+
+            start = time.perf_counter()
+            positions, _, stats = index.search(attempt, args.top_n)
+            pruned_times.append(time.perf_counter() - start)
+            pruned_counts.append(stats["pruned"])
+            keogh_counts.append(stats["lb_keogh"])
+
+            start = time.perf_counter()
+            full_positions, _, _ = index.search(attempt, args.top_n, prune=False)
+            full_times.append(time.perf_counter() - start)
+
+            agree += bool(np.array_equal(positions, full_positions))
+            correct += bool(len(positions) and positions[0] == target)
+
+        print(f"{n_templates} templates (index built in {build_ms:.1f} ms):")
+        print(f"  pruned without DTW:   {np.mean(pruned_counts) / n_templates:6.1%} "
+              f"(mean {np.mean(pruned_counts):.0f} of {n_templates}; "
+              f"{np.mean(keogh_counts):.0f} passed LB_Kim and needed LB_Keogh)")
+        print(f"  with pruning:         p50 {percentile_ms(pruned_times, 50):7.2f} ms   "
+              f"p95 {percentile_ms(pruned_times, 95):7.2f} ms")
+        print(f"  full DTW:             p50 {percentile_ms(full_times, 50):7.2f} ms   "
+              f"p95 {percentile_ms(full_times, 95):7.2f} ms")
+        print(f"  same top {args.top_n}:           {agree}/{args.attempts}   "
+              f"top-1 accuracy {correct}/{args.attempts}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--templates", type=int, nargs="+", default=[100, 1000, 5000], help="Library sizes to test")
+    parser.add_argument("--attempts", type=int, default=30, help="Attempts per library size")
+    parser.add_argument("--frames", type=int, default=60, help="Frames per attempt")
+    parser.add_argument("--length", type=int, default=32, help="Resampled sequence length")
+    parser.add_argument("--band", type=float, default=0.1, help="Sakoe-Chiba band as a fraction of the length")
+    parser.add_argument("--top-n", dest="top_n", type=int, default=5, help="Matches to return")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark the serving hot paths and catch regressions against a stored baseline.
+- Times SignLanguageModel.preprocess_landmarks and predict, compute_score, and full
+  POST /api/sign-language/predict and /api/attempts requests sent through an
+  in-process httpx ASGI client (no server or network), all on synthetic 21-landmark frames.
+- Reports throughput and p50/p95/p99 latency per benchmark, plus the peak memory
+  allocated per call, measured in a separate tracemalloc pass so tracing does
+  not skew the timings. The per-call peaks use tracemalloc.reset_peak, so like the
+  rest of the backend this needs Python 3.9 or newer.
+- --out writes the results as JSON; --baseline compares against an earlier file
+  and exits with status 1 if any p50 got slower by more than --threshold.
+Usage (from repo root):
+    python backend/scripts/benchmark_serving.py --out bench_baseline.json
+    python backend/scripts/benchmark_serving.py --baseline bench_baseline.json --out bench_new.json
+    python backend/scripts/benchmark_serving.py --only predict --repeat 5000
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the app's own "from routers..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from main import app
+from models.sign_language_model import get_model
+from routers.sign_scoring import REFERENCE_TEMPLATES, compute_score
+from schemas.sign_language import Landmark as HandLandmark
+from schemas.sign_scoring import Frame, Landmark
+
+
+def make_frames(n_frames, rng):
+    """(frames, 21, 4) landmarks around the "hello" reference pose, fully visible"""
+    reference = np.array([[lm.x, lm.y, lm.z, lm.v] for lm in REFERENCE_TEMPLATES["hello"].landmarks])
+    frames = np.repeat(reference[None], n_frames, axis=0)
+    frames[:, :, :3] += rng.normal(0, 0.03, (n_frames, 21, 3))
+    return frames
+
+
+def frame_json(frame, visibility=True):
+    keys = ("x", "y", "z", "v") if visibility else ("x", "y", "z")
+    return {"landmarks": [dict(zip(keys, map(float, point))) for point in frame]}
+
+
+def summarize(samples, total_seconds):
+    samples = np.asarray(samples)
+    return {
+        "calls": len(samples),
+        "throughput_per_s": round(len(samples) / total_seconds, 1),
+        "mean_us": round(float(samples.mean()) * 1e6, 2),
+        "p50_us": round(float(np.percentile(samples, 50)) * 1e6, 2),
+        "p95_us": round(float(np.percentile(samples, 95)) * 1e6, 2),
+        "p99_us": round(float(np.percentile(samples, 99)) * 1e6, 2),
+    }
+
+
+def alloc_peak_kib(call, repeat):
+    """Mean peak of memory allocated during one call, in KiB"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return round(float(np.mean(peaks)) / 1024, 2)
+
+
+def bench_sync(fn, args):
+    for _ in range(args.warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples, time.perf_counter() - started)
+    result["alloc_peak_kib"] = alloc_peak_kib(fn, args.alloc_repeat)
+    return result
+
+
+async def bench_request(client, method, path, body, args):
+    async def call():
+        response = await client.request(method, path, json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+
+    for _ in range(args.warmup):
+        await call()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    result = summarize(samples, time.perf_counter() - started)
+
+    # The client is async, so trace a handful of calls driven one at a time
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(args.alloc_repeat):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    result["alloc_peak_kib"] = round(float(np.mean(peaks)) / 1024, 2)
+    return result
+
+
+async def run_benchmarks(args):
+    rng = np.random.default_rng(args.seed)
+    model = get_model()
+    frame = make_frames(1, rng)[0]
+    hand = [HandLandmark(x=x, y=y, z=z) for x, y, z, _ in frame]
+    user_frame = Frame(landmarks=[Landmark(x=x, y=y, z=z, v=v) for x, y, z, v in frame])
+    reference = REFERENCE_TEMPLATES["hello"]
+
+    benchmarks = {
+        "model.preprocess_landmarks": lambda: model.preprocess_landmarks(hand),
+        "model.predict": lambda: model.predict(hand),
+        "compute_score": lambda: compute_score(user_frame, reference),
+    }
+    requests = {
+        "POST /api/sign-language/predict": (
+            "POST", "/api/sign-language/predict", {"hand_landmarks": frame_json(frame, visibility=False)}),
+        f"POST /api/attempts ({args.attempt_frames} frames)": (
+            "POST", "/api/attempts",
+            {"word": "hello", "frames": [frame_json(f) for f in make_frames(args.attempt_frames, rng)]}),
+    }
+
+    results = {}
+    for name, fn in benchmarks.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = bench_sync(fn, args)
+        print_result(name, results[name])
+
+    selected = {name: spec for name, spec in requests.items()
+                if not args.only or any(part in name for part in args.only)}
+    if selected:
+        # Run startup (model load, warmup, template library) as uvicorn would
+        await app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for name, (method, path, body) in selected.items():
+                    results[name] = await bench_request(client, method, path, body, args)
+                    print_result(name, results[name])
+        finally:
+            await app.router.shutdown()
+    return results, model
+
+
+def print_result(name, result):
+    print(f"{name:<42} {result['throughput_per_s']:>10.1f}/s   p50 {result['p50_us']:>9.1f} us   "
+          f"p95 {result['p95_us']:>9.1f} us   p99 {result['p99_us']:>9.1f} us   "
+          f"alloc {result['alloc_peak_kib']:>8.1f} KiB")
+
+
+def compare(results, baseline, threshold):
+    """Print p50/p95 ratios against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta'].get('timestamp', 'unknown')} "
+          f"(regression: p50 more than {threshold:.0%} slower):")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"  {name:<42} new benchmark")
+            continue
+        p50_ratio = result["p50_us"] / max(old["p50_us"], 1e-9)
+        p95_ratio = result["p95_us"] / max(old["p95_us"], 1e-9)
+        regressed = p50_ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<42} p50 {p50_ratio:5.2f}x   p95 {p95_ratio:5.2f}x   "
+              f"alloc {result['alloc_peak_kib'] - old.get('alloc_peak_kib', 0):+8.1f} KiB"
+              f"{'   REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main(args):
+    results, model = asyncio.run(run_benchmarks(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "model_source": model.source,
+            "model_version": model.version,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote results to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000, help="Timed calls per benchmark")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed calls before each benchmark")
+    parser.add_argument("--alloc-repeat", dest="alloc_repeat", type=int, default=50,
+                        help="Calls traced with tracemalloc per benchmark")
+    parser.add_argument("--attempt-frames", dest="attempt_frames", type=int, default=30,
+                        help="Frames per /api/attempts request")
+    parser.add_argument("--only", nargs="+", default=None, help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare against results from an earlier --out")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Fail if a p50 is more than this fraction slower than the baseline")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Measure Firebase ID token verification without network access.
+- Generates an RSA signing key and certificate, serves it from a local stand-in for
+  Google's certificate endpoint (Cache-Control max-age, --key-server-delay-ms of
+  simulated network latency) and mints ID tokens for a test project.
+- Times FirebaseTokenVerifier.verify with warm keys, answers from the token cache,
+  and one signing key fetch.
+- Sends --concurrency requests at a verifier whose keys have expired, while a ticker
+  measures how late the event loop runs. It compares verifying on the loop (as a
+  synchronous verify_id_token call in an async dependency does), verifying on a
+  worker thread, and verifying with keys the background refresher already fetched.
+- --pinned verifies against a local key file instead of the key server.
+Usage (from repo root):
+    python backend/scripts/benchmark_token_verification.py
+    python backend/scripts/benchmark_token_verification.py --key-server-delay-ms 200 --concurrency 50
+    python backend/scripts/benchmark_token_verification.py --pinned --repeat 5000
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the services' own "from services..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import asyncio
+import base64
+import datetime
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+from services.firebase import TokenCache
+from services.token_verifier import FirebaseTokenVerifier
+
+PROJECT_ID = "benchmark-project"
+KID = "benchmark-key"
+
+
+def make_signing_key():
+    """RSA private key and a self-signed certificate PEM for it, like Google's x509 endpoint serves"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.system.gserviceaccount.com")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def mint_token(key, uid: str, lifetime: float = 3600.0, header_overrides=None, claim_overrides=None) -> str:
+    """An RS256 ID token shaped like the ones Firebase Auth issues; the overrides replace header fields or claims"""
+    now = int(time.time())
+    header = {"alg": "RS256", "kid": KID, "typ": "JWT", **(header_overrides or {})}
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "user_id": uid,
+        "auth_time": now,
+        "iat": now,
+        "exp": now + int(lifetime),
+        "email": f"{uid}@example.com",
+        **(claim_overrides or {}),
+    }
+    signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+    signature = key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    return f"{signing_input}.{_b64(signature)}"
+
+
+def start_key_server(cert_pem: str, max_age: int, delay_ms: float):
+    """
+    Local stand-in for Google's certificate endpoint; returns (server, url, requests).
+    requests["count"] counts requests; set requests["fail"] to answer them with 503.
+    """
+    body = json.dumps({KID: cert_pem}).encode()
+    requests = {"count": 0, "fail": False}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests["count"] += 1
+            time.sleep(delay_ms / 1000.0)
+            if requests["fail"]:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", f"public, max-age={max_age}, must-revalidate, no-transform")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/certs", requests
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1e3
+    return {
+        "calls": len(samples),
+        "p50_ms": round(float(np.percentile(samples, 50)), 4),
+        "p95_ms": round(float(np.percentile(samples, 95)), 4),
+        "p99_ms": round(float(np.percentile(samples, 99)), 4),
+        "max_ms": round(float(samples.max()), 4),
+    }
+
+
+def time_calls(fn, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def loop_lag_during(work, tick_seconds=0.001):
+    """Run work() while a ticker records how late each 1 ms sleep wakes up; returns (work result, max lag ms)"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(tick_seconds)
+            lags.append(loop.time() - start - tick_seconds)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    try:
+        result = await work()
+    finally:
+        done.set()
+        await ticker_task
+    return result, round(max(lags) * 1e3, 2) if lags else 0.0
+
+
+async def expired_keys_scenario(make_verifier, tokens, mode):
+    """Concurrent requests hitting a verifier with no current keys; returns latency summary and loop lag"""
+    verifier = make_verifier()
+    loop = asyncio.get_running_loop()
+    if mode == "background refresh":
+        refresher = asyncio.create_task(verifier.run_refresher())
+        while verifier.fetches == 0:
+            await asyncio.sleep(0.001)
+    samples = []
+
+    async def request(token):
+        start = time.perf_counter()
+        if mode == "on the event loop":
+            verifier.verify(token)
+        else:
+            await loop.run_in_executor(None, verifier.verify, token)
+        samples.append(time.perf_counter() - start)
+
+    async def work():
+        await asyncio.gather(*(request(token) for token in tokens))
+
+    _, max_lag_ms = await loop_lag_during(work)
+    if mode == "background refresh":
+        refresher.cancel()
+    return {**summarize(samples), "max_loop_lag_ms": max_lag_ms,
+            "request_path_fetches": verifier.request_path_fetches}
+
+
+def main(args):
+    key, cert_pem = make_signing_key()
+    server, url, key_requests = start_key_server(cert_pem, args.key_max_age, args.key_server_delay_ms)
+    pinned_path = None
+    if args.pinned:
+        pinned = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({KID: cert_pem}, pinned)
+        pinned.close()
+        pinned_path = pinned.name
+
+    def make_verifier():
+        return FirebaseTokenVerifier(PROJECT_ID, certs_url=url, pinned_path=pinned_path)
+
+    print(f"Signing keys from {pinned_path or url}"
+          f"{'' if pinned_path else f' (simulated latency {args.key_server_delay_ms:g} ms)'}")
+    tokens = [mint_token(key, f"user-{i}") for i in range(args.repeat)]
+    results = {}
+    try:
+        verifier = make_verifier()
+        start = time.perf_counter()
+        verifier.refresh()
+        results["key fetch"] = {"ms": round((time.perf_counter() - start) * 1e3, 3)}
+
+        results["verify (warm keys)"] = time_calls(verifier.verify, tokens)
+
+        cache = TokenCache()
+        cache.put(tokens[0], verifier.verify(tokens[0]))
+        results["token cache hit"] = time_calls(cache.get, [tokens[0]] * args.repeat)
+
+        concurrent_tokens = tokens[:args.concurrency]
+        for mode in ("on the event loop", "worker thread", "background refresh"):
+            results[f"expired keys, {mode}"] = asyncio.run(
+                expired_keys_scenario(make_verifier, concurrent_tokens, mode))
+    finally:
+        server.shutdown()
+        if pinned_path:
+            os.remove(pinned_path)
+
+    for name, result in results.items():
+        print(f"{name:<36} " + "  ".join(f"{k} {v}" for k, v in result.items()))
+    print(f"Key server requests: {key_requests['count']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {args.out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1000, help="Tokens verified per timing")
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="Concurrent requests in the expired-keys scenarios")
+    parser.add_argument("--key-server-delay-ms", dest="key_server_delay_ms", type=float, default=100.0,
+                        help="Simulated network latency of the key server")
+    parser.add_argument("--key-max-age", dest="key_max_age", type=int, default=21600,
+                        help="Cache-Control max-age the key server sends, in seconds")
+    parser.add_argument("--pinned", action="store_true", help="Verify against a local key file instead")
+    parser.add_argument("--out", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Build the sign template library served by /api/attempts and /api/templates/nearest.
+- Averages the landmarks of every class in the backend/models/feature_store/ feature
+  store (written by train_all_from_kaggle.py; a landmark_cache.npz also works) into
+  one reference pose per class.
+- Keeps the built-in word templates ("hello", "thank_you", "yes") unless --no-builtin.
+- Adds multi-frame templates for moving signs from --sequences DIR, one
+  <word>.npy clip of shape (frames, 21, 3 or 4) per sign, e.g. J.npy, Z.npy.
+- Writes one packed (words, 21, 4) array to backend/models/templates.npz, which the
+  server loads at startup (override with TEMPLATES_PATH).
+Usage (from repo root):
+    python backend/scripts/build_templates.py
+    python backend/scripts/build_templates.py --cache backend/models/feature_store --out /tmp/templates.npz
+    python backend/scripts/build_templates.py --sequences ./data/sign_clips
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the router's own "from schemas..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+from pathlib import Path
+import numpy as np
+
+from feature_store import load_features
+from routers.sign_scoring import BUILTIN_TEMPLATES
+from services.sequence_scoring import SequenceIndex
+from services.template_store import TemplateStore, TEMPLATES_PATH
+
+DEFAULT_CACHE = os.path.join(REPO_ROOT, "backend", "models", "feature_store")
+
+
+def class_means(cache_path):
+    """Per-class mean landmarks from the feature store as (classes, 21, 4), fully visible"""
+    X, y = load_features(cache_path)
+    y = y.astype(str)
+    labels = sorted(set(y))
+    means = np.stack([X[y == label].mean(axis=0, dtype=np.float64).reshape(21, 3) for label in labels])
+    visibility = np.ones((len(labels), 21, 1))
+    return labels, np.concatenate([means, visibility], axis=2), {label: int((y == label).sum()) for label in labels}
+
+
+def main(args):
+    words, landmarks, display_names, difficulties = [], [], [], []
+    if not args.no_builtin:
+        words += BUILTIN_TEMPLATES.words
+        landmarks.append(BUILTIN_TEMPLATES.landmarks)
+        display_names += BUILTIN_TEMPLATES.display_names
+        difficulties += BUILTIN_TEMPLATES.difficulties
+        print(f"Built-in templates: {', '.join(BUILTIN_TEMPLATES.words)}")
+
+    if os.path.exists(args.cache):
+        labels, means, counts = class_means(args.cache)
+        for label in labels:
+            if label in words:
+                raise ValueError(f"Class '{label}' in the landmark cache clashes with a built-in template")
+        words += labels
+        landmarks.append(means)
+        display_names += labels
+        difficulties += [args.difficulty] * len(labels)
+        print(f"Averaged {sum(counts.values())} cached samples into {len(labels)} class templates")
+    else:
+        print(f"No feature store at {args.cache}; run train_all_from_kaggle.py to build one")
+
+    sequences = None
+    if args.sequences:
+        paths = sorted(Path(args.sequences).glob("*.npy"))
+        clips = [np.load(path) for path in paths]
+        for path, clip in zip(paths, clips):
+            if clip.ndim != 3 or clip.shape[1] != 21 or clip.shape[2] not in (3, 4):
+                raise ValueError(f"{path} has shape {clip.shape}, expected (frames, 21, 3 or 4)")
+        sequences = SequenceIndex([path.stem for path in paths], clips,
+                                  difficulties=[args.difficulty] * len(paths))
+        print(f"Sequence templates: {', '.join(sequences.words) or 'none'}")
+
+    if not words and not sequences:
+        raise RuntimeError("No templates to write")
+    store = TemplateStore(words, np.concatenate(landmarks) if landmarks else np.zeros((0, 21, 4)),
+                          display_names, difficulties, sequences=sequences)
+    store.save(args.out)
+    print(f"Wrote {len(store)} templates and {len(sequences) if sequences else 0} sequence templates to {args.out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Feature store directory (or a landmark_cache.npz)")
+    parser.add_argument("--out", default=os.path.abspath(TEMPLATES_PATH), help="Template library to write")
+    parser.add_argument("--sequences", default=None, help="Folder of <word>.npy landmark clips for moving signs")
+    parser.add_argument("--no-builtin", dest="no_builtin", action="store_true",
+                        help="Only write templates averaged from the landmark cache")
+    parser.add_argument("--difficulty", default="medium", choices=["easy", "medium", "hard"],
+                        help="Difficulty listed by /api/words for cache templates")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Check that FirebaseTokenVerifier rejects every token it should, without network access.
+- Mints tokens with the local signing key and key server from
+  benchmark_token_verification.py, then feeds the verifier a valid token and
+  forged ones: a foreign signature, edited claims, wrong "aud" and "iss",
+  HS256 and "none" algorithms, an expired token, one issued in the future,
+  an unknown key id, a missing subject and garbage.
+- Takes the key server down and checks that concurrent verifications with
+  stale keys share one failed fetch and keep using the old keys, and that
+  a verifier with no keys fails with CertificateFetchError.
+- Prints one line per check and exits with status 1 if any check fails.
+Usage (from repo root):
+    python backend/scripts/check_token_verifier.py
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the services' own "from services..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import auth
+
+from services.token_verifier import FirebaseTokenVerifier
+from benchmark_token_verification import KID, PROJECT_ID, make_signing_key, mint_token, start_key_server
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _resign(token: str, header=None, signature: bytes = b"") -> str:
+    """The token's claims under another header and signature"""
+    header_segment, payload_segment, _ = token.split(".")
+    if header is not None:
+        header_segment = _b64(json.dumps(header).encode())
+    return f"{header_segment}.{payload_segment}.{_b64(signature)}"
+
+
+def _edit_claims(token: str, **claims) -> str:
+    """The token with claims changed after signing"""
+    header_segment, payload_segment, signature_segment = token.split(".")
+    payload = json.loads(base64.urlsafe_b64decode(payload_segment + "=" * (-len(payload_segment) % 4)))
+    payload.update(claims)
+    return f"{header_segment}.{_b64(json.dumps(payload).encode())}.{signature_segment}"
+
+
+def rejection_cases(key, cert_pem):
+    """(name, token, expected exception type) for tokens the verifier must refuse"""
+    now = int(time.time())
+    other_key, _ = make_signing_key()
+    valid = mint_token(key, "user-1")
+    hs256_header = {"alg": "HS256", "kid": KID, "typ": "JWT"}
+    hs256_input = _resign(valid, hs256_header).rsplit(".", 1)[0]
+    # The classic confusion attack: HMAC keyed with the public certificate
+    hs256_signature = hmac.new(cert_pem.encode(), hs256_input.encode(), hashlib.sha256).digest()
+    return [
+        ("signed by another key", mint_token(other_key, "user-1"), auth.InvalidIdTokenError),
+        ("claims edited after signing", _edit_claims(valid, sub="admin", user_id="admin"), auth.InvalidIdTokenError),
+        ("wrong aud", mint_token(key, "user-1", claim_overrides={"aud": "other-project"}), auth.InvalidIdTokenError),
+        ("wrong iss", mint_token(key, "user-1", claim_overrides={"iss": "https://securetoken.google.com/other"}),
+         auth.InvalidIdTokenError),
+        ("alg HS256 keyed with the certificate", _resign(valid, hs256_header, hs256_signature),
+         auth.InvalidIdTokenError),
+        ("alg none", _resign(valid, {"alg": "none", "kid": KID, "typ": "JWT"}), auth.InvalidIdTokenError),
+        ("expired", mint_token(key, "user-1", lifetime=-3600), auth.ExpiredIdTokenError),
+        ("issued in the future", mint_token(key, "user-1", claim_overrides={"iat": now + 3600, "exp": now + 7200}),
+         auth.InvalidIdTokenError),
+        ("unknown kid", mint_token(key, "user-1", header_overrides={"kid": "not-a-key"}), auth.InvalidIdTokenError),
+        ("missing sub", mint_token(key, "user-1", claim_overrides={"sub": None}), auth.InvalidIdTokenError),
+        ("not a JWT", "not-a-token", auth.InvalidIdTokenError),
+    ]
+
+
+def main(args):
+    key, cert_pem = make_signing_key()
+    server, url, key_requests = start_key_server(cert_pem, max_age=3600, delay_ms=args.key_server_delay_ms)
+    results = []
+
+    def check(name, passed, detail=""):
+        results.append(passed)
+        print(f"{'PASS' if passed else 'FAIL'}  {name}{f': {detail}' if detail and not passed else ''}")
+
+    try:
+        verifier = FirebaseTokenVerifier(PROJECT_ID, certs_url=url)
+        verifier.refresh()
+        claims = verifier.verify(mint_token(key, "user-1"))
+        check("valid token accepted", claims.get("uid") == "user-1", f"claims {claims}")
+
+        for name, token, expected in rejection_cases(key, cert_pem):
+            try:
+                verifier.verify(token)
+                check(f"rejects {name}", False, "token was accepted")
+            except Exception as e:
+                # ExpiredIdTokenError subclasses InvalidIdTokenError, so compare exactly
+                check(f"rejects {name}", type(e) is expected, f"{type(e).__name__}: {e}")
+
+        # Stale keys while the key server is down: one shared fetch, old keys stay in use
+        verifier._key_set.expires_at = time.time() - 1
+        key_requests["fail"] = True
+        key_requests["count"] = 0
+        token = mint_token(key, "user-2")
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            uids = list(pool.map(lambda _: verifier.verify(token)["uid"], range(args.concurrency)))
+        check("stale keys stay in use while the key server is down", uids == ["user-2"] * args.concurrency,
+              f"uids {set(uids)}")
+        check(f"{args.concurrency} concurrent verifications share one failed fetch", key_requests["count"] == 1,
+              f"{key_requests['count']} fetches")
+
+        try:
+            FirebaseTokenVerifier(PROJECT_ID, certs_url=url).verify(token)
+            check("no keys and key server down raises CertificateFetchError", False, "token was accepted")
+        except Exception as e:
+            check("no keys and key server down raises CertificateFetchError",
+                  isinstance(e, auth.CertificateFetchError), f"{type(e).__name__}: {e}")
+    finally:
+        server.shutdown()
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20,
+                        help="Concurrent verifications in the key-server-down check")
+    parser.add_argument("--key-server-delay-ms", dest="key_server_delay_ms", type=float, default=100.0,
+                        help="Simulated network latency of the key server")
+    args = parser.parse_args()
+    main(args)
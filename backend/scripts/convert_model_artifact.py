@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Convert the pickled model (asl_model.pkl + asl_scaler.pkl) into the compiled,
+memory-mappable artifact directory that the server loads at startup.
+- Compiles the RandomForestClassifier and StandardScaler into a CompiledForest.
+- Publishes it as a new version in backend/models/registry/ and points CURRENT at it,
+  or writes a standalone artifact directory with --out.
+- Reloads the artifact through mmap, verifies its checksum and checks that it
+  predicts exactly like the pickled model on random landmark rows.
+Usage (from repo root):
+    python backend/scripts/convert_model_artifact.py
+    python backend/scripts/convert_model_artifact.py --model my_model.pkl --scaler my_scaler.pkl --out /tmp/asl_forest
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import argparse
+import pickle
+import numpy as np
+
+from backend.models.compiled_forest import CompiledForest
+from backend.models.artifact import save_artifact, load_artifact
+from backend.models.registry import ModelRegistry, REGISTRY_DIR
+
+MODELS_DIR = os.path.join(REPO_ROOT, "backend", "models")
+
+
+def main(args):
+    with open(args.model, "rb") as f:
+        model = pickle.load(f)
+    with open(args.scaler, "rb") as f:
+        scaler = pickle.load(f)
+    print(f"Loaded {type(model).__name__} with {len(model.estimators_)} trees "
+          f"and {len(model.classes_)} classes")
+
+    compiled = CompiledForest.from_sklearn(model, scaler)
+    if args.out:
+        out_path = args.out
+        header = save_artifact(out_path, compiled)
+        print(f"Wrote artifact to {out_path} ({header['checksum']})")
+    else:
+        registry = ModelRegistry(args.registry)
+        version = registry.publish(compiled, make_current=not args.no_activate)
+        out_path = os.path.join(args.registry, version)
+        print(f"Published model version {version} to {args.registry}")
+
+    reloaded = load_artifact(out_path, mmap=True, verify=True)
+    rng = np.random.default_rng(0)
+    X = rng.random((args.check_rows, compiled.n_features))
+    model.n_jobs = 1  # sum trees in estimator order, as the compiled forest does
+    expected = model.predict_proba(scaler.transform(X))
+    if not np.array_equal(reloaded.predict_proba(X), expected):
+        raise RuntimeError("Reloaded artifact does not reproduce the pickled model")
+    print(f"Verified checksum and predictions on {args.check_rows} random rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.path.join(MODELS_DIR, "asl_model.pkl"), help="Pickled RandomForestClassifier")
+    parser.add_argument("--scaler", default=os.path.join(MODELS_DIR, "asl_scaler.pkl"), help="Pickled StandardScaler")
+    parser.add_argument("--registry", default=REGISTRY_DIR, help="Model registry to publish the new version to")
+    parser.add_argument("--no-activate", dest="no_activate", action="store_true",
+                        help="Publish without pointing the registry's CURRENT at the new version")
+    parser.add_argument("--out", default=None, help="Write a standalone artifact directory instead of publishing")
+    parser.add_argument("--check-rows", dest="check_rows", type=int, default=1000,
+                        help="Random rows used to verify the converted artifact")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,168 @@
+"""
+Append-only, chunked float32 feature store for large training sets.
+
+A store is a directory:
+
+    features.f32    (rows, dim) float32, row-major, no header
+    labels.i32      (rows,) int32 positions in the manifest's class list
+    manifest.json   dim, committed row count, class names and caller metadata
+
+Appended rows are buffered and written to the data files a chunk at a time.
+commit() flushes the buffer, fsyncs both files and then atomically replaces
+the manifest, so readers only ever see whole commits. Bytes past the last
+committed row (an interrupted write) are truncated away when the store is
+opened, and appending carries on from there.
+
+X and label_codes map the files with np.memmap, so training and evaluation
+only page in the rows they touch instead of loading the whole store.
+"""
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Rows buffered in memory before they are written out
+CHUNK_ROWS = 65536
+
+
+class FeatureStore:
+    """Append-only float32 feature rows with string labels, read through np.memmap"""
+
+    def __init__(self, path: str, dim: int = 63, chunk_rows: int = CHUNK_ROWS, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self.dim = dim
+        self.chunk_rows = chunk_rows
+        self.rows = 0  # committed
+        self.classes: List[str] = []
+        self.meta: Dict = {}
+        self._class_codes: Dict[str, int] = {}
+        self._written = 0  # rows in the data files, committed or not
+        self._features: List[np.ndarray] = []
+        self._labels: List[int] = []
+
+        if read_only and not os.path.exists(self._file("manifest.json")):
+            raise FileNotFoundError(f"No feature store at {path}")
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._file("manifest.json")):
+            with open(self._file("manifest.json")) as f:
+                manifest = json.load(f)
+            if manifest["dim"] != dim:
+                raise ValueError(f"{path} holds {manifest['dim']}-d features, expected {dim}")
+            self.rows = manifest["rows"]
+            self.classes = manifest["classes"]
+            self.meta = manifest["meta"]
+            self._class_codes = {label: code for code, label in enumerate(self.classes)}
+        if not read_only:
+            self._truncate(self.rows)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"Feature store {self.path} was opened read-only")
+
+    def _truncate(self, rows: int):
+        """Cut both data files back to `rows` rows, dropping anything not committed"""
+        for name, row_bytes in (("features.f32", self.dim * 4), ("labels.i32", 4)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(rows * row_bytes)
+        self._written = rows
+
+    def reset(self, meta: Optional[Dict] = None):
+        """Empty the store, keeping its directory"""
+        self._check_writable()
+        self._features, self._labels = [], []
+        self.rows = 0
+        self.classes = []
+        self._class_codes = {}
+        self.meta = dict(meta or {})
+        self._truncate(0)
+        self._write_manifest()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def append(self, features: np.ndarray, label: str):
+        """Buffer one row; it becomes visible to readers at the next commit()"""
+        self._check_writable()
+        code = self._class_codes.get(label)
+        if code is None:
+            code = self._class_codes[label] = len(self.classes)
+            self.classes.append(label)
+        self._features.append(np.asarray(features, dtype=np.float32).reshape(self.dim))
+        self._labels.append(code)
+        if len(self._labels) >= self.chunk_rows:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if not self._labels:
+            return
+        with open(self._file("features.f32"), "ab") as f:
+            f.write(np.stack(self._features).astype("<f4", copy=False).tobytes())
+        with open(self._file("labels.i32"), "ab") as f:
+            f.write(np.asarray(self._labels, dtype="<i4").tobytes())
+        self._written += len(self._labels)
+        self._features, self._labels = [], []
+
+    def commit(self, **meta):
+        """Make every appended row durable and visible, together with updated metadata"""
+        self._check_writable()
+        self._write_chunk()
+        for name in ("features.f32", "labels.i32"):
+            with open(self._file(name), "ab") as f:
+                os.fsync(f.fileno())
+        self.rows = self._written
+        self.meta.update(meta)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        tmp_path = self._file("manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "rows": self.rows, "classes": self.classes, "meta": self.meta}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._file("manifest.json"))
+
+    @property
+    def X(self) -> np.ndarray:
+        """(rows, dim) float32 memmap of the committed features"""
+        if self.rows == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(self._file("features.f32"), dtype="<f4", mode="r", shape=(self.rows, self.dim))
+
+    @property
+    def label_codes(self) -> np.ndarray:
+        """(rows,) int32 memmap of positions in self.classes"""
+        if self.rows == 0:
+            return np.zeros(0, dtype=np.int32)
+        return np.memmap(self._file("labels.i32"), dtype="<i4", mode="r", shape=(self.rows,))
+
+    @property
+    def y(self) -> np.ndarray:
+        """Labels as strings (materialized; 4 bytes per character per row)"""
+        return np.asarray(self.classes, dtype=str)[self.label_codes] if self.rows else np.zeros(0, dtype=str)
+
+    def counts(self) -> Dict[str, int]:
+        """Rows per label"""
+        totals = np.bincount(self.label_codes, minlength=len(self.classes))
+        return {label: int(total) for label, total in zip(self.classes, totals)}
+
+    def iter_batches(self, indices: np.ndarray, batch_rows: int = CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(features, label codes) for the given rows in order, batch_rows at a time"""
+        X, codes = self.X, self.label_codes
+        for start in range(0, len(indices), batch_rows):
+            batch = indices[start:start + batch_rows]
+            yield np.asarray(X[batch]), np.asarray(codes[batch])
+
+
+def load_features(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(X, y) from a feature store directory (X memory-mapped) or a legacy landmark_cache.npz"""
+    if os.path.isdir(path):
+        store = FeatureStore(path, read_only=True)
+        return store.X, store.y
+    data = np.load(path, allow_pickle=True)
+    return data["X"], data["y"]
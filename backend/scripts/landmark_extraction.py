@@ -0,0 +1,659 @@
+"""
+MediaPipe landmark extraction shared by the training scripts.
+
+extract_files runs extract_landmarks_from_image over a list of image paths,
+either in this process or sharded across a process pool (--workers N). Each
+worker process builds its own Hands instance once, in the pool initializer;
+files go out in chunks and come back in any order, but results are returned in
+the order of the input paths, so the extracted arrays are the same for any
+worker count. Progress from all workers is aggregated into one tqdm bar.
+
+Within each process, run_pipeline overlaps disk reads and JPEG decoding with
+MediaPipe: decoder threads fill a bounded prefetch queue (cv2 releases the
+GIL while reading and decoding) that the MediaPipe stage drains. Stage times,
+queue depth and throughput are printed at the end to tune --decoders and
+--prefetch, e.g. more decoders for network-mounted datasets.
+
+ExtractionCache remembers each file's result across runs, keyed on a hash of
+the file's contents plus the extraction parameters, so extract_files_cached
+only runs MediaPipe on new or changed images (or after a parameter change).
+Misses (no hand detected) are cached too; read errors are retried next run.
+Results are appended to files on disk rather than held in memory. Entries
+for files no longer in the dataset are dropped when the cache is saved.
+
+extract_to_store streams the results, in order, into an append-only
+FeatureStore (see feature_store.py) and commits it together with the cache as
+it goes. Neither holds features in memory, so memory use does not grow with
+the dataset, and an interrupted run resumes where it stopped.
+"""
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from tqdm import tqdm
+
+from feature_store import FeatureStore
+
+mp_hands = mp.solutions.hands
+
+# Files per task sent to a worker; large enough to amortize the round trip,
+# small enough to keep the progress bar moving and the shards balanced
+CHUNK_SIZE = 32
+
+# Decoder threads per extraction process and decoded images they may run ahead by
+DECODER_THREADS = 2
+PREFETCH = 16
+
+# Images per feature store commit (and extraction cache checkpoint)
+COMMIT_EVERY = 4096
+
+# Rows copied at a time when the extraction cache drops entries
+CACHE_COMPACT_ROWS = 65536
+
+# Error reported for files OpenCV cannot decode, which the scripts skip silently
+UNREADABLE = "could not read image"
+
+# (features or None if no hand was detected, error message or None)
+ExtractionResult = Tuple[Optional[np.ndarray], Optional[str]]
+
+
+def extract_landmarks_from_rgb(image_rgb, hands):
+    """
+    Given an RGB image and a configured MediaPipe Hands instance,
+    return a flattened 63-d feature vector [x1,y1,z1,...,x21,y21,z21] or None if no hand.
+    Coordinates are the normalized coordinates provided by MediaPipe (0..1 for x,y).
+    """
+    results = hands.process(image_rgb)
+    if not results.multi_hand_landmarks:
+        return None
+    # Use first detected hand
+    lm = results.multi_hand_landmarks[0].landmark
+    features = []
+    for p in lm:
+        features.extend([p.x, p.y, p.z])
+    return np.array(features, dtype=np.float32)
+
+
+def extract_landmarks_from_image(image_bgr, hands):
+    """extract_landmarks_from_rgb for an OpenCV BGR image"""
+    return extract_landmarks_from_rgb(cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB), hands)
+
+
+def create_hands(min_detection_confidence: float = 0.5):
+    """A MediaPipe Hands instance configured for single static images"""
+    return mp_hands.Hands(static_image_mode=True, max_num_hands=1,
+                          min_detection_confidence=min_detection_confidence)
+
+
+def decode_image(path: str) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """Read and decode one image to RGB; returns (image, None) or (None, error)"""
+    try:
+        img = cv2.imread(str(path))
+        if img is None:
+            return None, UNREADABLE
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB), None
+    except Exception as e:
+        return None, str(e)
+
+
+class PipelineStats:
+    """Time spent in each stage of the decode -> MediaPipe pipeline, summed over threads and workers"""
+
+    def __init__(self):
+        self.images = 0
+        self.decode_seconds = 0.0  # reading + decoding, across all decoder threads
+        self.inference_seconds = 0.0  # hands.process
+        self.starved_seconds = 0.0  # MediaPipe stage waiting for a decoded image
+        self.blocked_seconds = 0.0  # decoder threads waiting for room in a full queue
+        self.depth_total = 0  # queue depth seen by the MediaPipe stage before each image
+        self.depth_max = 0
+
+    def merge(self, other: "PipelineStats"):
+        for name in ("images", "decode_seconds", "inference_seconds", "starved_seconds",
+                     "blocked_seconds", "depth_total"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.depth_max = max(self.depth_max, other.depth_max)
+
+    def report(self, wall_seconds: float, workers: int, decoders: int, prefetch: int) -> str:
+        images = max(self.images, 1)
+        busy = self.inference_seconds + self.starved_seconds
+        pipeline = f"{decoders} decoder thread(s), prefetch {prefetch}" if decoders > 0 else "inline decoding"
+        lines = [
+            f"Extracted {self.images} images in {wall_seconds:.1f} s "
+            f"({self.images / max(wall_seconds, 1e-9):.1f} img/s) on {workers} worker(s), {pipeline}",
+            f"  decode {self.decode_seconds / images * 1e3:.1f} ms/img   "
+            f"MediaPipe {self.inference_seconds / images * 1e3:.1f} ms/img",
+        ]
+        if decoders > 0:
+            lines += [
+                f"  MediaPipe stage idle waiting for images {self.starved_seconds / max(busy, 1e-9):.0%} "
+                f"(high: add --decoders); decoders blocked on a full queue "
+                f"{self.blocked_seconds / max(self.decode_seconds + self.blocked_seconds, 1e-9):.0%} "
+                f"(high: add --workers)",
+                f"  queue depth mean {self.depth_total / images:.1f}, max {self.depth_max} of {prefetch}",
+            ]
+        return "\n".join(lines)
+
+
+def run_pipeline(paths: Sequence[str], hands, stats: PipelineStats, decoders: int = DECODER_THREADS,
+                 prefetch: int = PREFETCH) -> Iterator[Tuple[int, ExtractionResult]]:
+    """
+    Extract every path, yielding (index, result) in completion order.
+    Decoder threads read and decode images into a bounded queue (cv2 releases
+    the GIL while doing so) while this thread runs MediaPipe on them; with
+    decoders=0 each image is decoded right before it is processed.
+    """
+    def infer(image, error):
+        if error is not None:
+            return None, error
+        start = time.perf_counter()
+        try:
+            return extract_landmarks_from_rgb(image, hands), None
+        except Exception as e:
+            return None, str(e)
+        finally:
+            stats.inference_seconds += time.perf_counter() - start
+
+    if decoders <= 0:
+        for i, path in enumerate(paths):
+            start = time.perf_counter()
+            image, error = decode_image(path)
+            stats.decode_seconds += time.perf_counter() - start
+            result = infer(image, error)
+            stats.images += 1
+            yield i, result
+        return
+
+    frames = queue.Queue(maxsize=max(prefetch, 1))
+    next_index = iter(range(len(paths)))
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def decode_loop():
+        decode_seconds = blocked_seconds = 0.0
+        while not stopped.is_set():
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            image, error = decode_image(paths[i])
+            decoded = time.perf_counter()
+            frames.put((i, image, error))
+            decode_seconds += decoded - start
+            blocked_seconds += time.perf_counter() - decoded
+        with lock:
+            stats.decode_seconds += decode_seconds
+            stats.blocked_seconds += blocked_seconds
+        frames.put(None)
+
+    threads = [threading.Thread(target=decode_loop, daemon=True) for _ in range(decoders)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        finished = 0
+        while finished < len(threads):
+            depth = frames.qsize()
+            start = time.perf_counter()
+            item = frames.get()
+            stats.starved_seconds += time.perf_counter() - start
+            if item is None:
+                finished += 1
+                continue
+            stats.depth_total += depth
+            stats.depth_max = max(stats.depth_max, depth)
+            i, image, error = item
+            result = infer(image, error)
+            stats.images += 1
+            yield i, result
+    finally:
+        # If the consumer stops early, unblock decoders waiting on a full queue
+        stopped.set()
+        while any(thread.is_alive() for thread in threads):
+            try:
+                frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def extract_file(path: str, hands) -> ExtractionResult:
+    """Read one image and extract its landmarks; unreadable files are reported, not raised"""
+    image, error = decode_image(path)
+    if error is not None:
+        return None, error
+    try:
+        return extract_landmarks_from_rgb(image, hands), None
+    except Exception as e:
+        return None, str(e)
+
+
+# Per-process pipeline settings, set by the pool initializer
+_worker_hands = None
+_worker_decoders = DECODER_THREADS
+_worker_prefetch = PREFETCH
+
+def _init_worker(min_detection_confidence: float, decoders: int, prefetch: int):
+    global _worker_hands, _worker_decoders, _worker_prefetch
+    # One OpenCV thread per process; the pool already keeps every core busy
+    cv2.setNumThreads(1)
+    _worker_hands = create_hands(min_detection_confidence)
+    _worker_decoders = decoders
+    _worker_prefetch = prefetch
+
+
+def _extract_chunk(start: int, paths: Sequence[str]) -> Tuple[int, List[ExtractionResult], PipelineStats]:
+    results: List[Optional[ExtractionResult]] = [None] * len(paths)
+    stats = PipelineStats()
+    for i, result in run_pipeline(paths, _worker_hands, stats, _worker_decoders, _worker_prefetch):
+        results[i] = result
+    return start, results, stats
+
+
+def iter_extract(paths: Sequence[str], workers: int = 1, min_detection_confidence: float = 0.5,
+                 desc: str = "Extracting landmarks", decoders: int = DECODER_THREADS,
+                 prefetch: int = PREFETCH) -> Iterator[Tuple[int, ExtractionResult]]:
+    """
+    Extract landmarks from every path, yielding (index, (features, error)) in input order.
+    workers <= 1 runs in this process; otherwise files are sharded across a pool of that many processes.
+    Each process decodes ahead with `decoders` threads into a queue of up to `prefetch` images;
+    a throughput and stage time report is printed at the end.
+    """
+    paths = [str(path) for path in paths]
+    stats = PipelineStats()
+    started = time.perf_counter()
+    pending: Dict[int, ExtractionResult] = {}  # finished ahead of the next index to yield
+    next_index = 0
+
+    with tqdm(total=len(paths), desc=desc, unit="img") as progress:
+        if workers <= 1:
+            hands = create_hands(min_detection_confidence)
+            try:
+                for i, result in run_pipeline(paths, hands, stats, decoders, prefetch):
+                    pending[i] = result
+                    progress.update(1)
+                    while next_index in pending:
+                        yield next_index, pending.pop(next_index)
+                        next_index += 1
+            finally:
+                hands.close()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(min_detection_confidence, decoders, prefetch)) as pool:
+                futures = [
+                    pool.submit(_extract_chunk, start, paths[start:start + CHUNK_SIZE])
+                    for start in range(0, len(paths), CHUNK_SIZE)
+                ]
+                try:
+                    for future in as_completed(futures):
+                        start, chunk, chunk_stats = future.result()
+                        pending.update(zip(range(start, start + len(chunk)), chunk))
+                        stats.merge(chunk_stats)
+                        progress.update(len(chunk))
+                        while next_index in pending:
+                            yield next_index, pending.pop(next_index)
+                            next_index += 1
+                finally:
+                    # Stopped early: drop queued chunks instead of waiting for them on shutdown
+                    for future in futures:
+                        future.cancel()
+
+    if paths:
+        print(stats.report(time.perf_counter() - started, max(workers, 1), decoders, prefetch))
+
+
+def extract_files(paths: Sequence[str], workers: int = 1, min_detection_confidence: float = 0.5,
+                  desc: str = "Extracting landmarks", decoders: int = DECODER_THREADS,
+                  prefetch: int = PREFETCH) -> List[ExtractionResult]:
+    """iter_extract collected into one (features, error) result per path, in input order"""
+    return [result for _, result in iter_extract(paths, workers, min_detection_confidence, desc,
+                                                 decoders, prefetch)]
+
+
+def default_workers() -> int:
+    """CPU cores available to this process"""
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Per-file extraction results keyed on content hash + extraction parameters.
+
+    Stored as a directory of append-only files, so the cached features never
+    have to fit in memory and saving costs only what changed:
+
+        features-<g>.f32   (rows, 63) float32, NaN rows for misses
+        keys-<g>.txt       the cache key of each row, one per line
+        files-<g>.jsonl    [size, mtime, hash, path] of every file hashed, so unchanged
+                           files are not re-read just to be hashed; later lines win
+        manifest.json      parameters, current generation <g> and committed file sizes
+
+    Only the key -> row index and the file stats are kept in memory; features
+    are read back through np.memmap. put() appends, checkpoint() makes the
+    appends durable, and save() writes the kept entries into the next
+    generation of files only when something is dropped. Writes after the last
+    checkpoint are truncated away when the cache is opened.
+    """
+
+    FILES = {"features": "features-{}.f32", "keys": "keys-{}.txt", "files": "files-{}.jsonl"}
+
+    def __init__(self, path: str, params: Dict):
+        self.path = path
+        self.params = params
+        # Short fingerprint of the parameters, appended to every content hash
+        self.params_tag = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        self._rows: Dict[str, int] = {}  # key -> newest row holding its features
+        self._stats: Dict[str, Tuple[int, int, str]] = {}  # path -> (size, mtime_ns, content hash)
+        self._row_count = 0  # rows in the features file, checkpointed or not
+        self._stat_lines = 0  # lines in the files file, including replaced ones
+        self._generation = 0
+        self._handles: Dict[str, BinaryIO] = {}  # append handles, opened on first write
+        self._features: Optional[np.ndarray] = None  # memmap of the rows written so far
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+            self._generation = manifest["generation"]
+            for kind, size in manifest["sizes"].items():
+                with open(self._file(kind), "ab") as f:
+                    f.truncate(size)
+            self._load()
+        else:
+            for kind in self.FILES:
+                open(self._file(kind), "ab").close()
+            self._write_manifest()
+            legacy_path = path.rstrip(os.sep) + ".npz"
+            if os.path.exists(legacy_path):
+                self._import_npz(legacy_path)
+        self._remove_other_generations()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, "manifest.json")
+
+    def _file(self, kind: str, generation: Optional[int] = None) -> str:
+        return os.path.join(self.path, self.FILES[kind].format(self._generation if generation is None else generation))
+
+    def _load(self):
+        with open(self._file("keys"), encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                self._rows[line.rstrip("\n")] = row
+                self._row_count = row + 1
+        if self._row_count * 63 * 4 != os.path.getsize(self._file("features")):
+            raise ValueError(f"Extraction cache {self.path} is inconsistent; delete it to start over")
+        with open(self._file("files"), encoding="utf-8") as f:
+            for line in f:
+                size, mtime, digest, path = json.loads(line)
+                self._stats[path] = (size, mtime, digest)
+                self._stat_lines += 1
+
+    def _import_npz(self, legacy_path: str):
+        """Take over the entries of a single-file cache written by earlier versions"""
+        with np.load(legacy_path) as data:
+            for key, features, found in zip(data["keys"], data["features"], data["found"]):
+                self.put(str(key), features if found else None)
+            for path, size, mtime, digest in zip(data["paths"], data["sizes"], data["mtimes"], data["digests"]):
+                self._add_stat(str(path), (int(size), int(mtime), str(digest)))
+        self.checkpoint()
+        print(f"Imported {len(self)} extraction results from {legacy_path}; it can be deleted")
+
+    def _remove_other_generations(self):
+        """Delete files left behind by a compaction that was interrupted or has finished"""
+        current = {os.path.basename(self._file(kind)) for kind in self.FILES}
+        patterns = [re.compile(re.escape(name).replace(r"\{\}", r"\d+") + "$") for name in self.FILES.values()]
+        for name in os.listdir(self.path):
+            if name not in current and any(pattern.match(name) for pattern in patterns):
+                os.remove(os.path.join(self.path, name))
+
+    def _append(self, kind: str, data: bytes):
+        handle = self._handles.get(kind)
+        if handle is None:
+            handle = self._handles[kind] = open(self._file(kind), "ab")
+        handle.write(data)
+
+    def _add_stat(self, path: str, stat: Tuple[int, int, str]):
+        self._stats[path] = stat
+        self._append("files", (json.dumps([*stat, path]) + "\n").encode("utf-8"))
+        self._stat_lines += 1
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def key(self, path: str) -> str:
+        """Cache key of a file as it is now; only re-hashes files whose size or mtime changed"""
+        stat = os.stat(path)
+        known = self._stats.get(path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            digest = known[2]
+        else:
+            digest = file_digest(path)
+            self._add_stat(path, (stat.st_size, stat.st_mtime_ns, digest))
+        return f"{digest}-{self.params_tag}"
+
+    def get(self, key: str) -> Tuple[bool, Optional[np.ndarray]]:
+        """(cached?, features or None for a cached miss)"""
+        row = self._rows.get(key)
+        if row is None:
+            return False, None
+        if self._features is None or row >= len(self._features):
+            self._map_features()
+        features = np.array(self._features[row])
+        return True, None if np.isnan(features[0]) else features
+
+    def put(self, key: str, features: Optional[np.ndarray]):
+        """Append one result; it is durable after the next checkpoint() or save()"""
+        if features is None:
+            row = np.full(63, np.nan, dtype="<f4")
+        else:
+            row = np.asarray(features, dtype="<f4").reshape(63)
+        self._append("features", row.tobytes())
+        self._append("keys", (key + "\n").encode("utf-8"))
+        self._rows[key] = self._row_count
+        self._row_count += 1
+
+    def _map_features(self):
+        handle = self._handles.get("features")
+        if handle is not None:
+            handle.flush()
+        self._features = np.memmap(self._file("features"), dtype="<f4", mode="r", shape=(self._row_count, 63))
+
+    def checkpoint(self):
+        """Make everything put so far durable; nothing already on disk is rewritten"""
+        for handle in self._handles.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._write_manifest()
+
+    def _write_manifest(self):
+        sizes = {kind: os.path.getsize(self._file(kind)) for kind in self.FILES}
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"params": self.params, "generation": self._generation, "sizes": sizes}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path())
+
+    def clear(self):
+        """Forget every result (file hashes are kept), so all files are extracted again"""
+        self._compact([], list(self._stats))
+
+    def save(self, keep_keys, keep_paths) -> int:
+        """Keep only the given keys and paths and make the cache durable; returns how many entries were dropped"""
+        keep_keys = [key for key in dict.fromkeys(keep_keys) if key in self._rows]
+        keep_paths = [path for path in dict.fromkeys(keep_paths) if path in self._stats]
+        dropped = len(self._rows) - len(keep_keys)
+        if len(keep_keys) == self._row_count and len(keep_paths) == self._stat_lines:
+            # Every row and stats line on disk is still wanted
+            self.checkpoint()
+        else:
+            self._compact(keep_keys, keep_paths)
+        return dropped
+
+    def _compact(self, keep_keys: List[str], keep_paths: List[str]):
+        """Write the kept entries as the next generation of files, CACHE_COMPACT_ROWS rows at a time"""
+        # Copy rows in file order, so the old features are read sequentially
+        keep_keys = sorted(keep_keys, key=self._rows.__getitem__)
+        rows = np.fromiter((self._rows[key] for key in keep_keys), dtype=np.int64, count=len(keep_keys))
+        if len(rows):
+            self._map_features()
+        generation = self._generation + 1
+        with open(self._file("features", generation), "wb") as features_out, \
+                open(self._file("keys", generation), "wb") as keys_out, \
+                open(self._file("files", generation), "wb") as files_out:
+            for start in range(0, len(rows), CACHE_COMPACT_ROWS):
+                features_out.write(np.asarray(self._features[rows[start:start + CACHE_COMPACT_ROWS]]).tobytes())
+                keys_out.write("".join(key + "\n" for key in keep_keys[start:start + CACHE_COMPACT_ROWS])
+                               .encode("utf-8"))
+            for path in keep_paths:
+                files_out.write((json.dumps([*self._stats[path], path]) + "\n").encode("utf-8"))
+            for out in (features_out, keys_out, files_out):
+                out.flush()
+                os.fsync(out.fileno())
+
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        self._features = None  # release the old file before it is deleted
+        self._generation = generation
+        self._write_manifest()
+        self._remove_other_generations()
+        self._rows = {key: row for row, key in enumerate(keep_keys)}
+        self._stats = {path: self._stats[path] for path in keep_paths}
+        self._row_count = len(keep_keys)
+        self._stat_lines = len(keep_paths)
+
+
+def extraction_params(min_detection_confidence: float = 0.5) -> Dict:
+    """Everything that changes extract_file's output, for ExtractionCache keys"""
+    return {
+        "min_detection_confidence": float(min_detection_confidence),
+        "static_image_mode": True,
+        "max_num_hands": 1,
+        "mediapipe": getattr(mp, "__version__", "unknown"),
+    }
+
+
+def cache_keys(paths: Sequence[str], cache: ExtractionCache) -> List[Optional[str]]:
+    """ExtractionCache.key of every path, None for files that cannot be read"""
+    keys = []
+    for path in paths:
+        try:
+            keys.append(cache.key(str(path)))
+        except OSError:
+            keys.append(None)
+    return keys
+
+
+def iter_extract_cached(paths: Sequence[str], keys: Sequence[Optional[str]], cache: ExtractionCache,
+                        counts: Dict[str, int], workers: int = 1, decoders: int = DECODER_THREADS,
+                        prefetch: int = PREFETCH) -> Iterator[Tuple[int, ExtractionResult]]:
+    """
+    iter_extract with the cache's parameters, running MediaPipe only on files it has no result for.
+    New results are added to the cache (not saved); cached/extracted/misses are added up in counts.
+    """
+    paths = [str(path) for path in paths]
+    todo = [i for i, key in enumerate(keys) if key is not None and key not in cache]
+    extracted = iter_extract([paths[i] for i in todo], workers=workers,
+                             min_detection_confidence=cache.params["min_detection_confidence"],
+                             decoders=decoders, prefetch=prefetch) if todo else iter(())
+    todo_set = set(todo)
+
+    for i, key in enumerate(keys):
+        if key is None:
+            result = (None, UNREADABLE)
+        elif i in todo_set:
+            _, result = next(extracted)
+            if result[1] is None:
+                cache.put(key, result[0])
+            counts["extracted"] = counts.get("extracted", 0) + 1
+        else:
+            result = (cache.get(key)[1], None)
+            counts["cached"] = counts.get("cached", 0) + 1
+        if result[0] is None and result[1] is None:
+            counts["misses"] = counts.get("misses", 0) + 1
+        yield i, result
+
+    # Let iter_extract finish, so it prints its report
+    for _ in extracted:
+        pass
+
+
+def extract_files_cached(paths: Sequence[str], cache: ExtractionCache, workers: int = 1,
+                         decoders: int = DECODER_THREADS,
+                         prefetch: int = PREFETCH) -> Tuple[List[ExtractionResult], Dict[str, int]]:
+    """
+    extract_files with the cache's parameters, running MediaPipe only on files it has no result for.
+    Saves the cache (dropping files no longer in paths) and returns (results, stats).
+    """
+    paths = [str(path) for path in paths]
+    keys = cache_keys(paths, cache)
+    stats = {"files": len(paths), "cached": 0, "extracted": 0, "misses": 0}
+    results = [result for _, result in iter_extract_cached(paths, keys, cache, stats, workers=workers,
+                                                           decoders=decoders, prefetch=prefetch)]
+    stats["dropped"] = cache.save([key for key in keys if key is not None], paths)
+    return results, stats
+
+
+def extract_to_store(paths: Sequence[str], labels: Sequence[str], cache: ExtractionCache, store: FeatureStore,
+                     workers: int = 1, decoders: int = DECODER_THREADS, prefetch: int = PREFETCH,
+                     commit_every: int = COMMIT_EVERY) -> Dict[str, int]:
+    """
+    Append the landmarks of every image with a detected hand to a FeatureStore, in input order.
+
+    Every `commit_every` images the cache is checkpointed and the rows are
+    committed together with the number of images consumed, so an interrupted
+    run picks up where it stopped with every result it extracted still cached.
+    Both only append, so a commit costs the rows since the last one. A store built from a different
+    list of files, file contents or extraction parameters is rebuilt (mostly
+    from the cache). Returns counts of files, cached/extracted results, misses
+    and rows, plus the image the run resumed from and cache entries dropped.
+    """
+    paths = [str(path) for path in paths]
+    keys = cache_keys(paths, cache)
+    inputs = hashlib.sha256()
+    for key, label in zip(keys, labels):
+        inputs.update(f"{key}\t{label}\n".encode())
+    inputs_digest = inputs.hexdigest()
+
+    if store.meta.get("inputs_digest") != inputs_digest:
+        store.reset(meta={"inputs_digest": inputs_digest, "consumed": 0, "params": cache.params})
+    resume_from = int(store.meta["consumed"])
+    stats = {"files": len(paths), "resumed_from": resume_from, "cached": 0, "extracted": 0, "misses": 0}
+
+    if resume_from < len(paths):
+        results = iter_extract_cached(paths[resume_from:], keys[resume_from:], cache, stats,
+                                      workers=workers, decoders=decoders, prefetch=prefetch)
+        for offset, (features, error) in results:
+            i = resume_from + offset
+            if error is not None and error != UNREADABLE:
+                print(f"Error processing {paths[i]}: {error}")
+            if features is not None:
+                store.append(features, labels[i])
+            if (i + 1) % commit_every == 0 or i + 1 == len(paths):
+                cache.checkpoint()
+                store.commit(consumed=i + 1)
+
+    stats["rows"] = store.rows
+    stats["dropped"] = cache.save([key for key in keys if key is not None], paths)
+    return stats
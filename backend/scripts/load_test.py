@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Find how many concurrent camera clients one box can serve in real time.
+- Simulates N clients that each send one /api/sign-language/predict frame per
+  camera tick (--fps, default 30), post the last --attempt-frames frames to
+  /api/attempts about once a second and fetch /api/words now and then, like the
+  practice page does.
+- A client never has more than one /predict in flight: camera ticks that pass
+  while it waits for a reply are dropped, the way the frontend skips frames.
+- Ramps the number of clients through --clients, --duration seconds per step,
+  and reports achieved fps per client, dropped frames, latency percentiles per
+  endpoint and whether the step kept up with the target frame rate.
+- Replays synthetic hand motion, or recorded (frames, 21, 3 or 4) .npy clips
+  given with --streams.
+- Starts a local uvicorn serving main:app (--server-workers processes) unless
+  --url points at one that is already running.
+Usage (from repo root):
+    python backend/scripts/load_test.py
+    python backend/scripts/load_test.py --clients 1 10 25 50 100 --duration 20 --server-workers 4
+    python backend/scripts/load_test.py --url http://127.0.0.1:8000 --streams ./data/sign_clips/*.npy --out load.json
+"""
+import os
+import sys
+
+# Ensure the repository root is on sys.path so "import backend..." works, and the
+# backend directory so the router's own "from schemas..." imports resolve
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+for path in (REPO_ROOT, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from routers.sign_scoring import REFERENCE_ARRAYS
+
+ENDPOINTS = ("predict", "attempts", "words")
+
+
+def synthetic_stream(rng, n_frames=300):
+    """A hand drifting around the "hello" pose, (frames, 21, 4)"""
+    steps = rng.normal(0, 0.004, (n_frames, 1, 3)) + rng.normal(0, 0.002, (n_frames, 21, 3))
+    frames = np.repeat(REFERENCE_ARRAYS["hello"][None], n_frames, axis=0)
+    frames[:, :, :3] += np.cumsum(steps, axis=0)
+    return frames
+
+
+def load_streams(paths, rng, count):
+    if not paths:
+        return [synthetic_stream(rng) for _ in range(count)]
+    streams = []
+    for path in paths:
+        clip = np.load(path)
+        if clip.ndim != 3 or clip.shape[1] != 21 or clip.shape[2] not in (3, 4):
+            raise ValueError(f"{path} has shape {clip.shape}, expected (frames, 21, 3 or 4)")
+        if clip.shape[2] == 3:
+            clip = np.concatenate([clip, np.ones(clip.shape[:2] + (1,))], axis=2)
+        streams.append(clip)
+    return streams
+
+
+def frame_json(frame, visibility):
+    keys = ("x", "y", "z", "v") if visibility else ("x", "y", "z")
+    return {"landmarks": [dict(zip(keys, map(float, point))) for point in frame]}
+
+
+class StepStats:
+    """Everything measured during one ramp step"""
+
+    def __init__(self, clients):
+        self.latencies = defaultdict(list)  # endpoint -> seconds
+        self.errors = defaultdict(int)
+        self.delivered = [0] * clients  # /predict replies per client
+        self.dropped = [0] * clients  # camera ticks skipped per client
+
+
+async def timed_request(http, stats, endpoint, method, path, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await http.request(method, path, **kwargs)
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    stats.latencies[endpoint].append(time.perf_counter() - start)
+    if not ok:
+        stats.errors[endpoint] += 1
+    return ok
+
+
+async def run_client(index, http, stream, stats, deadline, args):
+    """One camera client: a /predict per tick, an attempt per --attempt-frames, words now and then"""
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / args.fps
+    position = random.randrange(len(stream))
+    background = set()
+    buffered = []
+
+    def spawn(coro):
+        task = asyncio.ensure_future(coro)
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+    spawn(timed_request(http, stats, "words", "GET", "/api/words"))
+    next_words = loop.time() + args.words_interval
+    # Spread client start times over one frame interval
+    next_tick = loop.time() + random.random() * interval
+
+    while True:
+        now = loop.time()
+        if now < next_tick:
+            await asyncio.sleep(next_tick - now)
+            now = loop.time()
+        if now >= deadline:
+            break
+        # Ticks that passed while the last reply was outstanding are dropped
+        missed = int((now - next_tick) / interval)
+        if missed:
+            stats.dropped[index] += missed
+            position += missed
+            next_tick += missed * interval
+
+        frame = stream[position % len(stream)]
+        position += 1
+        next_tick += interval
+        body = {"hand_landmarks": frame_json(frame, visibility=False)}
+        if await timed_request(http, stats, "predict", "POST", "/api/sign-language/predict", json=body):
+            stats.delivered[index] += 1
+
+        buffered.append(frame)
+        if len(buffered) >= args.attempt_frames:
+            attempt = {"word": "hello", "frames": [frame_json(f, visibility=True) for f in buffered]}
+            spawn(timed_request(http, stats, "attempts", "POST", "/api/attempts", json=attempt))
+            buffered = []
+        if loop.time() >= next_words:
+            spawn(timed_request(http, stats, "words", "GET", "/api/words"))
+            next_words += args.words_interval
+
+    if background:
+        await asyncio.gather(*background)
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1e3, 2) if samples else None
+
+
+async def run_step(n_clients, streams, args):
+    stats = StepStats(n_clients)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+    clients = [httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) for _ in range(n_clients)]
+    try:
+        deadline = asyncio.get_running_loop().time() + args.duration
+        await asyncio.gather(*(
+            run_client(i, clients[i], streams[i % len(streams)], stats, deadline, args)
+            for i in range(n_clients)
+        ))
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    fps = np.array(stats.delivered) / args.duration
+    ticks = np.array(stats.delivered) + np.array(stats.dropped)
+    predict = stats.latencies["predict"]
+    result = {
+        "clients": n_clients,
+        "target_fps": args.fps,
+        "fps_mean": round(float(fps.mean()), 2),
+        "fps_min": round(float(fps.min()), 2),
+        "dropped_frames": int(sum(stats.dropped)),
+        "drop_rate": round(float(sum(stats.dropped) / max(ticks.sum(), 1)), 4),
+        "errors": dict(stats.errors),
+        "latency_ms": {
+            endpoint: {q: percentile_ms(stats.latencies[endpoint], int(q[1:])) for q in ("p50", "p95", "p99")}
+            for endpoint in ENDPOINTS
+        },
+        "requests": {endpoint: len(stats.latencies[endpoint]) for endpoint in ENDPOINTS},
+    }
+    # Real time: every client nearly at the target rate and /predict answering within a frame
+    result["realtime"] = bool(
+        result["fps_min"] >= args.fps * args.realtime_fraction
+        and predict and np.percentile(predict, 95) <= 1.0 / args.fps
+    )
+    return result
+
+
+def print_step(result):
+    latency = result["latency_ms"]
+    errors = sum(result["errors"].values())
+    print(f"{result['clients']:>5} clients  fps {result['fps_mean']:6.1f} (min {result['fps_min']:5.1f})  "
+          f"dropped {result['drop_rate']:6.1%}  "
+          f"predict p50/p95/p99 {latency['predict']['p50']}/{latency['predict']['p95']}/{latency['predict']['p99']} ms  "
+          f"attempts p95 {latency['attempts']['p95']} ms  words p95 {latency['words']['p95']} ms  "
+          f"errors {errors}  {'real time' if result['realtime'] else 'BEHIND'}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    """uvicorn main:app on a free local port, waiting until /ready answers"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.server_workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{url}/ready", timeout=1.0).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"uvicorn did not become ready within {args.startup_timeout} s")
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+    streams = load_streams(args.streams, rng, max(args.clients))
+
+    server = None
+    if args.url is None:
+        server, args.url = start_server(args)
+        print(f"Started uvicorn main:app with {args.server_workers} worker(s) at {args.url}")
+    try:
+        print(f"Target {args.fps} fps per client, {args.duration} s per step")
+        results = []
+        for n_clients in args.clients:
+            result = asyncio.run(run_step(n_clients, streams, args))
+            results.append(result)
+            print_step(result)
+            if args.stop_when_behind and not result["realtime"]:
+                break
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    keeping_up = [result["clients"] for result in results if result["realtime"]]
+    print(f"Most clients served in real time: {max(keeping_up) if keeping_up else 0}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"url": args.url, "steps": results}, f, indent=2)
+        print(f"Wrote results to {args.out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 5, 10, 25, 50],
+                        help="Concurrent clients per ramp step")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per ramp step")
+    parser.add_argument("--fps", type=float, default=30.0, help="Camera frame rate per client")
+    parser.add_argument("--attempt-frames", dest="attempt_frames", type=int, default=30,
+                        help="Frames per /api/attempts post")
+    parser.add_argument("--words-interval", dest="words_interval", type=float, default=10.0,
+                        help="Seconds between /api/words fetches per client")
+    parser.add_argument("--streams", nargs="+", default=None,
+                        help="Recorded (frames, 21, 3 or 4) .npy clips to replay instead of synthetic motion")
+    parser.add_argument("--url", default=None, help="Server to test; starts a local uvicorn when omitted")
+    parser.add_argument("--server-workers", dest="server_workers", type=int, default=1,
+                        help="uvicorn worker processes for the local server")
+    parser.add_argument("--startup-timeout", dest="startup_timeout", type=float, default=60.0,
+                        help="Seconds to wait for the local server's /ready")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--realtime-fraction", dest="realtime_fraction", type=float, default=0.95,
+                        help="Share of the target fps every client must reach to count as real time")
+    parser.add_argument("--stop-when-behind", dest="stop_when_behind", action="store_true",
+                        help="Stop ramping at the first step that falls behind")
+    parser.add_argument("--out", default=None, help="Write per-step results to this JSON file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    main(args)
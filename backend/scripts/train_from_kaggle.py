@@ -8,6 +8,8 @@ Train the repo's SignLanguageModel from an image dataset (Kaggle ASL Alphabet).
 Usage:
     # from repo root
     python backend/scripts/train_from_kaggle.py --dataset ./data/asl_alphabet_train --max_images_per_class 200
+    # extract on 8 processes (0 = every core)
+    python backend/scripts/train_from_kaggle.py --dataset ./data/asl_alphabet_train --workers 8
 """
 import os
 import sys
@@ -25,75 +27,55 @@ from collections import defaultdict
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
-import cv2
-import mediapipe as mp
-from tqdm import tqdm
 
 from backend.models.sign_language_model import get_model
+from landmark_extraction import DECODER_THREADS, PREFETCH, UNREADABLE, default_workers, iter_extract
 
-mp_hands = mp.solutions.hands
-
-def extract_landmarks_from_image(image_bgr, hands):
-    """
-    Given an OpenCV BGR image and a configured MediaPipe Hands instance,
-    return a flattened 63-d feature vector [x1,y1,z1,...,x21,y21,z21] or None if no hand.
-    Coordinates are the normalized coordinates provided by MediaPipe (0..1 for x,y).
-    """
-    image_rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
-    results = hands.process(image_rgb)
-    if not results.multi_hand_landmarks:
-        return None
-    # Use first detected hand
-    lm = results.multi_hand_landmarks[0].landmark
-    features = []
-    for p in lm:
-        features.extend([p.x, p.y, p.z])
-    return np.array(features, dtype=np.float32)
-
-def walk_dataset_and_extract(dataset_dir, max_images_per_class=None, skip_bad=True):
+def walk_dataset_and_extract(dataset_dir, max_images_per_class=None, skip_bad=True, workers=1,
+                             decoders=DECODER_THREADS, prefetch=PREFETCH):
     """
     Walk dataset_dir where each subfolder is a label. Return X (n,63) and y (n,) arrays and mapping.
+    Images are sharded across `workers` processes, each with its own MediaPipe Hands; the
+    result order does not depend on the worker count.
     """
     dataset_dir = Path(dataset_dir)
-    X_list = []
-    y_list = []
     counts = defaultdict(int)
 
-    # Prepare MediaPipe Hands for static images
-    hands = mp_hands.Hands(static_image_mode=True, max_num_hands=1, min_detection_confidence=0.5)
-
     # Ensure deterministic folder ordering (A..Z) but accept any label names
     classes = sorted([d for d in dataset_dir.iterdir() if d.is_dir()])
 
+    paths, labels = [], []
     for class_dir in classes:
-        label = class_dir.name
         files = sorted(class_dir.glob("*"))
         if max_images_per_class:
             files = files[:max_images_per_class]
-        for fp in tqdm(files, desc=f"Processing {label}", unit="img"):
-            try:
-                img = cv2.imread(str(fp))
-                if img is None:
-                    continue
-                feat = extract_landmarks_from_image(img, hands)
-                if feat is None:
-                    if skip_bad:
-                        continue
-                    else:
-                        feat = np.zeros(63, dtype=np.float32)
-                X_list.append(feat)
-                y_list.append(label)
-                counts[label] += 1
-            except Exception as e:
-                print(f"Error processing {fp}: {e}")
-                continue
-
-    hands.close()
-    if len(X_list) == 0:
+        paths += files
+        labels += [class_dir.name] * len(files)
+
+    # Rows are written straight into one preallocated array instead of stacking a list of them
+    X = np.zeros((len(paths), 63), dtype=np.float32)
+    y = np.empty(len(paths), dtype=object)
+    n = 0
+
+    # MediaPipe Hands for static images, one per worker
+    results = iter_extract(paths, workers=workers, min_detection_confidence=0.5,
+                           decoders=decoders, prefetch=prefetch)
+    for i, (feat, error) in results:
+        if error is not None:
+            if error != UNREADABLE:
+                print(f"Error processing {paths[i]}: {error}")
+            continue
+        if feat is None and skip_bad:
+            continue
+        if feat is not None:
+            X[n] = feat
+        y[n] = labels[i]
+        counts[labels[i]] += 1
+        n += 1
+
+    if n == 0:
         raise RuntimeError("No landmark features extracted. Check dataset path and MediaPipe installation.")
-    X = np.vstack(X_list)
-    y = np.array(y_list, dtype=object)
-    return X, y, counts
+    return X[:n], y[:n], counts
 
 def main(args):
     dataset_dir = args.dataset
@@ -104,7 +86,9 @@ def main(args):
         raise FileNotFoundError(f"Dataset folder not found: {dataset_dir}")
 
     print("Extracting landmarks from dataset (this can take many minutes)...")
-    X, y, counts = walk_dataset_and_extract(dataset_dir, max_images_per_class=max_images, skip_bad=True)
+    X, y, counts = walk_dataset_and_extract(dataset_dir, max_images_per_class=max_images, skip_bad=True,
+                                            workers=args.workers or default_workers(),
+                                            decoders=args.decoders, prefetch=args.prefetch)
     print("Finished extraction.")
     print("Samples per class (extracted):")
     for k, v in sorted(counts.items()):
@@ -154,5 +138,11 @@ if __name__ == "__main__":
     parser.add_argument("--dataset", required=True, help="Path to dataset root (subfolders per-label)")
     parser.add_argument("--max_images_per_class", type=int, default=None, help="Max images to process per class (for faster runs)")
     parser.add_argument("--min_samples_per_class", type=int, default=30, help="Minimum extracted samples per class to include class")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to extract landmarks on, each with its own MediaPipe Hands (0 = every core)")
+    parser.add_argument("--decoders", type=int, default=DECODER_THREADS,
+                        help="Threads per process reading and decoding images ahead of MediaPipe (0 = decode inline)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH,
+                        help="Decoded images the decoder threads may queue up ahead of MediaPipe")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
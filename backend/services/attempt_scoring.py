@@ -0,0 +1,46 @@
+"""
+Vectorized scoring of a practice attempt against a reference pose.
+
+Computes the same score as routers/sign_scoring.compute_score for every frame
+of an attempt at once, on a (frames, 21, 4) array of x, y, z, visibility:
+- each landmark is weighted by min(user visibility, reference visibility),
+- landmarks whose weight is not above VISIBILITY_CUTOFF are ignored,
+- the weighted mean squared error is mapped to 0-100 with 100 * exp(-10 * mse).
+Weighted errors are accumulated landmark by landmark, in the same order as the
+per-frame loop, so scores agree with compute_score to within float rounding.
+"""
+from typing import Tuple
+
+import numpy as np
+
+VISIBILITY_CUTOFF = 0.1
+
+
+def score_attempt(landmarks: np.ndarray, reference: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Score every frame of an attempt against one reference frame.
+
+    landmarks is (frames, 21, 4) and reference is (21, 4). Returns the
+    per-frame scores and the index of the best-scoring frame (the first one
+    on ties). Frames with no sufficiently visible landmark score 0.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+
+    weights = np.minimum(landmarks[:, :, 3], reference[:, 3])
+    weights = np.where(weights > VISIBILITY_CUTOFF, weights, 0.0)
+
+    diff = landmarks[:, :, :3] - reference[:, :3]
+    errors = diff[:, :, 0] ** 2 + diff[:, :, 1] ** 2 + diff[:, :, 2] ** 2
+
+    # Landmark-major layout: reducing over axis 0 adds one landmark at a time
+    weighted_errors = np.ascontiguousarray((errors * weights).T).sum(axis=0)
+    total_weight = np.ascontiguousarray(weights.T).sum(axis=0)
+
+    scores = np.zeros(len(landmarks))
+    visible = total_weight > 0.0
+    mse = weighted_errors[visible] / total_weight[visible]
+    scores[visible] = np.clip(100 * np.exp(-10 * mse), 0.0, 100.0)
+
+    best_index = int(np.argmax(scores)) if len(scores) else 0
+    return scores, best_index
@@ -0,0 +1,130 @@
+"""
+Where CPU-bound inference and scoring run relative to the asyncio event loop.
+
+sklearn and NumPy calls made directly inside an async endpoint stall every
+other connection on the uvicorn worker (including /health) until they return.
+The executor moves them onto a thread or process pool and bounds how many
+are in flight, so the event loop stays responsive while the model is busy.
+
+Configured through environment variables:
+    INFERENCE_EXECUTOR          "inline" (default), "thread" or "process"
+    INFERENCE_WORKERS           pool size for thread/process modes (default: CPU count)
+    INFERENCE_MAX_CONCURRENCY   jobs in flight at once (default: INFERENCE_WORKERS);
+                                further requests wait on the loop without blocking it
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from services.metrics import stage
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _init_process_worker():
+    """Load and warm the model once per worker process, before the first task arrives"""
+    from models.sign_language_model import warmup_model
+    warmup_model()
+
+
+class InferenceExecutor:
+    """Runs CPU-bound callables inline, on a thread pool or on a process pool"""
+
+    def __init__(self, mode: str = "inline", workers: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}'. Expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="inference"
+                )
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_process_worker
+                )
+        return self._pool
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) according to the configured mode and return its result.
+
+        In process mode fn must be a module-level function and args must be
+        picklable; the worker process uses its own model instance. Thread
+        workers run fn in a copy of the caller's context, so stages it times
+        are reported on the calling request.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            if self.mode == "inline":
+                return fn(*args)
+            loop = asyncio.get_running_loop()
+            if self.mode == "thread":
+                call = functools.partial(contextvars.copy_context().run, fn, *args)
+                return await loop.run_in_executor(self._get_pool(), call)
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+
+    async def run_model(self, model, features):
+        """
+        Class probabilities for a feature matrix from a specific model snapshot.
+
+        Inline and thread modes call the snapshot directly, so a request that
+        started before a hot reload finishes on the model it started with.
+        Process workers get the snapshot's version and load it if needed.
+        """
+        from models.sign_language_model import predict_proba_features
+        with stage("inference"):
+            if self.mode == "process":
+                return await self.run(predict_proba_features, features, model.version)
+            return await self.run(model.predict_proba_features, features)
+
+    async def warmup(self):
+        """
+        Start every pool worker ahead of traffic.
+
+        Process workers load and warm their own model in the initializer;
+        thread workers share the already-warm model in this process.
+        """
+        if self.mode == "inline":
+            return
+        from models.sign_language_model import warmup_model
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        await asyncio.gather(*[
+            loop.run_in_executor(pool, warmup_model) for _ in range(self.workers)
+        ])
+
+    def shutdown(self):
+        """Stop the pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global executor instance
+_executor_instance: Optional[InferenceExecutor] = None
+
+def get_executor() -> InferenceExecutor:
+    """Get or create executor instance configured from the environment (singleton)"""
+    global _executor_instance
+    if _executor_instance is None:
+        workers = os.getenv("INFERENCE_WORKERS")
+        max_concurrency = os.getenv("INFERENCE_MAX_CONCURRENCY")
+        _executor_instance = InferenceExecutor(
+            mode=os.getenv("INFERENCE_EXECUTOR", "inline").lower(),
+            workers=int(workers) if workers else None,
+            max_concurrency=int(max_concurrency) if max_concurrency else None,
+        )
+    return _executor_instance
@@ -1,16 +1,196 @@
 """
 Firebase Authentication service for verifying ID tokens.
+
+Tokens are verified off the event loop against signing keys kept fresh
+in the background (see services/token_verifier.py), and verified tokens
+are kept in a TokenCache until shortly before they expire.
+A client sends the same ID token, valid for up to an hour, with every
+frame, so each token pays for one RSA signature check instead of one
+per request.
+
+Configured through environment variables:
+    TOKEN_CACHE_SIZE           verified tokens kept; 0 disables the cache (default 10000)
+    TOKEN_CACHE_SKEW_SECONDS   stop serving a cached token this long before its exp claim (default 30)
+    FIREBASE_CHECK_REVOKED     "1"/"true" also checks every token against Firebase for revocation
+                               and disabled users. That needs a network call per request, so
+                               the cache is bypassed and cleared while it is on (default off)
 """
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 import firebase_admin
 from firebase_admin import credentials, auth
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import json
+from services.token_verifier import GOOGLE_CERTS_URL, FirebaseTokenVerifier
 
 # Global variable to track if Firebase is initialized
 _firebase_app: Optional[firebase_admin.App] = None
 
 
+class TokenCache:
+    """Bounded LRU cache of decoded ID tokens, keyed by a hash of the raw token"""
+
+    def __init__(self, max_entries: int = 10000, skew_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.skew_seconds = skew_seconds
+        # sha256(token) -> (expires_at in epoch seconds, decoded token)
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(id_token: str) -> bytes:
+        # The raw token is a bearer credential; only its hash is kept in memory
+        return hashlib.sha256(id_token.encode()).digest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, id_token: str) -> Optional[Dict]:
+        key = self.key(id_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, decoded_token = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Callers get their own copy, so one request cannot change another's claims
+        return dict(decoded_token)
+
+    def put(self, id_token: str, decoded_token: Dict):
+        exp = decoded_token.get("exp")
+        if exp is None:
+            return
+        expires_at = float(exp) - self.skew_seconds
+        if expires_at <= time.time():
+            return
+        key = self.key(id_token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(decoded_token))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_uid(self, uid: str) -> int:
+        """Drop every cached token of one user (e.g. after revoking their sessions); returns how many"""
+        with self._lock:
+            keys = [key for key, (_, decoded) in self._entries.items() if decoded.get("uid") == uid]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit rate and occupancy since startup"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "max_entries": self.max_entries,
+            "skew_seconds": self.skew_seconds,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def render(self) -> List[str]:
+        """Prometheus lines for /metrics"""
+        name = "firebase_token_cache_events_total"
+        lines = [f"# HELP {name} Verified ID token cache lookups and removals", f"# TYPE {name} counter"]
+        for event in ("hits", "misses", "evictions", "expirations", "invalidations"):
+            lines.append(f'{name}{{event="{event}"}} {getattr(self, event)}')
+        lines += [
+            "# HELP firebase_token_cache_entries Verified ID tokens currently cached",
+            "# TYPE firebase_token_cache_entries gauge",
+            f"firebase_token_cache_entries {len(self._entries)}",
+        ]
+        return lines
+
+
+def check_revoked() -> bool:
+    """Whether tokens are checked for revocation (FIREBASE_CHECK_REVOKED)"""
+    return os.getenv("FIREBASE_CHECK_REVOKED", "").lower() in ("1", "true", "yes")
+
+
+# Global token cache (None when disabled)
+_token_cache: Optional[TokenCache] = None
+_token_cache_configured = False
+
+def get_token_cache() -> Optional[TokenCache]:
+    """Get the configured token cache, or None if TOKEN_CACHE_SIZE is 0"""
+    global _token_cache, _token_cache_configured
+    if not _token_cache_configured:
+        max_entries = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+        if max_entries > 0:
+            _token_cache = TokenCache(
+                max_entries=max_entries,
+                skew_seconds=float(os.getenv("TOKEN_CACHE_SKEW_SECONDS", 30)),
+            )
+            from services.metrics import get_metrics
+            get_metrics().register(_token_cache)
+        _token_cache_configured = True
+    return _token_cache
+
+
+def _project_id() -> Optional[str]:
+    project_id = os.getenv("FIREBASE_PROJECT_ID")
+    if not project_id and _firebase_app is not None:
+        try:
+            project_id = _firebase_app.project_id
+        except Exception:
+            project_id = None
+    return project_id or os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GCLOUD_PROJECT")
+
+
+# Global token verifier (None when verification falls back to firebase_admin)
+_token_verifier: Optional[FirebaseTokenVerifier] = None
+_token_verifier_configured = False
+
+def get_token_verifier() -> Optional[FirebaseTokenVerifier]:
+    """
+    Get the FirebaseTokenVerifier, or None when tokens are verified by
+    firebase_admin instead: no project ID is known, or the Auth emulator
+    (FIREBASE_AUTH_EMULATOR_HOST, unsigned tokens) is in use.
+    """
+    global _token_verifier, _token_verifier_configured
+    if not _token_verifier_configured:
+        project_id = _project_id()
+        if project_id and not os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+            _token_verifier = FirebaseTokenVerifier(
+                project_id=project_id,
+                certs_url=os.getenv("FIREBASE_CERTS_URL", GOOGLE_CERTS_URL),
+                pinned_path=os.getenv("FIREBASE_PINNED_CERTS") or None,
+                refresh_margin_seconds=float(os.getenv("FIREBASE_KEY_REFRESH_MARGIN_SECONDS", 600)),
+                clock_skew_seconds=float(os.getenv("FIREBASE_CLOCK_SKEW_SECONDS", 10)),
+            )
+        _token_verifier_configured = True
+    return _token_verifier
+
+
 def initialize_firebase() -> Optional[firebase_admin.App]:
     """
     Initialize Firebase Admin SDK.
@@ -67,39 +247,98 @@ def initialize_firebase() -> Optional[firebase_admin.App]:
         return None
 
 
-def verify_id_token(id_token: str) -> Optional[Dict]:
-    """
-    Verify a Firebase ID token and return the decoded token.
-    
-    Args:
-        id_token: The Firebase ID token to verify
-        
-    Returns:
-        Decoded token dict with user information (uid, email, etc.) or None if invalid
-    """
-    # Ensure Firebase is initialized
-    if _firebase_app is None:
-        initialize_firebase()
-    
-    if _firebase_app is None:
-        print("⚠️  Firebase not initialized, cannot verify token")
+def _usable_token_cache(revocation: bool) -> Optional[TokenCache]:
+    """The token cache, unless it is disabled or revocation checks are on"""
+    cache = get_token_cache()
+    if cache is not None and revocation:
+        # A cached token could have been revoked since it was verified
+        if len(cache):
+            cache.clear()
         return None
+    return cache
+
+
+def _verify_uncached(id_token: str, cache: Optional[TokenCache], revocation: bool) -> Optional[Dict]:
+    """Check the token's signature and claims (may block on a key fetch) and cache the result"""
+    verifier = None if revocation else get_token_verifier()
+    if verifier is None:
+        # Ensure Firebase is initialized
+        if _firebase_app is None:
+            initialize_firebase()
+        
+        if _firebase_app is None:
+            print("⚠️  Firebase not initialized, cannot verify token")
+            return None
     
     try:
         # Verify the ID token
-        decoded_token = auth.verify_id_token(id_token)
+        if verifier is not None:
+            decoded_token = verifier.verify(id_token)
+        else:
+            decoded_token = auth.verify_id_token(id_token, check_revoked=revocation)
+        if cache is not None:
+            cache.put(id_token, decoded_token)
         return decoded_token
-    except auth.InvalidIdTokenError:
-        print("❌ Invalid ID token")
+    except auth.RevokedIdTokenError:
+        print("❌ Revoked ID token")
+        return None
+    except auth.UserDisabledError:
+        print("❌ ID token of a disabled user")
         return None
     except auth.ExpiredIdTokenError:
+        # Checked before InvalidIdTokenError, its base class
         print("❌ Expired ID token")
         return None
+    except auth.InvalidIdTokenError:
+        print("❌ Invalid ID token")
+        return None
     except Exception as e:
         print(f"❌ Error verifying ID token: {e}")
         return None
 
 
+def verify_id_token(id_token: str) -> Optional[Dict]:
+    """
+    Verify a Firebase ID token and return the decoded token.
+    
+    Tokens that verified before are answered from the TokenCache until
+    TOKEN_CACHE_SKEW_SECONDS before their exp claim. Others are checked by
+    the FirebaseTokenVerifier when a project ID is known, else by
+    firebase_admin. With FIREBASE_CHECK_REVOKED on, every call checks with
+    Firebase instead. This can block on network I/O; async code should use
+    verify_id_token_async.
+    
+    Args:
+        id_token: The Firebase ID token to verify
+        
+    Returns:
+        Decoded token dict with user information (uid, email, etc.) or None if invalid
+    """
+    revocation = check_revoked()
+    cache = _usable_token_cache(revocation)
+    if cache is not None:
+        decoded_token = cache.get(id_token)
+        if decoded_token is not None:
+            return decoded_token
+    return _verify_uncached(id_token, cache, revocation)
+
+
+async def verify_id_token_async(id_token: str) -> Optional[Dict]:
+    """
+    verify_id_token for async code: cache hits are answered on the event
+    loop, and signature checks, key fetches and revocation lookups run on
+    the default thread pool, so they never stall other connections.
+    """
+    revocation = check_revoked()
+    cache = _usable_token_cache(revocation)
+    if cache is not None:
+        decoded_token = cache.get(id_token)
+        if decoded_token is not None:
+            return decoded_token
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _verify_uncached, id_token, cache, revocation)
+
+
 def get_user_by_uid(uid: str) -> Optional[Dict]:
     """
     Get user information from Firebase by UID.
@@ -0,0 +1,123 @@
+"""
+Cross-request micro-batching for sign language inference.
+
+Concurrent /predict calls each submit one frame; the scheduler holds them
+for at most max_wait_ms and then runs the whole group through a single
+SignLanguageModel.predict_proba_features call on the InferenceExecutor. A group
+is flushed early as soon as max_batch_size frames are waiting.
+
+Frames are grouped per model instance. During a hot reload, requests that
+took their snapshot of the old model are batched among themselves and
+finish on it; they are never run through the new one.
+
+Configured through environment variables:
+    INFERENCE_BATCHING             "1"/"true" to enable (disabled by default)
+    INFERENCE_BATCH_MAX_SIZE       frames per model call (default 32)
+    INFERENCE_BATCH_MAX_WAIT_MS    longest a frame waits for company (default 2)
+"""
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, Optional
+
+import numpy as np
+
+from services.executor import get_executor
+
+
+class InferenceScheduler:
+    """Coalesces concurrent single-frame predictions into batched model calls"""
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        # Waiting (features, future) pairs and their flush timer, per model instance
+        self._pending: Dict[object, list] = {}
+        self._timers: Dict[object, asyncio.TimerHandle] = {}
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks = set()
+        self.batch_sizes = Counter()
+
+    async def predict(self, model, features):
+        """Queue one (1, 63) feature row for model and wait for its class probability vector"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(model, [])
+        pending.append((features, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._timers:
+            self._timers[model] = loop.call_later(self.max_wait_ms / 1000.0, self._flush, model)
+
+        return await future
+
+    def _flush(self, model):
+        """Hand the oldest frames waiting for model to it as one batch"""
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+
+        # Dropping the entry once it drains lets a replaced model be freed
+        pending = self._pending.pop(model, [])
+        batch = pending[:self.max_batch_size]
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(model, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        # Frames that did not fit start a new waiting window
+        if len(pending) > self.max_batch_size:
+            self._pending[model] = pending[self.max_batch_size:]
+            self._timers[model] = asyncio.get_running_loop().call_later(
+                self.max_wait_ms / 1000.0, self._flush, model
+            )
+
+    async def _run_batch(self, model, batch):
+        self.batch_sizes[len(batch)] += 1
+        try:
+            features = np.vstack([row for row, _ in batch])
+            results = await get_executor().run_model(model, features)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled (e.g. client disconnected)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        """Batch-size histogram and totals since startup"""
+        batches = sum(self.batch_sizes.values())
+        frames = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": batches,
+            "frames": frames,
+            "mean_batch_size": frames / batches if batches else 0.0,
+            "batch_size_histogram": {
+                str(size): count for size, count in sorted(self.batch_sizes.items())
+            },
+        }
+
+
+# Global scheduler instance (None when batching is disabled)
+_scheduler_instance: Optional[InferenceScheduler] = None
+_scheduler_configured = False
+
+def get_scheduler() -> Optional[InferenceScheduler]:
+    """Get the configured scheduler, or None if INFERENCE_BATCHING is off"""
+    global _scheduler_instance, _scheduler_configured
+    if not _scheduler_configured:
+        if os.getenv("INFERENCE_BATCHING", "").lower() in ("1", "true", "yes"):
+            _scheduler_instance = InferenceScheduler(
+                max_batch_size=int(os.getenv("INFERENCE_BATCH_MAX_SIZE", 32)),
+                max_wait_ms=float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", 2.0)),
+            )
+        _scheduler_configured = True
+    return _scheduler_instance
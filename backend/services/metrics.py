@@ -0,0 +1,325 @@
+"""
+Prometheus metrics and per-request stage timings.
+
+Each HTTP request gets a RequestTimings record in a context variable.
+Code on the request path times its stages with stage(name). Each
+measurement goes into the request_stage_duration_seconds histogram and
+into the request's own record. Measurements taken outside a request, such
+as model warmup at startup, are dropped. MetricsMiddleware counts requests per
+endpoint, status and model version. When asked, it returns the request's
+stages in a Server-Timing header so the frontend can line client-side
+jank up with server stages.
+
+Stages:
+    validation        body parsing and pydantic validation (TimedRoute, minus firebase_verify)
+    preprocess        landmarks -> feature matrix (SignLanguageModel.preprocess_*)
+    scaler            StandardScaler.transform; only on the sklearn fallback path, since
+                      the compiled forest folds the scaler into its thresholds
+    forest            forest evaluation
+    inference         waiting for the InferenceExecutor to run the model, pool hand-off included
+    score             attempt scoring (vectorized compute_score or DTW) on the executor
+    firebase_verify   Firebase ID token verification
+    serialization     response model validation and JSON rendering (TimedRoute)
+
+The metrics are kept per process. With several uvicorn workers each one
+serves its own /metrics, so scrape every worker. In process executor mode
+the scaler and forest stages run in the pool's processes and are not
+reported; inference still covers them. With INFERENCE_BATCHING a batched
+forest call shows up in the Server-Timing of the request that opened the batch.
+
+Configured through environment variables:
+    SERVER_TIMING   "1"/"true" adds Server-Timing to every response; otherwise only
+                    requests that send "X-Server-Timing: 1" get it (default off)
+"""
+import asyncio
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+# Upper bounds in seconds, from 50 us (a cached /predict) to 2.5 s
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5)
+
+SERVER_TIMING_HEADER = b"x-server-timing"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus exposition format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket"
+                             f"{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total!r}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Metrics:
+    """The server's metrics, rendered together for /metrics"""
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "request_stage_duration_seconds", "Time spent in one stage of handling a request",
+            ("stage",),
+        )
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "Time from receiving a request to sending its response",
+            ("endpoint", "method"),
+        )
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by endpoint, status and serving model version",
+            ("endpoint", "method", "status", "model_version"),
+        )
+        self._collectors = [self.stage_seconds, self.request_seconds, self.requests]
+
+    def register(self, collector):
+        """Expose another Counter or Histogram on /metrics"""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        for collector in self._collectors:
+            lines.extend(collector.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Stage durations and labels collected while one request is handled"""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.endpoint: Optional[str] = None
+        self.model_version: Optional[str] = None
+        self.handler_start: Optional[float] = None
+        self.endpoint_start: Optional[float] = None
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Server-Timing header value; durations in milliseconds"""
+        entries = [f"{name};dur={seconds * 1e3:.3f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={total_seconds * 1e3:.3f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """The RequestTimings of the request being handled, if any"""
+    return _current.get()
+
+
+def record_stage(name: str, seconds: float):
+    """Record one stage duration in the histogram and in the current request, if there is one"""
+    timings = _current.get()
+    if timings is None:
+        return
+    get_metrics().stage_seconds.observe(seconds, name)
+    timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as one stage of the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def note_model_version(version: Optional[str]):
+    """Label the current request's counters with the model version that served it"""
+    timings = _current.get()
+    if timings is not None:
+        timings.model_version = version
+
+
+def _timed_endpoint(endpoint):
+    """Wrap a path operation to mark when the endpoint itself starts and returns"""
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.endpoint_start = time.perf_counter()
+        result = await endpoint(*args, **kwargs)
+        if timings is not None:
+            timings.endpoint_end = time.perf_counter()
+        return result
+
+    timed.__timed_endpoint__ = True
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that reports validation and serialization time.
+
+    Pass it as an APIRouter's route_class. Time from the route receiving the
+    request to the endpoint being called (body parsing, dependencies,
+    pydantic validation) is the validation stage, minus any firebase_verify
+    done by dependencies. Time from the endpoint returning to the response
+    being ready (response_model validation, JSON rendering) is serialization.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router() rebuilds routes from already-wrapped endpoints
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "__timed_endpoint__", False):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is None:
+                return await handler(request)
+            timings.endpoint = path
+            timings.handler_start = time.perf_counter()
+            try:
+                response = await handler(request)
+            except RequestValidationError:
+                # Rejected requests spend all their time in validation
+                timings.endpoint_start = time.perf_counter()
+                raise
+            finally:
+                if timings.endpoint_start is not None:
+                    verify = timings.stages.get("firebase_verify", 0.0)
+                    record_stage("validation", max(timings.endpoint_start - timings.handler_start - verify, 0.0))
+            if timings.endpoint_end is not None:
+                record_stage("serialization", time.perf_counter() - timings.endpoint_end)
+            return response
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and adding Server-Timing when asked"""
+
+    def __init__(self, app, always_server_timing: Optional[bool] = None):
+        self.app = app
+        if always_server_timing is None:
+            always_server_timing = os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+        self.always_server_timing = always_server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        wants_timing = self.always_server_timing or any(
+            name == SERVER_TIMING_HEADER and value not in (b"0", b"false")
+            for name, value in scope.get("headers", ())
+        )
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if wants_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter() - start))
+                    headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            metrics = get_metrics()
+            endpoint = timings.endpoint or "unmatched"
+            method = scope.get("method", "")
+            metrics.request_seconds.observe(time.perf_counter() - start, endpoint, method)
+            metrics.requests.inc(endpoint, method, str(status), timings.model_version or "none")
+
+
+# Global metrics instance
+_metrics_instance: Optional[Metrics] = None
+
+def get_metrics() -> Metrics:
+    """Get or create the process's metrics (singleton)"""
+    global _metrics_instance
+    if _metrics_instance is None:
+        _metrics_instance = Metrics()
+    return _metrics_instance
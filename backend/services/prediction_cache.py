@@ -0,0 +1,117 @@
+"""
+Prediction cache keyed on quantized hand landmarks.
+
+While a learner holds a pose, consecutive frames differ by a fraction of a
+pixel. Rounding every coordinate to a grid maps those frames to the same key,
+so only the first one pays for a forest evaluation. Entries are bounded by an
+LRU size limit and a TTL, and keys include the model version so a hot reload
+never serves stale results.
+
+Configured through environment variables:
+    PREDICTION_CACHE_SIZE          max entries; 0 disables the cache (default 0)
+    PREDICTION_CACHE_GRID          quantization step in normalized image units (default 0.005)
+    PREDICTION_CACHE_TTL_SECONDS   how long an entry may be served (default 2)
+"""
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class PredictionCache:
+    """Bounded LRU/TTL cache of class probability vectors"""
+
+    def __init__(self, max_entries: int = 4096, grid: float = 0.005, ttl_seconds: float = 2.0):
+        self.max_entries = max_entries
+        self.grid = grid
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, probabilities, approximate size in bytes)
+        self._entries: "OrderedDict[Tuple, Tuple[float, np.ndarray, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, features: np.ndarray, version: Optional[str]) -> Tuple:
+        """Cache key for a (1, 63) feature row under a given model version"""
+        quantized = np.round(np.asarray(features) / self.grid).astype(np.int32)
+        return (version, quantized.tobytes())
+
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: Tuple, result: np.ndarray):
+        if key in self._entries:
+            self._remove(key)
+        # Own the data: a row of a batched result would otherwise keep the whole batch alive
+        result = np.array(result, dtype=np.float64)
+        size = self._entry_size(key, result)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    @staticmethod
+    def _entry_size(key: Tuple, result: np.ndarray) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(result)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit rate, occupancy and approximate memory since startup"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "max_entries": self.max_entries,
+            "grid": self.grid,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "approx_bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Global cache instance (None when the cache is disabled)
+_cache_instance: Optional[PredictionCache] = None
+_cache_configured = False
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """Get the configured cache, or None if PREDICTION_CACHE_SIZE is 0"""
+    global _cache_instance, _cache_configured
+    if not _cache_configured:
+        max_entries = int(os.getenv("PREDICTION_CACHE_SIZE", 0))
+        if max_entries > 0:
+            _cache_instance = PredictionCache(
+                max_entries=max_entries,
+                grid=float(os.getenv("PREDICTION_CACHE_GRID", 0.005)),
+                ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 2.0)),
+            )
+        _cache_configured = True
+    return _cache_instance
@@ -0,0 +1,309 @@
+"""
+Opt-in sampling profiler for live requests.
+
+A p99 spike in production rarely reproduces locally. With PROFILE_DIR set,
+ProfilingMiddleware profiles a random PROFILE_SAMPLE_RATE share of requests,
+plus any request whose X-Profile header matches ADMIN_TOKEN. While a profiled
+request runs, a background thread samples the event loop thread's Python
+stack every PROFILE_INTERVAL_MS from sys._current_frames(). Nothing is
+installed in the request path, so the profiled code runs unmodified. When the
+request finishes, a worker thread writes the samples to PROFILE_DIR as a
+speedscope JSON file (https://www.speedscope.app) or as collapsed stacks
+(flamegraph.pl, inferno). The request does not wait for the write, and a
+failed write is only logged. The file name carries the time, method, route
+and latency.
+
+Samples show whatever the event loop was running, which under load includes
+other requests interleaved with the profiled one. Work handed to thread or
+process executor workers appears as the loop waiting.
+
+Without PROFILE_DIR the middleware is not installed at all.
+
+Configured through environment variables:
+    PROFILE_DIR              where profiles are written; unset disables profiling (default)
+    PROFILE_SAMPLE_RATE      share of requests profiled at random, 0-1 (default 0: header only)
+    PROFILE_MIN_LATENCY_MS   keep randomly sampled profiles only for requests at least this slow (default 0)
+    PROFILE_INTERVAL_MS      time between stack samples (default 2)
+    PROFILE_FORMAT           "speedscope" (default) or "collapsed"
+    PROFILE_KEEP             newest profiles kept in PROFILE_DIR (default 200)
+"""
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from services.metrics import current_timings
+
+PROFILE_FORMATS = ("speedscope", "collapsed")
+PROFILE_HEADER = b"x-profile"
+MAX_STACK_DEPTH = 256
+
+# <UTC time>_<method>_<route with "/" as "+">_<latency>ms_<id>.<extension>
+_NAME_PATTERN = re.compile(
+    r"^(?P<created>\d{8}T\d{6}\.\d{3}Z)_(?P<method>[A-Z]+)_(?P<route>[\w.+-]*)_"
+    r"(?P<latency_ms>\d+(?:\.\d+)?)ms_(?P<id>[0-9a-f]+)\.(?P<format>speedscope\.json|collapsed\.txt)$"
+)
+
+
+class ProfileSession:
+    """Stack samples taken from one thread while one request runs"""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        # Stacks are tuples of code objects, root first; values are sampled seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def add(self, frame, now: float):
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += now - self._last
+        self.samples += 1
+        self._last = now
+
+
+class StackSampler:
+    """One background thread sampling the threads of every active session"""
+
+    def __init__(self, interval_seconds: float = 0.002):
+        self.interval_seconds = interval_seconds
+        self._sessions: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: int) -> ProfileSession:
+        session = ProfileSession(thread_id)
+        with self._lock:
+            self._sessions.append(session)
+            # The thread exits once no session is left, so start one on demand
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop(self, session: ProfileSession):
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_seconds)
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for session in sessions:
+                frame = frames.get(session.thread_id)
+                if frame is not None:
+                    session.add(frame, now)
+            del frames
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def to_collapsed(session: ProfileSession) -> str:
+    """Brendan Gregg's collapsed format: "root;...;leaf <microseconds>" per stack"""
+    lines = []
+    for stack, seconds in session.stacks.most_common():
+        weight = max(int(round(seconds * 1e6)), 1)
+        lines.append(";".join(_frame_name(code).replace(";", ":") for code in stack) + f" {weight}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(session: ProfileSession, name: str, latency_ms: float) -> Dict:
+    """speedscope's sampled-profile file format, weights in milliseconds"""
+    frame_index: Dict = {}
+    frames = []
+    samples = []
+    weights = []
+    for stack, seconds in session.stacks.items():
+        indices = []
+        for code in stack:
+            index = frame_index.get(code)
+            if index is None:
+                index = frame_index[code] = len(frames)
+                frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+            indices.append(index)
+        samples.append(indices)
+        weights.append(round(seconds * 1e3, 4))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "backend/services/profiler.py",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(latency_ms, 4),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles to disk"""
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, min_latency_ms: float = 0.0,
+                 interval_ms: float = 2.0, profile_format: str = "speedscope", keep: int = 200):
+        if profile_format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format '{profile_format}'. Expected one of {PROFILE_FORMATS}")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.min_latency_ms = min_latency_ms
+        self.profile_format = profile_format
+        self.keep = keep
+        self.sampler = StackSampler(interval_ms / 1000.0)
+        self.written = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def wants(self, headers) -> Tuple[bool, bool]:
+        """(profile this request, keep it whatever its latency)"""
+        admin_token = os.getenv("ADMIN_TOKEN")
+        if admin_token:
+            for name, value in headers:
+                if name == PROFILE_HEADER:
+                    if hmac.compare_digest(value, admin_token.encode()):
+                        return True, True
+                    break
+        return self.sample_rate > 0 and random.random() < self.sample_rate, False
+
+    def write(self, session: ProfileSession, method: str, route: str, latency_ms: float) -> str:
+        """Write one finished session and prune old profiles; returns the file name"""
+        created = datetime.now(timezone.utc)
+        route_tag = re.sub(r"[^\w.+-]", "_", route.strip("/").replace("/", "+"))
+        stem = (f"{created.strftime('%Y%m%dT%H%M%S')}.{created.microsecond // 1000:03d}Z_"
+                f"{method}_{route_tag}_{latency_ms:.1f}ms_{uuid.uuid4().hex[:8]}")
+        if self.profile_format == "speedscope":
+            name = stem + ".speedscope.json"
+            content = json.dumps(to_speedscope(session, f"{method} {route} {latency_ms:.1f} ms", latency_ms))
+        else:
+            name = stem + ".collapsed.txt"
+            content = to_collapsed(session)
+
+        tmp_path = os.path.join(self.directory, name + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        self.written += 1
+        self.prune()
+        return name
+
+    def prune(self):
+        """Delete all but the newest `keep` profiles"""
+        for profile in self.list()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, profile["name"]))
+            except FileNotFoundError:
+                pass  # another worker got there first
+
+    def list(self) -> List[Dict]:
+        """Profiles in the directory, newest first"""
+        profiles = []
+        for name in os.listdir(self.directory):
+            match = _NAME_PATTERN.match(name)
+            if match is None:
+                continue
+            info = match.groupdict()
+            profiles.append({
+                "name": name,
+                "created": info["created"],
+                "method": info["method"],
+                "route": "/" + info["route"].replace("+", "/"),
+                "latency_ms": float(info["latency_ms"]),
+                "format": "speedscope" if info["format"].startswith("speedscope") else "collapsed",
+            })
+        profiles.sort(key=lambda profile: profile["created"], reverse=True)
+        return profiles
+
+    def path(self, name: str) -> Optional[str]:
+        """Full path of a profile listed in the directory, or None"""
+        if _NAME_PATTERN.match(name) is None:
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling sampled or explicitly requested HTTP requests"""
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or get_profiler()
+        # Profile writes in flight; the loop only keeps weak references to them
+        self._writes = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile, forced = self.profiler.wants(scope.get("headers", ()))
+        if not profile:
+            await self.app(scope, receive, send)
+            return
+
+        session = self.profiler.sampler.start(threading.get_ident())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.sampler.stop(session)
+            latency_ms = (time.perf_counter() - session.started) * 1e3
+            # Route template recorded by TimedRoute (MetricsMiddleware runs outside this one)
+            timings = current_timings()
+            route = timings.endpoint if timings is not None and timings.endpoint else scope["path"]
+            if forced or latency_ms >= self.profiler.min_latency_ms:
+                # Not awaited: the disk write must not count towards the request's
+                # latency, and a failed write must not raise after the response
+                write = asyncio.get_running_loop().run_in_executor(
+                    None, self.profiler.write, session, scope.get("method", ""), route, latency_ms)
+                self._writes.add(write)
+                write.add_done_callback(self._write_done)
+
+    def _write_done(self, write):
+        self._writes.discard(write)
+        if not write.cancelled() and write.exception() is not None:
+            print(f"⚠️  Could not write request profile: {write.exception()}")
+
+
+def profiling_enabled() -> bool:
+    return bool(os.getenv("PROFILE_DIR"))
+
+
+# Global profiler instance
+_profiler_instance: Optional[RequestProfiler] = None
+
+def get_profiler() -> Optional[RequestProfiler]:
+    """Get or create the request profiler configured from the environment, or None if PROFILE_DIR is unset"""
+    global _profiler_instance
+    if _profiler_instance is None and profiling_enabled():
+        _profiler_instance = RequestProfiler(
+            directory=os.getenv("PROFILE_DIR"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", 0)),
+            min_latency_ms=float(os.getenv("PROFILE_MIN_LATENCY_MS", 0)),
+            interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", 2)),
+            profile_format=os.getenv("PROFILE_FORMAT", "speedscope").lower(),
+            keep=int(os.getenv("PROFILE_KEEP", 200)),
+        )
+    return _profiler_instance
@@ -0,0 +1,276 @@
+"""
+Dynamic-time-warping scores for moving signs (J, Z, word signs).
+
+A sequence template is a (frames, 21, 4) clip of x, y, z, visibility. Both the
+attempt and every template are resampled to a common length, then compared
+with DTW restricted to a Sakoe-Chiba band of radius ceil(band * length).
+
+The distance between an attempt frame and a template frame is the mean
+squared landmark distance over the attempt frame's visible landmarks (the
+same cutoff as score_attempt). A DTW cost is the sum along the warping path,
+divided by the sequence length, and is mapped to 0-100 with the same
+100 * exp(-10 * cost) curve as static scoring.
+
+Searching many templates prunes with lower bounds on the DTW cost: LB_Kim
+(the first and last frames, which every path matches) and LB_Keogh (the
+attempt's distance outside each template's band envelope). Templates are
+visited in lower-bound order and skipped once the bound exceeds the n-th best
+cost found so far. The DTW recursion itself runs one anti-diagonal at a time,
+vectorized over all templates in a chunk.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.attempt_scoring import VISIBILITY_CUTOFF
+
+# Templates evaluated per DTW call while searching
+SEARCH_CHUNK = 32
+# Templates per LB_Keogh block
+LB_BLOCK = 128
+
+
+def resample(frames: np.ndarray, length: int) -> np.ndarray:
+    """Linearly resample a (frames, 21, C) clip to (length, 21, C)"""
+    frames = np.asarray(frames, dtype=np.float64)
+    if len(frames) == 1:
+        return np.repeat(frames, length, axis=0)
+    positions = np.linspace(0.0, len(frames) - 1, length)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, len(frames) - 1)
+    fraction = (positions - lower)[:, None, None]
+    return frames[lower] * (1.0 - fraction) + frames[upper] * fraction
+
+
+def envelope(templates: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Upper and lower LB_Keogh envelopes of (K, L, 21, 3) templates over the band"""
+    length = templates.shape[1]
+    upper = templates.copy()
+    lower = templates.copy()
+    for shift in range(1, radius + 1):
+        if shift >= length:
+            break
+        np.maximum(upper[:, shift:], templates[:, :-shift], out=upper[:, shift:])
+        np.maximum(upper[:, :-shift], templates[:, shift:], out=upper[:, :-shift])
+        np.minimum(lower[:, shift:], templates[:, :-shift], out=lower[:, shift:])
+        np.minimum(lower[:, :-shift], templates[:, shift:], out=lower[:, :-shift])
+    return upper, lower
+
+
+def _query_weights(query: np.ndarray) -> np.ndarray:
+    """(L, 21) weights: 1 / visible landmark count for visible landmarks, else 0"""
+    visible = (query[:, :, 3] > VISIBILITY_CUTOFF).astype(np.float64)
+    counts = visible.sum(axis=1, keepdims=True)
+    return np.divide(visible, counts, out=np.zeros_like(visible), where=counts > 0)
+
+
+def lb_kim(query: np.ndarray, templates: np.ndarray) -> np.ndarray:
+    """
+    Lower bounds on the normalized DTW cost from the first and last frames,
+    which every warping path matches with each other. Much cheaper than LB_Keogh.
+    """
+    weights = _query_weights(query)
+    bound = ((templates[:, 0] - query[0, :, :3]) ** 2).sum(axis=2) @ weights[0]
+    # A single frame is both first and last; its cost is only paid once
+    if query.shape[0] > 1:
+        bound = bound + ((templates[:, -1] - query[-1, :, :3]) ** 2).sum(axis=2) @ weights[-1]
+    return bound / query.shape[0]
+
+
+def lb_keogh(query: np.ndarray, upper: np.ndarray, lower: np.ndarray,
+             positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Lower bounds on the normalized DTW cost of an (L, 21, 4) query against
+    (K, L, 21, 3) envelopes, or only against the envelopes at positions.
+    """
+    coords = query[:, :, :3].reshape(-1)
+    weights = np.repeat(_query_weights(query).reshape(-1), 3) / query.shape[0]
+    upper = upper.reshape(len(upper), -1)
+    lower = lower.reshape(len(lower), -1)
+    if positions is None:
+        positions = np.arange(len(upper))
+    n_templates = len(positions)
+    bounds = np.empty(n_templates)
+    # Blocks of templates keep the temporaries in cache
+    excess = np.empty((min(LB_BLOCK, n_templates), len(coords)))
+    below = np.empty_like(excess)
+    for start in range(0, n_templates, LB_BLOCK):
+        stop = min(start + LB_BLOCK, n_templates)
+        block, block_below = excess[:stop - start], below[:stop - start]
+        block_positions = positions[start:stop]
+        # A coordinate is above the upper or below the lower envelope, never both
+        np.subtract(coords, upper[block_positions], out=block)
+        np.subtract(lower[block_positions], coords, out=block_below)
+        np.maximum(block, block_below, out=block)
+        np.maximum(block, 0.0, out=block)
+        np.square(block, out=block)
+        np.matmul(block, weights, out=bounds[start:stop])
+    return bounds
+
+
+def frame_costs(query: np.ndarray, templates: np.ndarray) -> np.ndarray:
+    """(K, L, L) cost of matching query frame i with template frame j"""
+    weights = _query_weights(query)  # (L, 21)
+    coords = query[:, :, :3]
+    length = query.shape[0]
+    # sum_l w_il * |q_il - t_kjl|^2 = sum w|q|^2 - 2 sum w q.t + sum w |t|^2
+    query_term = (weights * (coords ** 2).sum(axis=2)).sum(axis=1)  # (L,)
+    cross = np.matmul(templates.reshape(len(templates), length, -1),
+                      (coords * weights[:, :, None]).reshape(length, -1).T)  # (K, Lj, Li)
+    template_term = np.matmul((templates ** 2).sum(axis=3), weights.T)  # (K, Lj, Li)
+    costs = query_term[None, None, :] - 2.0 * cross + template_term
+    return np.maximum(costs, 0.0).transpose(0, 2, 1)
+
+
+def dtw(costs: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Accumulated DTW costs of (K, L, L) cost matrices within a Sakoe-Chiba band.
+
+    Returns the (K, L + 1, L + 1) table; [:, L, L] is the total path cost.
+    Cells on one anti-diagonal only depend on the previous two, so each
+    diagonal is one vectorized step over every template.
+    """
+    n_templates, length, _ = costs.shape
+    table = np.full((n_templates, length + 1, length + 1), np.inf)
+    table[:, 0, 0] = 0.0
+    for diagonal in range(2, 2 * length + 1):
+        i = np.arange(max(1, diagonal - length), min(length, diagonal - 1) + 1)
+        i = i[np.abs(2 * i - diagonal) <= radius]
+        if len(i) == 0:
+            continue
+        j = diagonal - i
+        best_previous = np.minimum(
+            np.minimum(table[:, i - 1, j - 1], table[:, i - 1, j]), table[:, i, j - 1]
+        )
+        table[:, i, j] = costs[:, i - 1, j - 1] + best_previous
+    return table
+
+
+def warping_path(table: np.ndarray) -> List[Tuple[int, int]]:
+    """Backtrack one (L + 1, L + 1) DTW table into 0-based (query, template) frame pairs"""
+    i = j = table.shape[0] - 1
+    path = [(i - 1, j - 1)]
+    while i > 1 or j > 1:
+        steps = ((i - 1, j - 1), (i - 1, j), (i, j - 1))
+        i, j = min(steps, key=lambda step: table[step])
+        path.append((i - 1, j - 1))
+    return path[::-1]
+
+
+def cost_to_score(cost):
+    return np.clip(100 * np.exp(-10 * np.asarray(cost)), 0.0, 100.0)
+
+
+class SequenceIndex:
+    """Resampled sequence templates with their band envelopes, ready for DTW search"""
+
+    def __init__(self, words: Sequence[str], sequences: Sequence[np.ndarray],
+                 display_names: Optional[Sequence[str]] = None,
+                 difficulties: Optional[Sequence[str]] = None,
+                 length: int = 32, band: float = 0.1):
+        if len(words) != len(sequences):
+            raise ValueError(f"Got {len(words)} sequence words for {len(sequences)} sequences")
+        self.words = [str(word) for word in words]
+        self.display_names = [str(name) for name in display_names] if display_names is not None else list(self.words)
+        self.difficulties = [str(level) for level in difficulties] if difficulties is not None else ["medium"] * len(self.words)
+        self.length = length
+        self.band = band
+        self.radius = int(math.ceil(band * length))
+        self.sequences = [np.asarray(sequence, dtype=np.float64) for sequence in sequences]
+        self.templates = np.stack([resample(sequence, length)[:, :, :3] for sequence in self.sequences]) \
+            if self.sequences else np.zeros((0, length, 21, 3))
+        self.upper, self.lower = envelope(self.templates, self.radius)
+        self._positions: Dict[str, int] = {word: i for i, word in enumerate(self.words)}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def position(self, word: str) -> Optional[int]:
+        return self._positions.get(word)
+
+    def align(self, frames: np.ndarray, position: int):
+        """
+        DTW-align an attempt with one template.
+
+        Returns (score, per-frame scores, matched template frames): each
+        submitted frame is scored against the template frame its resampled
+        position was warped onto, and matched template frames are (frames, 21, 4).
+        """
+        query = resample(frames, self.length)
+        if not (query[:, :, 3] > VISIBILITY_CUTOFF).any():
+            return 0.0, np.zeros(len(frames)), np.zeros((len(frames), 21, 4))
+
+        costs = frame_costs(query, self.templates[position:position + 1])
+        table = dtw(costs, self.radius)
+        score = float(cost_to_score(table[0, -1, -1] / self.length))
+
+        # Map every submitted frame to its nearest resampled frame, then along the path
+        matched = np.zeros(self.length, dtype=np.intp)
+        for query_index, template_index in warping_path(table[0]):
+            matched[query_index] = template_index
+        nearest = np.rint(np.linspace(0, self.length - 1, len(frames))).astype(np.intp)
+        reference = resample(self.sequences[position], self.length)
+        if reference.shape[2] == 3:
+            reference = np.concatenate([reference, np.ones((self.length, 21, 1))], axis=2)
+        frame_costs_along_path = costs[0, nearest, matched[nearest]]
+        return score, cost_to_score(frame_costs_along_path), reference[matched[nearest]]
+
+    def _merge(self, query, chunk, best_positions, best_costs, n):
+        """Run DTW on a chunk of templates and keep the n lowest costs overall"""
+        table = dtw(frame_costs(query, self.templates[chunk]), self.radius)
+        positions = np.concatenate([best_positions, chunk])
+        costs = np.concatenate([best_costs, table[:, -1, -1] / self.length])
+        keep = np.lexsort((positions, costs))[:n]
+        return positions[keep], costs[keep]
+
+    def search(self, frames: np.ndarray, n: int = 5, prune: bool = True):
+        """
+        The n templates with the lowest DTW cost to an attempt, best first.
+
+        With pruning, the templates whose endpoints match best (LB_Kim) are
+        scored first to get a cost to beat; the rest are filtered by LB_Kim,
+        then by LB_Keogh, and the survivors visited in LB_Keogh order until the
+        bound reaches the n-th best cost. Returns (positions, scores, stats),
+        where stats counts templates that needed LB_Keogh and full DTW.
+        """
+        n = max(0, min(n, len(self)))
+        query = resample(frames, self.length)
+        stats = {"templates": len(self), "lb_keogh": 0, "dtw": 0, "pruned": 0}
+        best_positions = np.zeros(0, dtype=np.intp)
+        best_costs = np.zeros(0)
+        if n == 0 or not (query[:, :, 3] > VISIBILITY_CUTOFF).any():
+            return best_positions, best_costs, stats
+
+        if not prune:
+            for start in range(0, len(self), SEARCH_CHUNK):
+                chunk = np.arange(start, min(start + SEARCH_CHUNK, len(self)))
+                best_positions, best_costs = self._merge(query, chunk, best_positions, best_costs, n)
+            stats["dtw"] = len(self)
+            return best_positions, cost_to_score(best_costs), stats
+
+        kim = lb_kim(query, self.templates)
+        order = np.argsort(kim, kind="stable")
+        seed = order[:max(n, SEARCH_CHUNK)]
+        best_positions, best_costs = self._merge(query, seed, best_positions, best_costs, n)
+        evaluated = len(seed)
+
+        rest = order[len(seed):]
+        rest = rest[kim[rest] < best_costs[-1]]
+        bounds = lb_keogh(query, self.upper, self.lower, rest)
+        stats["lb_keogh"] = len(rest)
+        by_bound = np.argsort(bounds, kind="stable")
+        rest, bounds = rest[by_bound], bounds[by_bound]
+
+        chunk_size = max(n, SEARCH_CHUNK)
+        for start in range(0, len(rest), chunk_size):
+            chunk = rest[start:start + chunk_size]
+            chunk = chunk[bounds[start:start + chunk_size] < best_costs[-1]]
+            if len(chunk) == 0:
+                break  # the rest of the order has even larger bounds
+            best_positions, best_costs = self._merge(query, chunk, best_positions, best_costs, n)
+            evaluated += len(chunk)
+
+        stats["dtw"] = evaluated
+        stats["pruned"] = len(self) - evaluated
+        return best_positions, cost_to_score(best_costs), stats
@@ -0,0 +1,138 @@
+"""
+Per-session state for incremental recognition of a client's frame stream.
+
+A client that sends a session_id gets two things:
+- Delta gating: if the hand has barely moved since the last frame that was
+  actually evaluated, the previous prediction is returned without running
+  the model.
+- Temporal smoothing: probabilities are an exponential moving average over
+  the evaluated frames, so the predicted letter does not flicker.
+
+Sessions live in a bounded LRU map and are dropped after a period of
+inactivity, so memory stays flat no matter how many learners come and go.
+
+Configured through environment variables:
+    SESSION_STORE_SIZE           max concurrent sessions; 0 disables (default 10000)
+    SESSION_IDLE_SECONDS         drop sessions idle this long (default 60)
+    SESSION_MOTION_THRESHOLD     mean landmark displacement, in normalized image
+                                 units, below which a frame is skipped (default 0.005)
+    SESSION_EMA_ALPHA            weight of the newest frame in the average (default 0.5)
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class _Session:
+    __slots__ = ("features", "proba", "version", "last_seen")
+
+    def __init__(self, features, proba, version, last_seen):
+        self.features = features  # (21, 3) landmarks of the last evaluated frame
+        self.proba = proba        # smoothed probability vector
+        self.version = version    # model version that produced proba (fixes the class order)
+        self.last_seen = last_seen
+
+
+class SessionStore:
+    """Bounded, idle-evicting map of session_id -> last evaluated frame and smoothed probabilities"""
+
+    def __init__(self, max_sessions: int = 10000, idle_seconds: float = 60.0,
+                 motion_threshold: float = 0.005, ema_alpha: float = 0.5):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.motion_threshold = motion_threshold
+        self.ema_alpha = ema_alpha
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.frames_skipped = 0
+        self.frames_evaluated = 0
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        # Sessions are kept in last-seen order, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.idle_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def reuse(self, session_id: str, features: np.ndarray, version: Optional[str]) -> Optional[np.ndarray]:
+        """
+        The session's previous (smoothed) probabilities if the hand has not
+        moved enough since the last evaluated frame, else None.
+        """
+        now = time.monotonic()
+        self._evict(now)
+        session = self._sessions.get(session_id)
+        if session is None or session.version != version:
+            return None
+
+        landmarks = np.asarray(features, dtype=np.float64).reshape(21, 3)
+        motion = float(np.linalg.norm(landmarks - session.features, axis=1).mean())
+        if motion >= self.motion_threshold:
+            return None
+
+        session.last_seen = now
+        self._sessions.move_to_end(session_id)
+        self.frames_skipped += 1
+        return session.proba
+
+    def update(self, session_id: str, features: np.ndarray, version: Optional[str],
+               proba: np.ndarray) -> np.ndarray:
+        """Record a freshly evaluated frame and return the smoothed probabilities"""
+        now = time.monotonic()
+        proba = np.array(proba, dtype=np.float64)
+
+        session = self._sessions.get(session_id)
+        if session is not None and session.version == version and session.proba.shape == proba.shape:
+            proba = self.ema_alpha * proba + (1.0 - self.ema_alpha) * session.proba
+
+        session = _Session(
+            features=np.asarray(features, dtype=np.float64).reshape(21, 3),
+            proba=proba,
+            version=version,
+            last_seen=now,
+        )
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        self.frames_evaluated += 1
+        self._evict(now)
+        return proba
+
+    def stats(self) -> Dict:
+        frames = self.frames_skipped + self.frames_evaluated
+        return {
+            "enabled": True,
+            "max_sessions": self.max_sessions,
+            "idle_seconds": self.idle_seconds,
+            "motion_threshold": self.motion_threshold,
+            "ema_alpha": self.ema_alpha,
+            "active_sessions": len(self._sessions),
+            "frames_evaluated": self.frames_evaluated,
+            "frames_skipped": self.frames_skipped,
+            "skip_rate": self.frames_skipped / frames if frames else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# Global session store (None when disabled)
+_store_instance: Optional[SessionStore] = None
+_store_configured = False
+
+def get_session_store() -> Optional[SessionStore]:
+    """Get the configured session store, or None if SESSION_STORE_SIZE is 0"""
+    global _store_instance, _store_configured
+    if not _store_configured:
+        max_sessions = int(os.getenv("SESSION_STORE_SIZE", 10000))
+        if max_sessions > 0:
+            _store_instance = SessionStore(
+                max_sessions=max_sessions,
+                idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", 60.0)),
+                motion_threshold=float(os.getenv("SESSION_MOTION_THRESHOLD", 0.005)),
+                ema_alpha=float(os.getenv("SESSION_EMA_ALPHA", 0.5)),
+            )
+        _store_configured = True
+    return _store_instance
@@ -1,19 +1,33 @@
+import numpy as np
+
 from models.sign_language_model import get_model
-from schemas.sign_language import SignLanguageRequest, SignLanguageResponse
+from services.executor import get_executor
+from services.metrics import note_model_version
+from services.inference_scheduler import get_scheduler
+from services.prediction_cache import get_prediction_cache
+from services.session_store import get_session_store
+from schemas.sign_language import (
+    SignLanguageRequest,
+    SignLanguageResponse,
+    SignLanguageBatchRequest,
+    SignLanguageBatchResponse,
+)
+
+# Upper bound on frames accepted by a single batch request
+MAX_BATCH_FRAMES = 64
 
 
 class SignLanguageService:
     """Service for sign language recognition"""
     
-    def __init__(self):
-        self.model = get_model()
-    
     def predict_sign(self, request: SignLanguageRequest) -> SignLanguageResponse:
         """Predict sign from hand landmarks"""
-        landmarks = request.hand_landmarks.landmarks
+        model = get_model()
+        note_model_version(model.version)
+        features = self.request_features(model, request)
         
         # Validate we have 21 landmarks
-        if len(landmarks) != 21:
+        if features is None:
             return SignLanguageResponse(
                 predicted_sign="INVALID",
                 confidence=0.0,
@@ -21,13 +35,152 @@ class SignLanguageService:
             )
         
         # Get prediction from model
-        predicted_sign, confidence, all_predictions = self.model.predict(landmarks)
+        probabilities = model.predict_proba_features(features)
+        return self.build_response(model.class_names, probabilities[0], request.top_k)
+    
+    @staticmethod
+    def request_features(model, request: SignLanguageRequest):
+        """
+        The (1, 63) feature row of a single-frame request, or None if it does
+        not have 21 landmarks. Raises ValueError for a malformed packed buffer.
+        """
+        if request.packed is not None:
+            landmarks = request.packed.to_array()
+            if len(landmarks) != 1:
+                raise ValueError(f"Expected one packed frame, got {len(landmarks)}")
+            return model.preprocess_landmark_array(landmarks)
+        
+        landmarks = request.hand_landmarks.landmarks
+        if len(landmarks) != 21:
+            return None
+        return model.preprocess_landmarks(landmarks)
+    
+    @staticmethod
+    def build_response(class_names, proba, top_k=None) -> SignLanguageResponse:
+        """
+        Turn a probability vector into the JSON response.
+        
+        top_k=None lists every class in all_predictions, top_k=0 omits it,
+        and a positive top_k keeps only the k most likely classes.
+        """
+        if len(proba) == 0:
+            return SignLanguageResponse(predicted_sign="UNKNOWN", confidence=0.0, all_predictions={})
+        
+        best = int(np.argmax(proba))
+        if top_k is None:
+            all_predictions = dict(zip(class_names, proba.tolist()))
+        elif top_k == 0:
+            all_predictions = None
+        else:
+            top = np.argsort(-proba, kind="stable")[:top_k]
+            all_predictions = {class_names[i]: float(proba[i]) for i in top}
         
         return SignLanguageResponse(
-            predicted_sign=predicted_sign,
-            confidence=confidence,
+            predicted_sign=class_names[best],
+            confidence=float(proba[best]),
             all_predictions=all_predictions
         )
+    
+    async def predict_proba_batch(self, request: SignLanguageBatchRequest):
+        """
+        Probability matrix for several frames from one vectorized model pass.
+        
+        Returns (model, probabilities, valid_idx): rows of probabilities
+        belong to the frames listed in valid_idx; frames without exactly 21
+        landmarks are left out of the model call. Packed frames always have 21.
+        """
+        model = get_model()
+        note_model_version(model.version)
+        if request.packed is not None:
+            features = model.preprocess_landmark_array(request.packed.to_array())
+            valid_idx = list(range(len(features)))
+        else:
+            frames = [hand.landmarks for hand in request.frames]
+            valid_idx = [i for i, landmarks in enumerate(frames) if len(landmarks) == 21]
+            features = model.preprocess_landmarks_batch([frames[i] for i in valid_idx]) if valid_idx else None
+        
+        probabilities = np.zeros((0, len(model.class_names)))
+        if valid_idx:
+            probabilities = await get_executor().run_model(model, features)
+        return model, probabilities, valid_idx
+    
+    async def predict_signs_batch(self, request: SignLanguageBatchRequest) -> SignLanguageBatchResponse:
+        """Predict signs for several frames with one vectorized model pass"""
+        model, probabilities, valid_idx = await self.predict_proba_batch(request)
+        
+        # Frames without exactly 21 landmarks are answered as INVALID
+        predictions = [
+            SignLanguageResponse(predicted_sign="INVALID", confidence=0.0, all_predictions={})
+            for _ in range(request.frame_count())
+        ]
+        for i, proba in zip(valid_idx, probabilities):
+            predictions[i] = self.build_response(model.class_names, proba, request.top_k)
+        
+        return SignLanguageBatchResponse(predictions=predictions)
+    
+    async def predict_proba_async(self, request: SignLanguageRequest):
+        """
+        Class probabilities for one frame, coalescing with concurrent requests.
+        
+        Returns (model, proba), or (model, None) if the frame does not have
+        21 landmarks. With a session_id, a frame whose landmarks barely moved
+        since the session's last evaluated frame reuses that result, and
+        evaluated frames are smoothed over time. When PREDICTION_CACHE_SIZE is
+        set, frames that quantize to a recently seen pose are answered from the
+        PredictionCache. Otherwise, when INFERENCE_BATCHING is enabled the frame
+        is handed to the shared InferenceScheduler and scored together with
+        other clients' frames, or else it is scored on its own. Either way the
+        model runs on the configured InferenceExecutor rather than on the event loop.
+        """
+        model = get_model()
+        note_model_version(model.version)
+        features = self.request_features(model, request)
+        
+        # Validate we have 21 landmarks
+        if features is None:
+            return model, None
+        
+        sessions = get_session_store() if request.session_id else None
+        if sessions is not None:
+            proba = sessions.reuse(request.session_id, features, model.version)
+            if proba is not None:
+                return model, proba
+        
+        cache = get_prediction_cache()
+        cache_key = None
+        proba = None
+        if cache is not None:
+            cache_key = cache.key(features, model.version)
+            proba = cache.get(cache_key)
+        
+        if proba is None:
+            proba = await self._predict_features(model, features)
+            if cache is not None:
+                cache.put(cache_key, proba)
+        
+        if sessions is not None:
+            proba = sessions.update(request.session_id, features, model.version, proba)
+        
+        return model, proba
+    
+    async def predict_sign_async(self, request: SignLanguageRequest) -> SignLanguageResponse:
+        """Predict sign from hand landmarks (see predict_proba_async)"""
+        model, proba = await self.predict_proba_async(request)
+        if proba is None:
+            return SignLanguageResponse(
+                predicted_sign="INVALID",
+                confidence=0.0,
+                all_predictions={}
+            )
+        return self.build_response(model.class_names, proba, request.top_k)
+    
+    async def _predict_features(self, model, features):
+        """Run one (1, 63) feature row through the scheduler or the executor"""
+        scheduler = get_scheduler()
+        if scheduler is None:
+            probabilities = await get_executor().run_model(model, features)
+            return probabilities[0]
+        return await scheduler.predict(model, features)
 
 
 # Global service instance
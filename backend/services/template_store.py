@@ -0,0 +1,220 @@
+"""
+Library of reference hand poses, one (21, 4) frame per sign.
+
+All templates live in one packed (words, 21, 4) float64 array of x, y, z,
+visibility, so scoring a frame against the whole library is a single
+vectorized score_attempt call. The library is loaded once from an .npz file
+written by scripts/build_templates.py:
+
+    words          (W,)         template ids, e.g. "hello", "A"
+    landmarks      (W, 21, 4)   x, y, z, visibility
+    display_names  (W,)         optional, defaults to the ids
+    difficulties   (W,)         optional, "easy" | "medium" | "hard"
+
+Moving signs can also have a multi-frame template, scored with DTW (see
+services/sequence_scoring.py). Their clips are stored back to back:
+
+    sequence_words          (S,)
+    sequence_frames         (total frames, 21, 4)
+    sequence_offsets        (S + 1,)   clip k is sequence_frames[offsets[k]:offsets[k + 1]]
+    sequence_display_names  (S,)       optional
+    sequence_difficulties   (S,)       optional
+
+Nearest-template search scores every template exactly while the library is
+small. From TEMPLATE_INDEX_THRESHOLD templates on, a BallTree over the x, y, z
+coordinates picks a shortlist that is then scored exactly; for fully visible
+frames the shortlist order is the score order, so the result is unchanged.
+
+Configured through environment variables:
+    TEMPLATES_PATH              template library file (default models/templates.npz)
+    TEMPLATE_INDEX_THRESHOLD    library size from which the BallTree is used (default 1024)
+    DTW_SEQUENCE_LENGTH         frames sequences are resampled to before DTW (default 32)
+    DTW_BAND                    Sakoe-Chiba band radius as a fraction of that length (default 0.1)
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.attempt_scoring import score_attempt
+from services.sequence_scoring import SequenceIndex
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "templates.npz")
+
+# Candidates fetched from the index per requested match, before exact rescoring
+INDEX_OVERSAMPLE = 4
+MIN_INDEX_CANDIDATES = 32
+
+
+class TemplateStore:
+    """Packed reference poses with exact and indexed nearest-template search"""
+
+    def __init__(self, words: Sequence[str], landmarks: np.ndarray,
+                 display_names: Optional[Sequence[str]] = None,
+                 difficulties: Optional[Sequence[str]] = None,
+                 index_threshold: int = 1024,
+                 sequences: Optional[SequenceIndex] = None):
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float64)
+        if landmarks.ndim != 3 or landmarks.shape[1:] != (21, 4) or len(landmarks) != len(words):
+            raise ValueError(f"Expected ({len(words)}, 21, 4) template landmarks, got {landmarks.shape}")
+        self.words = [str(word) for word in words]
+        self.landmarks = landmarks
+        self.display_names = [str(name) for name in display_names] if display_names is not None else list(self.words)
+        self.difficulties = [str(level) for level in difficulties] if difficulties is not None else ["medium"] * len(self.words)
+        self.index_threshold = index_threshold
+        self._positions: Dict[str, int] = {word: i for i, word in enumerate(self.words)}
+        self._tree = None  # built on first indexed search
+        self.sequences = sequences  # multi-frame templates, if any
+
+    @classmethod
+    def load(cls, path: str, index_threshold: int = 1024,
+             sequence_length: int = 32, band: float = 0.1) -> "TemplateStore":
+        with np.load(path) as data:
+            sequences = None
+            if "sequence_words" in data:
+                offsets = data["sequence_offsets"]
+                frames = data["sequence_frames"]
+                sequences = SequenceIndex(
+                    words=data["sequence_words"],
+                    sequences=[frames[start:end] for start, end in zip(offsets[:-1], offsets[1:])],
+                    display_names=data["sequence_display_names"] if "sequence_display_names" in data else None,
+                    difficulties=data["sequence_difficulties"] if "sequence_difficulties" in data else None,
+                    length=sequence_length,
+                    band=band,
+                )
+            return cls(
+                words=data["words"],
+                landmarks=data["landmarks"],
+                display_names=data["display_names"] if "display_names" in data else None,
+                difficulties=data["difficulties"] if "difficulties" in data else None,
+                index_threshold=index_threshold,
+                sequences=sequences,
+            )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {
+            "words": np.array(self.words, dtype=str),
+            "landmarks": self.landmarks,
+            "display_names": np.array(self.display_names, dtype=str),
+            "difficulties": np.array(self.difficulties, dtype=str),
+        }
+        if self.sequences is not None and len(self.sequences):
+            clips = [
+                clip if clip.shape[2] == 4 else np.concatenate([clip, np.ones(clip.shape[:2] + (1,))], axis=2)
+                for clip in self.sequences.sequences
+            ]
+            arrays.update(
+                sequence_words=np.array(self.sequences.words, dtype=str),
+                sequence_frames=np.concatenate(clips),
+                sequence_offsets=np.cumsum([0] + [len(clip) for clip in clips]),
+                sequence_display_names=np.array(self.sequences.display_names, dtype=str),
+                sequence_difficulties=np.array(self.sequences.difficulties, dtype=str),
+            )
+        np.savez(path, **arrays)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._positions or self.sequence_position(word) is not None
+
+    def sequence_position(self, word: str) -> Optional[int]:
+        """Position of a word's multi-frame template, or None if it only has a static one"""
+        return self.sequences.position(word) if self.sequences is not None else None
+
+    def get(self, word: str) -> Optional[np.ndarray]:
+        """The (21, 4) template for a word, or None"""
+        position = self._positions.get(word)
+        return self.landmarks[position] if position is not None else None
+
+    def word_info(self) -> List[Dict]:
+        """Every practicable word: static templates, then sequence-only ones"""
+        info = [
+            {"id": word, "display_name": name, "difficulty": level}
+            for word, name, level in zip(self.words, self.display_names, self.difficulties)
+        ]
+        if self.sequences is not None:
+            info += [
+                {"id": word, "display_name": name, "difficulty": level}
+                for word, name, level in zip(self.sequences.words, self.sequences.display_names,
+                                             self.sequences.difficulties)
+                if word not in self._positions
+            ]
+        return info
+
+    @property
+    def uses_index(self) -> bool:
+        return len(self) >= self.index_threshold
+
+    def _get_tree(self):
+        if self._tree is None:
+            # Concurrent first searches may both build it; either tree is valid
+            from sklearn.neighbors import BallTree
+            self._tree = BallTree(self.landmarks[:, :, :3].reshape(len(self), -1))
+        return self._tree
+
+    def nearest(self, frame: np.ndarray, n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The n templates closest to a (21, 4) frame, best first.
+        Returns (template positions, scores) with compute_score's 0-100 scores.
+        """
+        n = max(0, min(n, len(self)))
+        if n == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0)
+
+        if self.uses_index:
+            k = min(len(self), max(n * INDEX_OVERSAMPLE, MIN_INDEX_CANDIDATES))
+            _, candidates = self._get_tree().query(frame[:, :3].reshape(1, -1), k=k)
+            candidates = np.sort(candidates[0])
+        else:
+            candidates = np.arange(len(self))
+
+        # Visibility weighting is symmetric, so the templates can take the frames' place
+        scores, _ = score_attempt(self.landmarks[candidates], frame)
+        order = np.argsort(-scores, kind="stable")[:n]
+        return candidates[order], scores[order]
+
+
+def nearest_templates(frame: np.ndarray, n: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TemplateStore.nearest on the library from TEMPLATES_PATH.
+
+    Module-level so it can run on the InferenceExecutor's process pool, where
+    each worker loads the library once instead of receiving it with every call.
+    """
+    return get_template_store().nearest(frame, n)
+
+
+def align_sequence(frames: np.ndarray, word: str):
+    """SequenceIndex.align against a word's multi-frame template (module-level for process workers)"""
+    store = get_template_store()
+    return store.sequences.align(frames, store.sequence_position(word))
+
+
+def nearest_sequences(frames: np.ndarray, n: int = 5):
+    """SequenceIndex.search over the library's multi-frame templates (module-level for process workers)"""
+    return get_template_store().sequences.search(frames, n)
+
+
+# Global template store (None when no template file exists)
+_store_instance: Optional[TemplateStore] = None
+_store_configured = False
+
+def get_template_store() -> Optional[TemplateStore]:
+    """Get the template library from TEMPLATES_PATH, or None if the file does not exist"""
+    global _store_instance, _store_configured
+    if not _store_configured:
+        path = os.getenv("TEMPLATES_PATH", TEMPLATES_PATH)
+        if os.path.exists(path):
+            _store_instance = TemplateStore.load(
+                path,
+                index_threshold=int(os.getenv("TEMPLATE_INDEX_THRESHOLD", 1024)),
+                sequence_length=int(os.getenv("DTW_SEQUENCE_LENGTH", 32)),
+                band=float(os.getenv("DTW_BAND", 0.1)),
+            )
+            sequences = _store_instance.sequences
+            print(f"Loaded {len(_store_instance)} sign templates and "
+                  f"{len(sequences) if sequences is not None else 0} sequence templates from {path}")
+        _store_configured = True
+    return _store_instance
@@ -0,0 +1,272 @@
+"""
+Firebase ID token verification against an in-memory signing key set.
+
+firebase_admin.auth.verify_id_token keeps Google's signing certificates in
+an HTTP cache. When they expire it fetches them again inside the call,
+which in an async dependency blocks the event loop for a network round
+trip. FirebaseTokenVerifier holds the parsed public keys itself:
+- run_refresher(), started at startup, fetches them ahead of their
+  Cache-Control expiry on a worker thread.
+- Verification only does the RS256 check and the claim checks
+  firebase_admin does.
+- If the keys have expired anyway, or a token names a key id that is not
+  in the set yet, the verifier fetches them inside verify(). Callers run
+  verify() off the event loop.
+- After a failed fetch, verify() keeps using the old keys and does not
+  fetch again for FAILED_FETCH_BACKOFF_SECONDS, so an unreachable key
+  server costs one timeout, not one per waiting request.
+
+The key set can also be pinned from a local file, or fetched from any URL
+serving Google's {"<kid>": "<PEM certificate>"} format.
+scripts/benchmark_token_verification.py uses both, with a local stand-in
+key server, to measure verification without network access.
+
+Configured through environment variables:
+    FIREBASE_PROJECT_ID                  expected "aud" claim (default: the Firebase app's project,
+                                         then GOOGLE_CLOUD_PROJECT)
+    FIREBASE_CERTS_URL                   where signing certificates are fetched (default: Google's)
+    FIREBASE_PINNED_CERTS                JSON file of {"<kid>": "<PEM certificate>"} used instead of
+                                         fetching; never refreshed
+    FIREBASE_KEY_REFRESH_MARGIN_SECONDS  refresh this long before the keys expire (default 600)
+    FIREBASE_CLOCK_SKEW_SECONDS          leeway on the exp/iat/auth_time claims, 0-60 (default 10)
+"""
+import asyncio
+import base64
+import json
+import re
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from firebase_admin import auth
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+# Used when the key server sends no Cache-Control max-age
+DEFAULT_KEY_LIFETIME_SECONDS = 3600
+# A token naming an unknown key id triggers at most one refetch per this interval
+UNKNOWN_KID_REFETCH_SECONDS = 60
+# After a failed fetch, verify() uses the old keys without fetching for this long
+FAILED_FETCH_BACKOFF_SECONDS = 10
+# Retry delays after a failed background refresh
+REFRESH_RETRY_SECONDS = (1, 5, 30, 60)
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class SigningKeySet:
+    """Public keys by key id, and when they stop being valid"""
+
+    def __init__(self, certs: Dict[str, str], expires_at: float, source: str):
+        self.keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in certs.items()
+        }
+        self.expires_at = expires_at
+        self.fetched_at = time.time()
+        self.source = source
+
+    def expired(self, margin: float = 0.0) -> bool:
+        return time.time() >= self.expires_at - margin
+
+
+def fetch_key_set(url: str, timeout: float = 10.0) -> SigningKeySet:
+    """Fetch {"kid": PEM certificate} from url; the keys expire with the response's max-age"""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        certs = json.loads(response.read())
+        cache_control = response.headers.get("Cache-Control", "")
+    match = re.search(r"max-age=(\d+)", cache_control)
+    lifetime = int(match.group(1)) if match else DEFAULT_KEY_LIFETIME_SECONDS
+    return SigningKeySet(certs, time.time() + lifetime, url)
+
+
+def load_pinned_key_set(path: str) -> SigningKeySet:
+    """Keys from a local {"kid": PEM certificate} file; they never expire"""
+    with open(path) as f:
+        certs = json.load(f)
+    return SigningKeySet(certs, float("inf"), path)
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens with signing keys refreshed ahead of expiry"""
+
+    def __init__(self, project_id: str, certs_url: str = GOOGLE_CERTS_URL, pinned_path: Optional[str] = None,
+                 refresh_margin_seconds: float = 600.0, clock_skew_seconds: float = 10.0,
+                 fetch_timeout: float = 10.0):
+        if not 0 <= clock_skew_seconds <= 60:
+            raise ValueError(f"clock_skew_seconds must be between 0 and 60, got {clock_skew_seconds}")
+        self.project_id = project_id
+        self.issuer = ISSUER_PREFIX + project_id
+        self.certs_url = certs_url
+        self.pinned_path = pinned_path
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.clock_skew_seconds = clock_skew_seconds
+        self.fetch_timeout = fetch_timeout
+        self._key_set: Optional[SigningKeySet] = None
+        self._lock = threading.Lock()
+        self._failed_at: Optional[float] = None  # time of the last failed fetch, if the latest one failed
+        self.fetches = 0
+        self.request_path_fetches = 0  # fetches a verify() call had to wait for
+        self.refresh_failures = 0
+        self.last_error: Optional[str] = None
+
+    def _load(self) -> SigningKeySet:
+        if self.pinned_path:
+            return load_pinned_key_set(self.pinned_path)
+        return fetch_key_set(self.certs_url, self.fetch_timeout)
+
+    def refresh(self) -> SigningKeySet:
+        """Load the key set now (blocking) and swap it in"""
+        try:
+            key_set = self._load()
+        except Exception:
+            self._failed_at = time.time()
+            raise
+        self._key_set = key_set
+        self._failed_at = None
+        self.fetches += 1
+        return key_set
+
+    def _backing_off(self) -> bool:
+        failed_at = self._failed_at
+        return failed_at is not None and time.time() - failed_at < FAILED_FETCH_BACKOFF_SECONDS
+
+    def _keys_after_failure(self) -> SigningKeySet:
+        """Keep verifying with the old keys rather than failing every request"""
+        if self._key_set is None:
+            raise auth.CertificateFetchError(f"Could not load signing keys: {self.last_error}", None)
+        return self._key_set
+
+    def _current_keys(self, kid: str) -> SigningKeySet:
+        key_set = self._key_set
+        stale = key_set is None or key_set.expired()
+        unknown = (key_set is not None and kid not in key_set.keys and not self.pinned_path
+                   and time.time() - key_set.fetched_at >= UNKNOWN_KID_REFETCH_SECONDS)
+        if not (stale or unknown):
+            return key_set
+        if self._backing_off():
+            return self._keys_after_failure()
+        with self._lock:
+            # Another thread may have refreshed, or failed to, while this one waited
+            if self._key_set is not key_set:
+                return self._key_set
+            if self._backing_off():
+                return self._keys_after_failure()
+            try:
+                key_set = self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                if self._key_set is None:
+                    raise auth.CertificateFetchError(f"Could not load signing keys: {e}", e) from e
+                return self._key_set
+            self.request_path_fetches += 1
+            return key_set
+
+    def verify(self, id_token: str) -> Dict:
+        """
+        Decoded claims of a valid ID token, with "uid" set to the subject.
+
+        Raises auth.ExpiredIdTokenError, auth.InvalidIdTokenError or
+        auth.CertificateFetchError like firebase_admin.auth.verify_id_token.
+        May block on a key fetch, so call it off the event loop.
+        """
+        try:
+            header_segment, payload_segment, signature_segment = id_token.split(".")
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+            signature = _b64decode(signature_segment)
+        except (ValueError, AttributeError) as e:
+            raise auth.InvalidIdTokenError(f"Malformed ID token: {e}", e)
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise auth.InvalidIdTokenError("Malformed ID token: header and payload must be JSON objects")
+
+        kid = header.get("kid")
+        if header.get("alg") != "RS256":
+            raise auth.InvalidIdTokenError(f'ID token has algorithm "{header.get("alg")}", expected "RS256"')
+        if not kid:
+            raise auth.InvalidIdTokenError('ID token has no "kid" header')
+        if claims.get("aud") != self.project_id:
+            raise auth.InvalidIdTokenError(
+                f'ID token has "aud" claim "{claims.get("aud")}", expected "{self.project_id}"')
+        if claims.get("iss") != self.issuer:
+            raise auth.InvalidIdTokenError(f'ID token has "iss" claim "{claims.get("iss")}", expected "{self.issuer}"')
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise auth.InvalidIdTokenError('ID token has a missing, empty or over-long "sub" claim')
+
+        key = self._current_keys(kid).keys.get(kid)
+        if key is None:
+            raise auth.InvalidIdTokenError(f'ID token was signed with unknown key "{kid}"')
+        try:
+            key.verify(signature, f"{header_segment}.{payload_segment}".encode(),
+                       padding.PKCS1v15(), hashes.SHA256())
+        except InvalidSignature as e:
+            raise auth.InvalidIdTokenError("ID token has an invalid signature", e)
+
+        now = time.time()
+        try:
+            exp, iat = float(claims["exp"]), float(claims["iat"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise auth.InvalidIdTokenError('ID token has a missing or invalid "exp" or "iat" claim', e)
+        if now > exp + self.clock_skew_seconds:
+            raise auth.ExpiredIdTokenError(f"ID token expired at {exp:.0f}, now {now:.0f}", None)
+        if iat > now + self.clock_skew_seconds or float(claims.get("auth_time", iat)) > now + self.clock_skew_seconds:
+            raise auth.InvalidIdTokenError("ID token was issued in the future")
+
+        claims["uid"] = subject
+        return claims
+
+    async def run_refresher(self):
+        """
+        Keep the key set fresh until cancelled: load it right away, then
+        again refresh_margin_seconds before each expiry. Fetches run on a
+        worker thread. Failures are retried after REFRESH_RETRY_SECONDS
+        while the old keys stay in use.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        while True:
+            key_set = self._key_set
+            if key_set is not None and not failures:
+                if key_set.expires_at == float("inf"):
+                    return  # pinned keys never expire
+                lifetime = key_set.expires_at - key_set.fetched_at
+                if lifetime > self.refresh_margin_seconds:
+                    refresh_at = key_set.expires_at - self.refresh_margin_seconds
+                else:
+                    # Keys that live shorter than the margin are refreshed halfway through their lifetime
+                    refresh_at = key_set.fetched_at + lifetime / 2
+                await asyncio.sleep(max(refresh_at - time.time(), 1.0))
+                if self._key_set is not key_set:
+                    continue  # a verify() call fetched newer keys meanwhile
+            try:
+                await loop.run_in_executor(None, self.refresh)
+                failures = 0
+                self.last_error = None
+            except Exception as e:
+                self.refresh_failures += 1
+                self.last_error = str(e)
+                print(f"⚠️  Could not refresh Firebase signing keys: {e}")
+                await asyncio.sleep(REFRESH_RETRY_SECONDS[min(failures, len(REFRESH_RETRY_SECONDS) - 1)])
+                failures += 1
+
+    def stats(self) -> Dict:
+        key_set = self._key_set
+        return {
+            "project_id": self.project_id,
+            "source": key_set.source if key_set else (self.pinned_path or self.certs_url),
+            "keys": len(key_set.keys) if key_set else 0,
+            "expires_in_seconds": (None if key_set is None or key_set.expires_at == float("inf")
+                                   else round(key_set.expires_at - time.time(), 1)),
+            "fetches": self.fetches,
+            "request_path_fetches": self.request_path_fetches,
+            "refresh_failures": self.refresh_failures,
+            "last_error": self.last_error,
+        }
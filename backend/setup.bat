@@ -8,7 +8,7 @@ echo.
 REM Check if Python is installed
 python --version >nul 2>&1
 if errorlevel 1 (
-    echo ❌ Error: Python is not installed. Please install Python 3.8 or higher.
+    echo ❌ Error: Python is not installed. Please install Python 3.9 or higher.
     pause
     exit /b 1
 )
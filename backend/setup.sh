@@ -8,7 +8,7 @@ echo ""
 
 # Check if Python 3 is installed
 if ! command -v python3 &> /dev/null; then
-    echo "❌ Error: Python 3 is not installed. Please install Python 3.8 or higher."
+    echo "❌ Error: Python 3 is not installed. Please install Python 3.9 or higher."
     exit 1
 fi
 